@@ -0,0 +1,131 @@
+# nlp/src/api/admission.py
+import asyncio
+import logging
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+
+class Overloaded(Exception):
+    def __init__(self, retry_after):
+        super().__init__(f"Server overloaded, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class InferenceTimeout(Exception):
+    pass
+
+
+class AdmissionController:
+    """
+    Çıkarımı event loop dışında, ayrılmış bir thread havuzunda çalıştırır.
+    Aynı anda en fazla max_in_flight çıkarım çalışır; diğerleri kuyrukta bekler.
+    Yeni bir isteğin tahmini kuyruk bekleme süresi queue_budget_ms'i aşarsa
+    istek kuyruğa alınmadan Overloaded ile reddedilir. Tahmin, son çıkarım
+    sürelerinin üstel ortalamasından hesaplanır.
+    """
+
+    def __init__(self, max_in_flight=8, max_queue=64, queue_budget_ms=500.0, timeout=5.0,
+                 initial_service_ms=50.0, smoothing=0.2):
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1")
+
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_budget_ms = queue_budget_ms
+        self.timeout = timeout
+        self.smoothing = smoothing
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_in_flight, thread_name_prefix="inference")
+        self._lock = threading.Lock()
+        self._queued = 0
+        self._running = 0
+        self._service_ms = initial_service_ms
+
+        # İstatistikler
+        self._admitted = 0
+        self._shed = 0
+        self._timeouts = 0
+        self._completed = 0
+
+    def estimated_wait_ms(self):
+        with self._lock:
+            return self._estimate_locked()
+
+    def _estimate_locked(self):
+        # Kuyruktakiler max_in_flight'lık dalgalar halinde işlenir
+        waves = self._queued // self.max_in_flight
+        if self._running >= self.max_in_flight:
+            waves += 1
+        return waves * self._service_ms
+
+    def _admit(self, budget_ms):
+        with self._lock:
+            estimate = self._estimate_locked()
+            if self._queued >= self.max_queue or estimate > budget_ms:
+                self._shed += 1
+                raise Overloaded(max(1, math.ceil((estimate + self._service_ms) / 1000.0)))
+            self._queued += 1
+            self._admitted += 1
+
+    def _run(self, func, args, cancelled):
+        with self._lock:
+            self._queued -= 1
+            if cancelled.is_set():
+                return None
+            self._running += 1
+
+        start = time.monotonic()
+        try:
+            return func(*args)
+        finally:
+            elapsed_ms = (time.monotonic() - start) * 1000.0
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._service_ms += self.smoothing * (elapsed_ms - self._service_ms)
+
+    async def run(self, func, *args, timeout=None):
+        """
+        func(*args) çıkarım havuzunda çalıştırılır. Kuyruk doluysa Overloaded,
+        timeout (varsayılan self.timeout) aşılırsa InferenceTimeout yükseltir.
+        Zaman aşımına uğrayan bir istek henüz başlamadıysa hiç çalıştırılmaz.
+        İsteğin kendi timeout'u kuyruk bütçesinden kısaysa bütçe olarak o kullanılır.
+        """
+        timeout = timeout or self.timeout
+        self._admit(min(self.queue_budget_ms, timeout * 1000.0))
+        cancelled = threading.Event()
+        future = asyncio.wrap_future(
+            self._executor.submit(self._run, func, args, cancelled))
+        try:
+            # shield: iş havuzdan çıkarılmaz, başlamadıysa cancelled ile atlanır
+            return await asyncio.wait_for(asyncio.shield(future), timeout)
+        except asyncio.TimeoutError:
+            cancelled.set()
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            with self._lock:
+                self._timeouts += 1
+            raise InferenceTimeout(f"Inference exceeded {timeout}s")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_in_flight": self.max_in_flight,
+                "max_queue": self.max_queue,
+                "queue_budget_ms": self.queue_budget_ms,
+                "timeout": self.timeout,
+                "queued": self._queued,
+                "running": self._running,
+                "service_ms": self._service_ms,
+                "admitted": self._admitted,
+                "shed": self._shed,
+                "timeouts": self._timeouts,
+                "completed": self._completed,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False)
@@ -0,0 +1,106 @@
+# nlp/src/api/asgi.py
+# Asenkron sunucu modu:
+#   uvicorn nlp.src.api.asgi:app --host 0.0.0.0 --port 5000
+# /classify event loop'ta karşılanır, çıkarım ayrılmış bir thread havuzunda
+# sınırlı eşzamanlılıkla çalışır. Kuyruk bütçesi aşıldığında istek hemen
+# 503 + Retry-After ile reddedilir. Diğer uçlar Flask uygulamasından sunulur.
+import logging
+import os
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import FixedWindowRateLimiter
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.wsgi import WSGIMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Mount, Route, Router
+
+from nlp.src.api.admission import AdmissionController, InferenceTimeout, Overloaded
+from nlp.src.api.server import app as flask_app, is_admin_token, model_manager, profiler
+
+logger = logging.getLogger(__name__)
+
+admission = AdmissionController(
+    max_in_flight=int(os.environ.get('NLP_MAX_IN_FLIGHT', 8)),
+    max_queue=int(os.environ.get('NLP_MAX_QUEUE', 64)),
+    queue_budget_ms=float(os.environ.get('NLP_QUEUE_BUDGET_MS', 500)),
+    timeout=float(os.environ.get('NLP_REQUEST_TIMEOUT', 5.0)))
+
+# Flask sunucusundaki "30 per minute" sınırının aynısı
+CLASSIFY_LIMIT = parse("30 per minute")
+rate_limiter = FixedWindowRateLimiter(MemoryStorage())
+
+
+def request_timeout(request):
+    # İstemci X-Request-Timeout ile daha kısa bir süre isteyebilir
+    header = request.headers.get('X-Request-Timeout')
+    try:
+        timeout = float(header) if header else admission.timeout
+    except ValueError:
+        return admission.timeout
+    return min(max(timeout, 0.001), admission.timeout)
+
+
+def leased_message(text, profile=False):
+    # Admission thread'inde çalışır; model değişse de eski örnek istek bitene kadar kapatılmaz
+    with model_manager.lease() as chatbot:
+        if profile:
+            with profiler.session("classify"):
+                return chatbot.process_message(text)
+        return chatbot.process_message(text)
+
+
+async def classify(request: Request):
+    client = request.client.host if request.client else "unknown"
+    if flask_app.config['RATELIMIT_ENABLED'] and not rate_limiter.hit(CLASSIFY_LIMIT, "classify", client):
+        return JSONResponse({"error": "Rate limit exceeded"}, status_code=429)
+
+    if model_manager.current is None:
+        return JSONResponse({"error": "Chatbot initialization failed"}, status_code=500)
+
+    try:
+        data = await request.json()
+    except ValueError:
+        data = None
+    logger.info(f"Received request: {data}")
+    if not isinstance(data, dict) or 'text' not in data:
+        logger.error("Invalid request payload")
+        return JSONResponse({"error": "Invalid request payload"}, status_code=400)
+
+    profile = request.headers.get('X-Profile') == '1' and is_admin_token(request.headers.get('X-Admin-Token'))
+    try:
+        result = await admission.run(leased_message, data['text'], profile, timeout=request_timeout(request))
+    except Overloaded as e:
+        logger.warning(f"Shedding request: {str(e)}")
+        return JSONResponse({"error": "Server overloaded"}, status_code=503,
+                            headers={"Retry-After": str(e.retry_after)})
+    except InferenceTimeout as e:
+        logger.error(f"Request timed out: {str(e)}")
+        return JSONResponse({"error": "Request timed out"}, status_code=504)
+    except Exception as e:
+        logger.error(f"Error processing message: {str(e)}")
+        return JSONResponse({"error": "Error processing message"}, status_code=500)
+
+    logger.info(f"Sending response: {result}")
+    return JSONResponse(result)
+
+
+async def admission_stats(request: Request):
+    return JSONResponse(admission.stats())
+
+
+# CORS yalnızca /classify için (Flask'taki ayarın aynısı); yönetim uçlarına uygulanmaz.
+# Flask uygulaması kendi /classify/* uçlarına flask_cors ile CORS başlıklarını ekler.
+classify_app = CORSMiddleware(
+    Router(routes=[Route('/classify', classify, methods=['POST'])]),
+    allow_origins=["http://localhost:5173"], allow_credentials=True,
+    allow_methods=["*"], allow_headers=["*"])
+
+app = Starlette(
+    routes=[
+        Route('/classify', classify_app),
+        Route('/stats/admission', admission_stats, methods=['GET']),
+        Mount('/', app=WSGIMiddleware(flask_app)),
+    ],
+    on_shutdown=[admission.shutdown])
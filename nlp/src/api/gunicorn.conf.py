@@ -0,0 +1,43 @@
+# nlp/src/api/gunicorn.conf.py
+# Üretim sunucusu:
+#   gunicorn -c nlp/src/api/gunicorn.conf.py nlp.src.api.server:app
+# Model master süreçte bir kez yüklenir; fork edilen worker'lar ağırlık
+# sayfalarını paylaşır. Her worker kendi torch thread sayısıyla sınırlanır.
+import multiprocessing
+import os
+
+# Isınma, model master'da yüklendikten sonra her worker'da ayrı yapılır
+os.environ.setdefault('NLP_DEFER_WARMUP', 'true')
+os.environ.setdefault('NLP_MMAP_WEIGHTS', 'true')
+
+bind = os.environ.get('NLP_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('NLP_WORKERS', 2))
+# gthread: micro-batching için worker başına eşzamanlı istek gerekir
+worker_class = 'gthread'
+threads = int(os.environ.get('NLP_WORKER_THREADS', 8))
+preload_app = True
+timeout = int(os.environ.get('NLP_WORKER_TIMEOUT', 60))
+
+torch_threads = int(os.environ.get(
+    'NLP_TORCH_THREADS', max(1, multiprocessing.cpu_count() // workers)))
+
+
+def when_ready(server):
+    # spaCy modeli de fork öncesinde yüklenir ki worker'lar paylaşsın
+    from nlp.src.utils.entity_extraction import get_extractor
+    get_extractor().nlp
+
+
+def post_fork(server, worker):
+    import torch
+    from nlp.src.api import server as nlp_server
+
+    # Worker'lar çekirdekleri aşırı paylaşmasın
+    torch.set_num_threads(torch_threads)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        pass
+    server.log.info(
+        f"Worker {worker.pid} using {torch_threads} torch threads")
+    nlp_server.start_warmup()
@@ -0,0 +1,215 @@
+# nlp/src/api/model_manager.py
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class ModelManager:
+    """
+    Sunucudaki etkin Chatbot örneğini tutar ve kesintisiz model değişimi yapar.
+    Yeni sürüm arka planda yüklenir, örnek girdilerle ısıtılır ve referans
+    tek atamada değiştirilir. İstekler modeli lease() ile aldığı için devam
+    eden istekler eski model üzerinde tamamlanır; eski model son istek
+    bittiğinde kapatılır.
+    factory(model_path, label_encoder_path, version) yeni bir Chatbot döndürmelidir.
+    """
+
+    def __init__(self, factory, registry=None, warmup_texts=()):
+        self.factory = factory
+        self.registry = registry
+        self.warmup_texts = list(warmup_texts)
+
+        self._chatbot = None
+        self._lock = threading.Lock()
+        self._loading = None
+        self._last_error = None
+        # İzleyicinin kayıt defterinde en son gördüğü ACTIVE değeri
+        self._seen_active = None
+        self._swapped_at = None
+        self._watcher_pid = None
+        # Chatbot -> devam eden istek sayısı; değiştirilmiş ama hâlâ kullanılanlar _retired'da
+        self._in_flight = {}
+        self._retired = set()
+
+    @property
+    def current(self):
+        return self._chatbot
+
+    @property
+    def version(self):
+        chatbot = self._chatbot
+        return chatbot.model_version if chatbot is not None else None
+
+    def acquire(self):
+        """
+        Etkin Chatbot'u döndürür ve release çağrılana kadar kapatılmasını engeller.
+        """
+        with self._lock:
+            chatbot = self._chatbot
+            if chatbot is not None:
+                self._in_flight[chatbot] = self._in_flight.get(chatbot, 0) + 1
+        return chatbot
+
+    def release(self, chatbot):
+        if chatbot is None:
+            return
+        with self._lock:
+            remaining = self._in_flight[chatbot] - 1
+            if remaining:
+                self._in_flight[chatbot] = remaining
+                return
+            del self._in_flight[chatbot]
+            if chatbot not in self._retired:
+                return
+            self._retired.discard(chatbot)
+        logger.info(f"Closing model version {chatbot.model_version} after in-flight requests finished")
+        chatbot.close()
+
+    @contextmanager
+    def lease(self):
+        chatbot = self.acquire()
+        try:
+            yield chatbot
+        finally:
+            self.release(chatbot)
+
+    def load_initial(self, fallback_paths=None):
+        """
+        Kayıt defterinde etkin sürüm varsa onu, yoksa fallback_paths'teki
+        (model_path, label_encoder_path) modelini eşzamanlı olarak yükler.
+        """
+        version = self.registry.active_version() if self.registry is not None else None
+        self._seen_active = version
+        if version is not None:
+            model_path, le_path = self.registry.paths(version)
+        elif fallback_paths is not None:
+            model_path, le_path = fallback_paths
+        else:
+            logger.error("No model version available in registry")
+            return None
+
+        try:
+            self._chatbot = self.factory(model_path, le_path, version)
+        except Exception as e:
+            logger.error(f"Failed to load model {version or model_path}: {str(e)}")
+            self._last_error = str(e)
+            return None
+        self._swapped_at = time.time()
+        return self._chatbot
+
+    def warm_up(self, chatbot):
+        for text in self.warmup_texts:
+            chatbot.process_message(text)
+        chatbot.warm_up_responses()
+
+    def _load_and_swap(self, version, persist):
+        start = time.monotonic()
+        chatbot = None
+        try:
+            if not self.registry.verify(version):
+                raise RuntimeError(f"Hash verification failed for {version}")
+            model_path, le_path = self.registry.paths(version)
+            chatbot = self.factory(model_path, le_path, version)
+            self.warm_up(chatbot)
+        except Exception as e:
+            logger.error(f"Loading model version {version} failed: {str(e)}")
+            if chatbot is not None:
+                chatbot.close()
+            with self._lock:
+                self._loading = None
+                self._last_error = str(e)
+            return
+
+        with self._lock:
+            previous = self._chatbot
+            self._chatbot = chatbot
+            self._loading = None
+            self._last_error = None
+            self._swapped_at = time.time()
+            # Eski modeli kullanan istek varsa kapatma son release'e bırakılır
+            in_use = previous is not None and previous in self._in_flight
+            if in_use:
+                self._retired.add(previous)
+
+        logger.info(
+            f"Switched to model version {version} in {time.monotonic() - start:.2f}s (pid {os.getpid()})")
+        if persist:
+            # Yükleme başarılı olmadan yazılırsa diğer worker'lar bozuk sürümü denemeye devam eder
+            try:
+                self.registry.set_active(version)
+            except Exception as e:
+                logger.error(f"Failed to persist active model version {version}: {str(e)}")
+        if previous is not None and not in_use:
+            previous.close()
+
+    def switch(self, version, persist=False):
+        """
+        Verilen sürümü arka planda yükler. Yükleme başlatıldıysa True,
+        zaten bir yükleme sürüyorsa False döner. persist verilirse sürüm ancak
+        yüklenip ısıtıldıktan sonra kayıt defterinde etkin olarak işaretlenir;
+        diğer worker'lar izleyici ile aynı sürüme geçer. persist verilmezse
+        ACTIVE değişmediği için izleyici bu geçici geçişi geri almaz.
+        """
+        if self.registry is None:
+            raise RuntimeError("Model registry is not configured")
+        if version not in self.registry.list_versions():
+            raise ValueError(f"Unknown model version: {version}")
+
+        with self._lock:
+            if self._loading is not None:
+                return False
+            self._loading = version
+
+        threading.Thread(target=self._load_and_swap, args=(version, persist),
+                         name=f"model-load-{version}", daemon=True).start()
+        return True
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                # Yalnızca ACTIVE'in kendisi değiştiğinde geçilir; yüklenen sürümle
+                # karşılaştırmak persist edilmemiş bir geçişi ve başarısız bir
+                # yüklemeyi her turda yeniden tetiklerdi
+                version = self.registry.active_version()
+                if version is None or version == self._seen_active:
+                    continue
+                if version != self.version:
+                    logger.info(f"Registry active version changed to {version}")
+                    if not self.switch(version):
+                        continue  # başka bir yükleme sürüyor; sonraki turda tekrar denenir
+                self._seen_active = version
+            except Exception as e:
+                logger.error(f"Registry watch failed: {str(e)}")
+
+    def start_watching(self, interval):
+        """
+        Kayıt defterindeki etkin sürümü periyodik olarak kontrol eder. Birden
+        fazla worker sürecinde, birine gelen değişiklik diğerlerine de bu yolla yayılır.
+        """
+        if self.registry is None or interval <= 0 or self._watcher_pid == os.getpid():
+            return
+        self._watcher_pid = os.getpid()
+        threading.Thread(target=self._watch, args=(interval,),
+                         name="model-registry-watch", daemon=True).start()
+
+    def status(self):
+        with self._lock:
+            status = {
+                "active_version": self.version,
+                "loading_version": self._loading,
+                "last_error": self._last_error,
+                "swapped_at": self._swapped_at,
+                "pid": os.getpid(),
+            }
+        if self.registry is not None:
+            status["registry_active_version"] = self.registry.active_version()
+            status["versions"] = [
+                {key: value for key, value in self.registry.get_manifest(version).items()
+                 if key != "files"}
+                for version in self.registry.list_versions()]
+        return status
@@ -1,10 +1,18 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_cors import CORS
 from nlp.src.utils.chatbot import Chatbot
+from nlp.src.utils.entity_extraction import configure_extractor
+from nlp.src.utils.model_registry import DEFAULT_REGISTRY_ROOT, ModelRegistry
+from nlp.src.utils.metrics import CONTENT_TYPE, MODEL_INFO, REGISTRY as METRICS_REGISTRY
+from nlp.src.utils.profiling import DEFAULT_PROFILE_DIR, ProfilingController
+from nlp.src.utils.response_generation import DEFAULT_RESPONSE_MODEL_DIR, ResponseGenerator, sse_event
+from nlp.src.api.model_manager import ModelManager
 import os
 import sys
+import time
+import threading
 import logging
 from flask_talisman import Talisman
 
@@ -16,7 +24,10 @@ sys.path.insert(0, project_root)
 app = Flask(__name__)
 CORS(app, resources={
      r"/classify": {"origins": "http://localhost:5173"}}, supports_credentials=True)
-Talisman(app, content_security_policy=None)
+talisman = Talisman(app, content_security_policy=None)
+# Benchmark gibi yük testlerinde istek sınırı kapatılabilir
+app.config['RATELIMIT_ENABLED'] = os.environ.get(
+    'NLP_RATELIMIT_ENABLED', 'true').lower() == 'true'
 
 limiter = Limiter(
     get_remote_address,
@@ -29,8 +40,101 @@ limiter = Limiter(
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+MAX_BATCH_ITEMS = int(os.environ.get('NLP_MAX_BATCH_ITEMS', 5000))
+
+# Readiness, ısınma çıkarımı tamamlandığında true olur
+WARMUP_TEXTS = [
+    "Merhaba",
+    "Yıllık izin almak istiyorum",
+    "15.07.2024 ile 20.07.2024 tarihleri arasında izin almak istiyorum",
+]
+readiness = {"ready": False, "warmup_seconds": None, "pid": None}
+
+
+def backend_options_from_env():
+    options = {}
+    if os.environ.get('NLP_ONNX_PATH'):
+        options['onnx_path'] = os.environ['NLP_ONNX_PATH']
+    if os.environ.get('NLP_QUANTIZED_MODEL'):
+        # NLP_BACKEND=torch_int8 için quantization.py çıktı dizini
+        options['quantized_path'] = os.environ['NLP_QUANTIZED_MODEL']
+    if os.environ.get('NLP_INTRA_OP_THREADS'):
+        options['intra_op_threads'] = int(os.environ['NLP_INTRA_OP_THREADS'])
+    if os.environ.get('NLP_INTER_OP_THREADS'):
+        options['inter_op_threads'] = int(os.environ['NLP_INTER_OP_THREADS'])
+    if os.environ.get('NLP_MMAP_WEIGHTS', 'true').lower() == 'true':
+        options['mmap_weights'] = True
+    if os.environ.get('NLP_EXIT_THRESHOLD'):
+        options['exit_threshold'] = float(os.environ['NLP_EXIT_THRESHOLD'])
+    if os.environ.get('NLP_EXIT_CRITERION'):
+        options['exit_criterion'] = os.environ['NLP_EXIT_CRITERION']
+    return options
+
+
+# Kapalıyken maliyetsiz; /admin/profile veya X-Profile başlığı ile açılır
+profiler = ProfilingController(os.environ.get('NLP_PROFILE_DIR', DEFAULT_PROFILE_DIR))
+
+
+def create_response_generator():
+    # GPT-2 yanıt modeli intent modelinden bağımsızdır; model değişimlerinde yeniden yüklenmez
+    if os.environ.get('NLP_RESPONSE_GENERATOR', 'false').lower() != 'true':
+        return None
+    model_path = os.environ.get('NLP_RESPONSE_MODEL', DEFAULT_RESPONSE_MODEL_DIR)
+    if not os.path.exists(model_path):
+        logger.error(f"Response model path does not exist: {model_path}")
+        return None
+    try:
+        return ResponseGenerator(
+            model_path,
+            max_new_tokens=int(os.environ.get('NLP_RESPONSE_MAX_TOKENS', 64)),
+            first_token_budget_ms=float(os.environ.get('NLP_RESPONSE_FIRST_TOKEN_MS', 300)),
+            latency_budget_ms=float(os.environ.get('NLP_RESPONSE_BUDGET_MS', 3000)),
+            temperature=float(os.environ.get('NLP_RESPONSE_TEMPERATURE', 0)))
+    except Exception as e:
+        logger.error(f"Failed to load response generator: {str(e)}")
+        return None
+
+
+response_generator = create_response_generator()
+
+
+def create_chatbot(model_path, le_path, version=None):
+    return Chatbot(
+        model_path, le_path,
+        enable_batching=os.environ.get(
+            'NLP_ENABLE_BATCHING', 'true').lower() == 'true',
+        max_batch_size=int(os.environ.get('NLP_MAX_BATCH_SIZE', 16)),
+        max_wait_ms=float(os.environ.get('NLP_MAX_WAIT_MS', 5)),
+        cache_size=int(os.environ.get('NLP_CACHE_SIZE', 4096)),
+        cache_ttl=float(os.environ.get('NLP_CACHE_TTL', 600)),
+        model_version=version,
+        parallel_stages=os.environ.get(
+            'NLP_PARALLEL_STAGES', 'false').lower() == 'true',
+        stage_workers=int(os.environ.get('NLP_STAGE_WORKERS', 4)),
+        entity_timeout=float(os.environ.get('NLP_ENTITY_TIMEOUT', 1.0)),
+        intent_timeout=float(os.environ.get('NLP_INTENT_TIMEOUT', 2.0)),
+        entity_mode=os.environ.get('NLP_ENTITY_MODE', 'spacy'),
+        spacy_intents=[intent for intent in os.environ.get(
+            'NLP_SPACY_INTENTS', 'purchase_request').split(',') if intent],
+        backend=os.environ.get('NLP_BACKEND', 'torch'),
+        backend_options=backend_options_from_env(),
+        profiler=profiler,
+        cascade=os.environ.get('NLP_CASCADE', 'false').lower() == 'true',
+        cascade_threshold=float(os.environ.get('NLP_CASCADE_THRESHOLD', 0.9)),
+        response_generator=response_generator,
+        response_mode=os.environ.get('NLP_RESPONSE_MODE', 'template'))
+
 
 def initialize_chatbot():
+    configure_extractor(
+        model_name=os.environ.get('NLP_SPACY_MODEL', 'tr_core_news_md'),
+        batch_size=int(os.environ.get('NLP_ENTITY_BATCH_SIZE', 64)),
+        n_process=int(os.environ.get('NLP_ENTITY_N_PROCESS', 1)))
+
+    # Kayıt defterinde etkin sürüm varsa o yüklenir, yoksa sabit model dizini
+    if model_manager.registry.active_version() is not None:
+        return model_manager.load_initial()
+
     model_path = os.path.join(
         project_root, 'nlp', 'models', 'intent_classifier_model')
     le_path = os.path.join(project_root, 'nlp', 'models', 'label_encoder.pkl')
@@ -43,16 +147,51 @@ def initialize_chatbot():
         logger.error(f"Label encoder path does not exist: {le_path}")
         return None
 
-    return Chatbot(model_path, le_path)
+    return model_manager.load_initial(fallback_paths=(model_path, le_path))
+
+
+model_manager = ModelManager(
+    create_chatbot,
+    registry=ModelRegistry(os.environ.get('NLP_MODEL_REGISTRY', DEFAULT_REGISTRY_ROOT)),
+    warmup_texts=WARMUP_TEXTS)
+initialize_chatbot()
 
+ADMIN_TOKEN = os.environ.get('NLP_ADMIN_TOKEN')
+REGISTRY_POLL_SECONDS = float(os.environ.get('NLP_REGISTRY_POLL_SECONDS', 10))
 
-chatbot = initialize_chatbot()
+
+def warm_up():
+    chatbot = model_manager.current
+    if chatbot is None:
+        return
+
+    start = time.monotonic()
+    try:
+        model_manager.warm_up(chatbot)
+    except Exception as e:
+        logger.error(f"Warm-up inference failed: {str(e)}")
+        return
+
+    readiness.update(ready=True, warmup_seconds=time.monotonic() - start, pid=os.getpid())
+    logger.info(
+        f"Warm-up completed in {readiness['warmup_seconds']:.2f}s (pid {os.getpid()})")
+
+
+def start_warmup():
+    # Her worker kendi ısınmasını yapar; gunicorn altında post_fork'tan çağrılır
+    readiness.update(ready=False, warmup_seconds=None, pid=os.getpid())
+    threading.Thread(target=warm_up, name="warmup", daemon=True).start()
+    model_manager.start_watching(REGISTRY_POLL_SECONDS)
+
+
+if os.environ.get('NLP_DEFER_WARMUP', 'false').lower() != 'true':
+    start_warmup()
 
 
 @app.route('/classify', methods=['POST'])
 @limiter.limit("30 per minute")
 def classify():
-    if chatbot is None:
+    if model_manager.current is None:
         return jsonify({"error": "Chatbot initialization failed"}), 500
 
     logger.info(f"Received request: {request.json}")
@@ -63,7 +202,13 @@ def classify():
 
     user_input = data['text']
     try:
-        result = chatbot.process_message(user_input)
+        # Model değişse de eski örnek bu istek bitene kadar kapatılmaz
+        with model_manager.lease() as chatbot:
+            if request.headers.get('X-Profile') == '1' and admin_authorized():
+                with profiler.session("classify"):
+                    result = chatbot.process_message(user_input)
+            else:
+                result = chatbot.process_message(user_input)
         logger.info(f"Sending response: {result}")
         return jsonify(result)
     except Exception as e:
@@ -71,5 +216,176 @@ def classify():
         return jsonify({"error": "Error processing message"}), 500
 
 
+@app.route('/classify/stream', methods=['POST'])
+@limiter.limit("30 per minute")
+def classify_stream():
+    if model_manager.current is None:
+        return jsonify({"error": "Chatbot initialization failed"}), 500
+
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('text'), str):
+        logger.error("Invalid request payload")
+        return jsonify({"error": "Invalid request payload"}), 400
+
+    # Model akış bitene kadar tutulur; yanıt kapatılınca bırakılır
+    chatbot = model_manager.acquire()
+    # Sınıflandırma akış başlamadan yapılır; hata olursa normal bir 500 döner
+    events = chatbot.stream_message(data['text'])
+    try:
+        first_event = next(events)
+    except Exception as e:
+        model_manager.release(chatbot)
+        logger.error(f"Error processing message: {str(e)}")
+        return jsonify({"error": "Error processing message"}), 500
+
+    def generate():
+        yield sse_event(*first_event)
+        try:
+            for event in events:
+                yield sse_event(*event)
+        except Exception as e:
+            logger.error(f"Error streaming response: {str(e)}")
+            yield sse_event("error", {"error": "Error streaming response"})
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # İstemci akışın ortasında ayrılsa da yanıt kapatılırken çağrılır
+    response.call_on_close(lambda: model_manager.release(chatbot))
+    return response
+
+
+@app.route('/classify/batch', methods=['POST'])
+@limiter.limit("10 per minute")
+def classify_batch():
+    if model_manager.current is None:
+        return jsonify({"error": "Chatbot initialization failed"}), 500
+
+    data = request.get_json()
+    if not data or not isinstance(data.get('texts'), list):
+        logger.error("Invalid batch request payload")
+        return jsonify({"error": "Invalid request payload"}), 400
+
+    texts = data['texts']
+    if len(texts) > MAX_BATCH_ITEMS:
+        logger.error(f"Batch too large: {len(texts)} items")
+        return jsonify({"error": f"Batch size exceeds limit of {MAX_BATCH_ITEMS}"}), 413
+
+    logger.info(f"Received batch request with {len(texts)} items")
+    try:
+        with model_manager.lease() as chatbot:
+            results = chatbot.process_messages(texts)
+        return jsonify({"results": results, "model_version": chatbot.model_version})
+    except Exception as e:
+        logger.error(f"Error processing batch: {str(e)}")
+        return jsonify({"error": "Error processing batch"}), 500
+
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    chatbot = model_manager.current
+    if chatbot is None:
+        return jsonify({"error": "Chatbot initialization failed"}), 500
+
+    return jsonify({
+        "model_version": chatbot.model_version,
+        "batching": chatbot.batching_stats(),
+        "cache": chatbot.cache_stats(),
+        "stages": chatbot.stage_stats()
+    })
+
+
+@app.route('/metrics', methods=['GET'])
+@limiter.exempt
+@talisman(force_https=False)
+def metrics():
+    # Gunicorn altında her worker kendi metriklerini raporlar
+    chatbot = model_manager.current
+    MODEL_INFO.clear()
+    if chatbot is not None:
+        MODEL_INFO.set(1, chatbot.model_version, chatbot.backend.name)
+    return Response(METRICS_REGISTRY.render(), content_type=CONTENT_TYPE)
+
+
+@app.route('/healthz', methods=['GET'])
+@limiter.exempt
+@talisman(force_https=False)
+def healthz():
+    return jsonify({"status": "alive", "pid": os.getpid()})
+
+
+@app.route('/readyz', methods=['GET'])
+@limiter.exempt
+@talisman(force_https=False)
+def readyz():
+    if model_manager.current is None:
+        return jsonify({"status": "failed", **readiness}), 503
+    if not readiness["ready"]:
+        return jsonify({"status": "warming_up", **readiness}), 503
+    return jsonify({"status": "ready", "model_version": model_manager.version, **readiness})
+
+
+def is_admin_token(token):
+    # Yönetim uçları yalnızca NLP_ADMIN_TOKEN tanımlıysa ve başlıkta verilmişse açıktır
+    return ADMIN_TOKEN is not None and token == ADMIN_TOKEN
+
+
+def admin_authorized():
+    return is_admin_token(request.headers.get('X-Admin-Token'))
+
+
+@app.route('/admin/model', methods=['GET'])
+@limiter.exempt
+def admin_model_status():
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(model_manager.status())
+
+
+@app.route('/admin/model', methods=['POST'])
+@limiter.exempt
+def admin_model_switch():
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('version'), str):
+        return jsonify({"error": "Invalid request payload"}), 400
+
+    version = data['version']
+    try:
+        # Etkin sürüm yükleme başarılı olunca kayıt defterine yazılır
+        started = model_manager.switch(version, persist=bool(data.get('persist', True)))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 404
+    if not started:
+        return jsonify({"error": "Another model version is loading", **model_manager.status()}), 409
+
+    logger.info(f"Model switch to {version} requested")
+    return jsonify({"status": "loading", "version": version}), 202
+
+
+@app.route('/admin/profile', methods=['GET'])
+@limiter.exempt
+def admin_profile_status():
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+    return jsonify(profiler.status())
+
+
+@app.route('/admin/profile', methods=['POST'])
+@limiter.exempt
+def admin_profile_arm():
+    if not admin_authorized():
+        return jsonify({"error": "Forbidden"}), 403
+
+    data = request.get_json(silent=True) or {}
+    count = data.get('requests', 1)
+    if not isinstance(count, int) or count < 0:
+        return jsonify({"error": "Invalid request payload"}), 400
+
+    profiler.arm(count)
+    return jsonify(profiler.status())
+
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
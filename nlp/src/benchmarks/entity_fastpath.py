@@ -0,0 +1,130 @@
+# nlp/src/benchmarks/entity_fastpath.py
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from datetime import date
+
+from nlp.src.utils.entity_extraction import EntityExtractor
+from nlp.src.utils.fast_entities import extract_fast_entities, find_entity_spans
+from nlp.src.utils.normalizer import normalize_entities_batch
+
+PROJECT_ROOT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..'))
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# spaCy'nin referans alındığı etiketler (DURATION spaCy'de DATE/TIME içinde çıkar)
+REFERENCE_LABELS = ("DATE", "TIME")
+
+
+# Hızlı yolun bilinen hataları: metin -> REGRESSION_TODAY'e göre normalize edilmiş entity'ler
+# (boş etiketler yazılmaz)
+REGRESSION_TODAY = date(2024, 7, 15)
+REGRESSION_CASES = [
+    ("Yarın 14:30'da 2 saat izin", {"DATE": ["2024-07-16"], "TIME": ["14:30"], "DURATION": [120]}),
+    ("1.5 saat izin istiyorum", {"DURATION": [90]}),
+    ("bir buçuk saat izin istiyorum", {"DURATION": [90]}),
+    ("2h izin", {"DURATION": [120]}),
+    ("2 m kablo lazım", {}),
+    ("on iki gün izin istiyorum", {"DURATION": ["on iki gün"]}),
+    ("3 gün sonra izne çıkacağım", {"DATE": ["2024-07-18"]}),
+    ("on beş gün sonra dönüyorum", {"DATE": ["2024-07-30"]}),
+]
+
+
+def check_regressions():
+    # Hızlı yolu normalizer ile birlikte çalıştırır; spaCy gerektirmez
+    failures = []
+    for text, expected in REGRESSION_CASES:
+        entities = normalize_entities_batch([extract_fast_entities(text)], today=REGRESSION_TODAY)[0]
+        actual = {label: values for label, values in entities.items() if values}
+        if actual != expected:
+            failures.append({"text": text, "expected": expected, "actual": actual})
+    return failures
+
+
+def load_texts(data_path):
+    with open(data_path, 'r', encoding='utf-8') as f:
+        return [item['text'] for item in json.load(f)]
+
+
+def time_per_message(func, texts, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for text in texts:
+            func(text)
+    return (time.perf_counter() - start) / (repeat * len(texts))
+
+
+def overlaps(span, spans):
+    start, end = span
+    return any(s < end and start < e for s, e in spans)
+
+
+def run_benchmark(data_path, repeat=3):
+    texts = load_texts(data_path)
+    extractor = EntityExtractor()
+    nlp = extractor.nlp
+    if nlp is None:
+        raise RuntimeError("spaCy model is required for the reference run")
+
+    # Isınma
+    for text in texts[:10]:
+        nlp(text)
+        find_entity_spans(text)
+
+    spacy_seconds = time_per_message(nlp, texts, repeat)
+    fast_seconds = time_per_message(find_entity_spans, texts, repeat)
+
+    reference_total = 0
+    recalled = 0
+    fast_only = 0
+    for text in texts:
+        reference = [(ent.start_char, ent.end_char) for ent in nlp(text).ents
+                     if ent.label_ in REFERENCE_LABELS]
+        fast = [(start, end) for _, start, end in find_entity_spans(text)]
+        reference_total += len(reference)
+        recalled += sum(1 for span in reference if overlaps(span, fast))
+        fast_only += sum(1 for span in fast if not overlaps(span, reference))
+
+    return {
+        "messages": len(texts),
+        "spacy_ms_per_message": spacy_seconds * 1000,
+        "fast_ms_per_message": fast_seconds * 1000,
+        "speedup": spacy_seconds / fast_seconds if fast_seconds else float('inf'),
+        "reference_entities": reference_total,
+        "recall_vs_spacy": recalled / reference_total if reference_total else 1.0,
+        "fast_only_entities": fast_only,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Benchmark the regex fast-path entity extractor against spaCy NER")
+    parser.add_argument('--data', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'data', 'intent_data.json'))
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', type=str, default=None,
+                        help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    failures = check_regressions()
+    for failure in failures:
+        logger.error(f"Regression: {failure}")
+    logger.info(f"Regression check: {len(failures)} failures")
+
+    results = run_benchmark(args.data, repeat=args.repeat)
+    results["regressions"] = len(failures)
+    for key, value in results.items():
+        logger.info(f"{key}: {value}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if failures:
+        sys.exit(1)
@@ -0,0 +1,193 @@
+# nlp/src/benchmarks/normalizer.py
+import argparse
+import json
+import logging
+import random
+import re
+import sys
+import time
+from datetime import date, datetime
+
+from nlp.src.utils.normalizer import normalize_date, normalize_duration, normalize_entities_batch, normalize_time
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+DURATION_UNITS = ("saat", "h", "dakika", "m", "SAAT", "Dakika", "H", "M")
+DURATION_TAILS = ("", " izin", "lik izin", "'lik", ".", ",", "'te")
+NOISE_ALPHABET = "0123456789./:- "
+
+
+# Referans: strptime'ı format başına deneyen önceki gerçekleme
+def legacy_normalize_date(date_string):
+    if isinstance(date_string, list):
+        date_string = date_string[0] if date_string else ""
+    for date_format in ['%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d']:
+        try:
+            return datetime.strptime(date_string, date_format).strftime('%Y-%m-%d')
+        except ValueError:
+            continue
+    return date_string
+
+
+def legacy_normalize_time(time_string):
+    if isinstance(time_string, list):
+        time_string = time_string[0] if time_string else ""
+    for time_format in ['%H:%M', '%H.%M', '%I:%M %p']:
+        try:
+            return datetime.strptime(time_string, time_format).strftime('%H:%M')
+        except ValueError:
+            continue
+    return time_string
+
+
+def legacy_normalize_duration(duration_string):
+    if isinstance(duration_string, list):
+        duration_string = duration_string[0] if duration_string else ""
+    match = re.match(r'(\d+)\s*(saat|h|dakika|m)', duration_string, re.IGNORECASE)
+    if match:
+        value, unit = match.groups()
+        return int(value) * 60 if unit.lower() in ['saat', 'h'] else int(value)
+    return duration_string
+
+
+def _number(rng, low, high, pad):
+    value = rng.randint(low, high)
+    return f"{value:02d}" if pad and rng.random() < 0.5 else str(value)
+
+
+def generate_dates(rng, count):
+    # Eski formatlar: geçerli, geçersiz (31.02) ve sınır dışı (32, 13) değerler dahil
+    cases = []
+    for _ in range(count):
+        day, month = _number(rng, 0, 32, True), _number(rng, 0, 13, True)
+        year = str(rng.randint(1000, 9999))
+        style = rng.randrange(3)
+        if style == 0:
+            cases.append(f"{day}.{month}.{year}")
+        elif style == 1:
+            cases.append(f"{day}/{month}/{year}")
+        else:
+            cases.append(f"{year}-{month}-{day}")
+    return cases
+
+
+def generate_times(rng, count):
+    cases = []
+    for _ in range(count):
+        hour, minute = _number(rng, 0, 25, True), _number(rng, 0, 61, True)
+        style = rng.randrange(3)
+        if style == 0:
+            cases.append(f"{hour}:{minute}")
+        elif style == 1:
+            cases.append(f"{hour}.{minute}")
+        else:
+            cases.append(f"{hour}:{minute}{' ' * rng.randint(1, 2)}{rng.choice(('AM', 'PM', 'am', 'pm'))}")
+    return cases
+
+
+def generate_durations(rng, count):
+    return [f"{rng.randint(0, 600)}{' ' * rng.randint(0, 2)}{rng.choice(DURATION_UNITS)}{rng.choice(DURATION_TAILS)}"
+            for _ in range(count)]
+
+
+def generate_noise(rng, count):
+    # Kenarlarında boşluk olmayan rastgele rakam/ayraç dizileri
+    cases = []
+    for _ in range(count):
+        text = "".join(rng.choice(NOISE_ALPHABET) for _ in range(rng.randint(1, 12))).strip()
+        cases.append(text or "0")
+    return cases
+
+
+def check_equivalence(cases_per_kind=2000, seed=42):
+    """
+    Eski fonksiyonların desteklediği formatlarda yeni gerçeklemenin çıktısının
+    birebir aynı olduğunu rastgele üretilmiş girdilerle doğrular.
+    """
+    rng = random.Random(seed)
+    noise = generate_noise(rng, cases_per_kind)
+    checks = [
+        ("date", normalize_date, legacy_normalize_date, generate_dates(rng, cases_per_kind) + noise),
+        ("time", normalize_time, legacy_normalize_time, generate_times(rng, cases_per_kind) + noise),
+        ("duration", normalize_duration, legacy_normalize_duration,
+         generate_durations(rng, cases_per_kind) + noise),
+    ]
+    mismatches = []
+    for kind, new, legacy, cases in checks:
+        for case in cases + [[case] for case in cases[:10]] + [[]]:
+            expected, actual = legacy(case), new(case)
+            if expected != actual:
+                mismatches.append({"kind": kind, "input": case, "expected": expected, "actual": actual})
+    return mismatches
+
+
+def time_per_call(func, cases, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for case in cases:
+            func(case)
+    return (time.perf_counter() - start) / (repeat * len(cases))
+
+
+def run_benchmark(cases_per_kind=2000, repeat=5, seed=42):
+    rng = random.Random(seed)
+    # Gerçekçi karışım: girdilerin bir kısmı hiçbir formata uymaz
+    dates = generate_dates(rng, cases_per_kind) + generate_noise(rng, cases_per_kind // 4)
+    times = generate_times(rng, cases_per_kind) + generate_noise(rng, cases_per_kind // 4)
+    durations = generate_durations(rng, cases_per_kind)
+
+    results = {}
+    for kind, new, legacy, cases in (("date", normalize_date, legacy_normalize_date, dates),
+                                     ("time", normalize_time, legacy_normalize_time, times),
+                                     ("duration", normalize_duration, legacy_normalize_duration, durations)):
+        legacy_seconds = time_per_call(legacy, cases, repeat)
+        new_seconds = time_per_call(new, cases, repeat)
+        results[kind] = {
+            "legacy_us_per_call": legacy_seconds * 1e6,
+            "compiled_us_per_call": new_seconds * 1e6,
+            "speedup": legacy_seconds / new_seconds if new_seconds else float('inf'),
+        }
+
+    # Chatbot'un process_messages çıktısına benzer entity sözlükleri
+    relative = ["yarın", "bugün", "haftaya cuma", "15 Temmuz", "3 gün sonra"]
+    entities_list = [{"DATE": [rng.choice(dates + relative)], "TIME": [rng.choice(times)],
+                      "DURATION": [rng.choice(durations)], "PERSON": []}
+                     for _ in range(cases_per_kind)]
+    today = date.today()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        normalize_entities_batch(entities_list, today=today)
+    results["batch"] = {
+        "messages": len(entities_list),
+        "us_per_message": (time.perf_counter() - start) / (repeat * len(entities_list)) * 1e6,
+    }
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check the compiled normalizer against the strptime-based implementation and benchmark both")
+    parser.add_argument('--cases', type=int, default=2000, help="Generated inputs per format family")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None,
+                        help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    mismatches = check_equivalence(args.cases, seed=args.seed)
+    for mismatch in mismatches[:20]:
+        logger.error(f"Mismatch: {mismatch}")
+    logger.info(f"Equivalence check: {len(mismatches)} mismatches")
+
+    results = run_benchmark(args.cases, repeat=args.repeat, seed=args.seed)
+    results["mismatches"] = len(mismatches)
+    for key, value in results.items():
+        logger.info(f"{key}: {value}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if mismatches:
+        sys.exit(1)
@@ -0,0 +1,408 @@
+# nlp/src/benchmarks/serving.py
+# Uçtan uca servis benchmark'ı:
+#   python -m nlp.src.benchmarks.serving run --mode inprocess --concurrency 1 4 16 --output a.json
+#   python -m nlp.src.benchmarks.serving run --mode http --url http://localhost:5000 --output b.json
+#   python -m nlp.src.benchmarks.serving compare a.json b.json --threshold 0.05
+# http modunda sunucu NLP_RATELIMIT_ENABLED=false ve NLP_CACHE_SIZE=0 ile başlatılmalıdır.
+import argparse
+import json
+import logging
+import os
+import platform
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..'))
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# Karşılaştırmada daha yüksek değerin kötü olduğu metrikler
+LOWER_IS_BETTER = ("p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("throughput_per_second",)
+
+_STAGE_SAMPLE = re.compile(
+    r'^nlp_stage_latency_seconds_(sum|count)\{stage="([^"]+)"\} (\S+)$')
+
+
+def load_items(data_path):
+    with open(data_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def parse_length_distribution(spec, items):
+    """
+    Hedef kelime sayısı örnekleyicisi döndürür.
+    empirical: veri setindeki uzunluklar, uniform:MIN:MAX, normal:MEAN:STD
+    """
+    if spec == "empirical":
+        lengths = np.array([len(item['text'].split()) for item in items])
+        return lambda rng, n: rng.choice(lengths, size=n)
+    kind, _, params = spec.partition(':')
+    if kind == "uniform":
+        low, high = (int(value) for value in params.split(':'))
+        return lambda rng, n: rng.integers(low, high + 1, size=n)
+    if kind == "normal":
+        mean, std = (float(value) for value in params.split(':'))
+        return lambda rng, n: np.maximum(1, np.rint(rng.normal(mean, std, size=n))).astype(int)
+    raise ValueError(f"Unknown length distribution: {spec}")
+
+
+def build_workload(data_path, size, mode="replay", lengths="empirical", seed=42):
+    """
+    replay: veri setindeki metinler sırayla (gerekirse başa dönerek) kullanılır.
+    resample: her istek için hedef uzunluk örneklenir; aynı intent'e ait
+    metinlerin kelimeleri eklenerek ya da kırpılarak o uzunlukta metin üretilir.
+    """
+    items = load_items(data_path)
+    if mode == "replay":
+        return [items[i % len(items)]['text'] for i in range(size)]
+    if mode != "resample":
+        raise ValueError(f"Unknown workload mode: {mode}")
+
+    rng = np.random.default_rng(seed)
+    sample_lengths = parse_length_distribution(lengths, items)
+    by_intent = {}
+    for item in items:
+        by_intent.setdefault(item['intent'], []).append(item['text'].split())
+
+    texts = []
+    for target in sample_lengths(rng, size):
+        base = items[rng.integers(len(items))]
+        words = base['text'].split()
+        pool = by_intent[base['intent']]
+        while len(words) < target:
+            words = words + pool[rng.integers(len(pool))]
+        texts.append(" ".join(words[:int(target)]))
+    return texts
+
+
+def peak_rss_mb(pid=None):
+    if pid is None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    # Sunucu sürecinin tepe RSS değeri (yalnızca Linux)
+    with open(f"/proc/{pid}/status", 'r') as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return None
+
+
+def percentiles(latencies):
+    # Hiç başarılı istek yoksa yüzdelikler tanımsızdır
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    values = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "mean_ms": float(values.mean()),
+    }
+
+
+def stage_breakdown(before, after):
+    # İki anlık görüntü arasındaki aşama başına ortalama süre ve toplam içindeki pay
+    stages = {}
+    for stage, (total, count) in after.items():
+        prev_total, prev_count = before.get(stage, (0.0, 0))
+        calls = count - prev_count
+        if calls:
+            stages[stage] = {"calls": calls, "total_seconds": total - prev_total,
+                             "mean_ms": (total - prev_total) / calls * 1000}
+    overall = sum(stage["total_seconds"] for stage in stages.values())
+    for stage in stages.values():
+        stage["share"] = stage["total_seconds"] / overall if overall else 0.0
+    return stages
+
+
+def error_kind(error):
+    # urlopen 2xx dışındaki yanıtlarda HTTPError yükseltir
+    if isinstance(error, urllib.error.HTTPError):
+        return f"HTTP {error.code}"
+    return type(error).__name__
+
+
+def drive(call, batches, concurrency):
+    """
+    batches listesini concurrency thread ile sırayla tüketir.
+    Başarılı her çağrının süresi, içindeki mesaj sayısı kadar gecikme örneği
+    olarak kaydedilir. Başarısız çağrılar (429/503 gibi hızlı retler dahil)
+    yüzdelikleri çarpıtmasın diye gecikmelere katılmaz, türlerine göre sayılır.
+    Dönüş: (gecikmeler, hata türü -> sayı, başarısız mesaj sayısı, süre)
+    """
+    latencies = []
+    errors = Counter()
+    failed_messages = 0
+    lock = threading.Lock()
+    position = iter(range(len(batches)))
+
+    def worker():
+        nonlocal failed_messages
+        while True:
+            with lock:
+                index = next(position, None)
+            if index is None:
+                return
+            start = time.perf_counter()
+            try:
+                call(batches[index])
+                error = None
+            except Exception as e:
+                logger.error(f"Request failed: {str(e)}")
+                error = error_kind(e)
+            elapsed = time.perf_counter() - start
+            with lock:
+                if error is None:
+                    latencies.extend([elapsed] * len(batches[index]))
+                else:
+                    errors[error] += 1
+                    failed_messages += len(batches[index])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(worker)
+    return latencies, errors, failed_messages, time.perf_counter() - start
+
+
+def in_process_target(chatbot):
+    from nlp.src.utils.metrics import STAGE_LATENCY
+
+    def call(batch):
+        if len(batch) == 1:
+            chatbot.process_message(batch[0])
+        else:
+            chatbot.process_messages(batch)
+
+    def snapshot():
+        return {labels[0]: totals for labels, totals in STAGE_LATENCY.totals().items()}
+
+    return call, snapshot
+
+
+def http_target(url, timeout=30.0):
+    def post(path, payload):
+        request = urllib.request.Request(
+            url + path, data=json.dumps(payload).encode('utf-8'),
+            headers={"Content-Type": "application/json"}, method="POST")
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read())
+
+    def call(batch):
+        if len(batch) == 1:
+            post("/classify", {"text": batch[0]})
+        else:
+            post("/classify/batch", {"texts": batch})
+
+    def snapshot():
+        # Sunucunun /metrics çıktısından aşama toplamları (tek worker varsayımı)
+        stages = {}
+        try:
+            with urllib.request.urlopen(url + "/metrics", timeout=timeout) as response:
+                body = response.read().decode('utf-8')
+        except Exception as e:
+            logger.warning(f"Could not scrape {url}/metrics: {str(e)}")
+            return stages
+        for line in body.splitlines():
+            match = _STAGE_SAMPLE.match(line)
+            if match:
+                kind, stage, value = match.groups()
+                total, count = stages.get(stage, (0.0, 0))
+                if kind == "sum":
+                    stages[stage] = (float(value), count)
+                else:
+                    stages[stage] = (total, int(float(value)))
+        return stages
+
+    return call, snapshot
+
+
+def run_case(call, snapshot, texts, concurrency, batch_size, server_pid=None):
+    batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    before = snapshot()
+    latencies, errors, failed_messages, elapsed = drive(call, batches, concurrency)
+    after = snapshot()
+
+    # Gecikme yüzdelikleri ve throughput yalnızca başarılı mesajlar üzerinden
+    succeeded = len(texts) - failed_messages
+    return {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "messages": len(texts),
+        "errors": sum(errors.values()),
+        "error_types": dict(errors),
+        "failed_messages": failed_messages,
+        "seconds": elapsed,
+        "throughput_per_second": succeeded / elapsed if elapsed else 0.0,
+        **percentiles(latencies),
+        "peak_rss_mb": peak_rss_mb(server_pid),
+        "stages": stage_breakdown(before, after),
+    }
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+                                capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def run_benchmark(args):
+    texts = build_workload(args.data, args.size, mode=args.workload,
+                           lengths=args.lengths, seed=args.seed)
+
+    if args.mode == "inprocess":
+        from nlp.src.utils.chatbot import Chatbot
+        chatbot = Chatbot(
+            args.model_path, args.label_encoder, enable_batching=not args.no_batching,
+            cache_size=args.cache_size, entity_mode=args.entity_mode, backend=args.backend)
+        call, snapshot = in_process_target(chatbot)
+        server_pid = None
+    else:
+        call, snapshot = http_target(args.url.rstrip('/'))
+        server_pid = args.server_pid
+
+    # Isınma: ilk çağrılardaki yükleme maliyeti ölçüme girmesin
+    drive(call, [[text] for text in texts[:args.warmup]], 1)
+
+    runs = []
+    for batch_size in args.batch_sizes:
+        for concurrency in args.concurrency:
+            result = run_case(call, snapshot, texts, concurrency, batch_size, server_pid)
+            result["mode"] = args.mode
+            runs.append(result)
+            if result['p50_ms'] is None:
+                logger.error(
+                    f"{args.mode} concurrency={concurrency} batch={batch_size}: "
+                    f"all requests failed {result['error_types']}")
+                continue
+            logger.info(
+                f"{args.mode} concurrency={concurrency} batch={batch_size}: "
+                f"{result['throughput_per_second']:.1f} msg/s, p50 {result['p50_ms']:.1f} ms, "
+                f"p95 {result['p95_ms']:.1f} ms, p99 {result['p99_ms']:.1f} ms, "
+                f"{result['errors']} failed requests {result['error_types']}")
+
+    return {
+        "environment": environment_info(),
+        "workload": {"data": args.data, "size": args.size, "mode": args.workload,
+                     "lengths": args.lengths, "seed": args.seed},
+        "runs": runs,
+    }
+
+
+def run_key(run):
+    return (run["mode"], run["concurrency"], run["batch_size"])
+
+
+def compare_results(baseline, candidate, threshold=0.05):
+    """
+    Aynı (mode, concurrency, batch_size) koşularını karşılaştırır. Gecikme
+    yüzdelikleri threshold oranından fazla artarsa veya throughput o oranda
+    düşerse regresyon sayılır.
+    """
+    baseline_runs = {run_key(run): run for run in baseline["runs"]}
+    rows = []
+    for run in candidate["runs"]:
+        reference = baseline_runs.get(run_key(run))
+        if reference is None:
+            continue
+        for metric in LOWER_IS_BETTER + HIGHER_IS_BETTER:
+            old, new = reference[metric], run[metric]
+            if old is None or new is None:
+                # Koşulardan birinde hiç başarılı istek yok; yalnızca aday kötüleştiyse regresyon
+                rows.append({"run": run_key(run), "metric": metric, "baseline": old,
+                             "candidate": new, "change": 0.0, "regression": new is None and old is not None})
+                continue
+            change = (new - old) / old if old else 0.0
+            regressed = change > threshold if metric in LOWER_IS_BETTER else change < -threshold
+            rows.append({"run": run_key(run), "metric": metric, "baseline": old,
+                         "candidate": new, "change": change, "regression": regressed})
+        # Hatalar ayrı raporlanır: adayda daha fazla başarısız istek regresyondur
+        old_errors, new_errors = reference.get("errors", 0), run.get("errors", 0)
+        rows.append({"run": run_key(run), "metric": "errors", "baseline": old_errors,
+                     "candidate": new_errors, "change": float(new_errors - old_errors),
+                     "regression": new_errors > old_errors})
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the NLP serving pipeline")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run')
+    run_parser.add_argument('--mode', choices=['inprocess', 'http'], default='inprocess')
+    run_parser.add_argument('--data', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'data', 'intent_data.json'))
+    run_parser.add_argument('--workload', choices=['replay', 'resample'], default='replay')
+    run_parser.add_argument('--lengths', type=str, default='empirical',
+                            help="empirical, uniform:MIN:MAX or normal:MEAN:STD (words)")
+    run_parser.add_argument('--size', type=int, default=1000)
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 4, 16])
+    run_parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1])
+    run_parser.add_argument('--warmup', type=int, default=20)
+    run_parser.add_argument('--model-path', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'models', 'intent_classifier_model'))
+    run_parser.add_argument('--label-encoder', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'models', 'label_encoder.pkl'))
+    run_parser.add_argument('--backend', type=str, default='torch')
+    run_parser.add_argument('--entity-mode', choices=['spacy', 'fast'], default='spacy')
+    run_parser.add_argument('--cache-size', type=int, default=0,
+                            help="Result cache size; 0 disables caching so every message is computed")
+    run_parser.add_argument('--no-batching', action='store_true')
+    run_parser.add_argument('--url', type=str, default='http://localhost:5000')
+    run_parser.add_argument('--server-pid', type=int, default=None,
+                            help="PID of the server process for peak RSS in http mode")
+    run_parser.add_argument('--output', type=str, default=None)
+
+    compare_parser = subparsers.add_parser('compare')
+    compare_parser.add_argument('baseline', type=str)
+    compare_parser.add_argument('candidate', type=str)
+    compare_parser.add_argument('--threshold', type=float, default=0.05)
+
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        results = run_benchmark(args)
+        if args.output:
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+            logger.info(f"Results written to {args.output}")
+    else:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        with open(args.candidate, 'r') as f:
+            candidate = json.load(f)
+        rows = compare_results(baseline, candidate, threshold=args.threshold)
+        for row in rows:
+            marker = "REGRESSION" if row["regression"] else "ok"
+            if row["metric"] == "errors":
+                logger.info(f"{row['run']} errors: {row['baseline']} -> {row['candidate']} {marker}")
+            elif row["baseline"] is None or row["candidate"] is None:
+                logger.info(f"{row['run']} {row['metric']}: {row['baseline']} -> {row['candidate']} {marker}")
+            else:
+                logger.info(f"{row['run']} {row['metric']}: {row['baseline']:.2f} -> "
+                            f"{row['candidate']:.2f} ({row['change']:+.1%}) {marker}")
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
@@ -0,0 +1,119 @@
+# nlp/src/benchmarks/validator.py
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from nlp.src.utils.validator import (INVALID_DATE, INVALID_END_DATE, error_messages, validate_leave_request,
+                                     validate_leave_requests)
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+# ISO biçiminde görünen ama var olmayan tarihler; batch'i düşürmeden INVALID_DATE olmalı
+IMPOSSIBLE_DATES = ("2024-02-31", "2024-13-01", "2024-00-10", "2024-04-31", "2024-01-00")
+# Boş hücreler batch'te MISSING_DATE sayılır (tek satırda format hatası); karşılaştırılmaz
+MALFORMED_DATES = ("31.02.2024", "32.01.2024", "tarih")
+
+
+def _format_date(rng, value):
+    return value.strftime("%d.%m.%Y") if rng.random() < 0.5 else value.isoformat()
+
+
+def generate_rows(rng, count, today):
+    """
+    (başlangıç, bitiş, süre) satırları: geçerli aralıklar, geçmiş ve bir yıldan
+    ileri tarihler, ters aralıklar, sınır dışı süreler ve bozuk/var olmayan
+    başlangıç tarihleri. validate_leave_request strptime ile okuyamadığı bitiş
+    tarihini hiç doğrulamadığından bozuk bitiş tarihleri check_invalid_dates'te.
+    """
+    rows = []
+    for _ in range(count):
+        start = today + timedelta(days=rng.randint(-30, 400))
+        end = start + timedelta(days=rng.randint(-5, 40))
+        start_text, end_text = _format_date(rng, start), _format_date(rng, end)
+        if rng.random() < 0.05:
+            start_text = rng.choice(IMPOSSIBLE_DATES + MALFORMED_DATES)
+        duration = rng.choice((None, rng.randint(-60, 600)))
+        rows.append((start_text, end_text, duration))
+    valid = _format_date(rng, today + timedelta(days=3))
+    rows.extend((text, valid, None) for text in IMPOSSIBLE_DATES)
+    return rows
+
+
+def check_parity(rows):
+    """
+    validate_leave_requests'in satır başına mesajlarının validate_leave_request
+    ile birebir aynı olduğunu doğrular.
+    """
+    starts, ends, durations = (list(column) for column in zip(*rows))
+    batch = error_messages(validate_leave_requests(starts, ends, durations))
+    mismatches = []
+    for row, actual in zip(rows, batch):
+        expected = validate_leave_request(row[0], row[1], None, None, row[2])[1]
+        if expected != actual:
+            mismatches.append({"input": row, "expected": expected, "actual": actual})
+    return mismatches
+
+
+def check_invalid_dates(today):
+    # Var olmayan ve bozuk tarihler batch'i düşürmeden yalnızca kendi satırını geçersiz kılar
+    valid = (today + timedelta(days=3)).isoformat()
+    invalid = list(IMPOSSIBLE_DATES + MALFORMED_DATES)
+    expected = [INVALID_DATE] * len(invalid) + [INVALID_END_DATE] * len(invalid)
+    codes = validate_leave_requests(invalid + [valid] * len(invalid),
+                                    [valid] * len(invalid) + invalid, today=today)
+    return [{"input": text, "expected": want, "actual": int(code)}
+            for text, want, code in zip(invalid + invalid, expected, codes) if want != code]
+
+
+def run_benchmark(rows, repeat=3):
+    starts, ends, durations = (list(column) for column in zip(*rows))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for row in rows:
+            validate_leave_request(row[0], row[1], None, None, row[2])
+    single_seconds = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        validate_leave_requests(starts, ends, durations)
+    batch_seconds = (time.perf_counter() - start) / repeat
+    return {
+        "rows": len(rows),
+        "single_row_seconds": single_seconds,
+        "batch_seconds": batch_seconds,
+        "speedup": single_seconds / batch_seconds if batch_seconds else float('inf'),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check batch leave validation against the single-row validator and benchmark both")
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--output', type=str, default=None,
+                        help="Optional path to write the results as JSON")
+    args = parser.parse_args()
+
+    rows = generate_rows(random.Random(args.seed), args.rows, date.today())
+    mismatches = check_parity(rows) + check_invalid_dates(date.today())
+    for mismatch in mismatches[:20]:
+        logger.error(f"Mismatch: {mismatch}")
+    logger.info(f"Parity check: {len(mismatches)} mismatches")
+
+    results = run_benchmark(rows, repeat=args.repeat)
+    results["mismatches"] = len(mismatches)
+    for key, value in results.items():
+        logger.info(f"{key}: {value}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    if mismatches:
+        sys.exit(1)
@@ -0,0 +1,148 @@
+# nlp/src/utils/batching.py
+import os
+import threading
+import time
+import logging
+from collections import deque
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class MicroBatcher:
+    """
+    Eşzamanlı gelen tekil istekleri kısa bir zaman penceresi boyunca toplar
+    ve tek bir toplu çağrı ile işler.
+    Pencere, ilk istek geldikten sonra max_wait_ms dolduğunda veya kuyrukta
+    max_batch_size kadar istek biriktiğinde kapanır.
+    process_batch, girdi listesini alıp aynı sırada sonuç listesi döndürmelidir.
+    """
+
+    def __init__(self, process_batch, max_batch_size=16, max_wait_ms=5.0, name="micro-batcher"):
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must be non-negative")
+
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.name = name
+
+        self._queue = deque()
+        self._condition = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._worker = None
+        self._worker_pid = None
+        self._closed = False
+
+        # İstatistikler
+        self._submitted = 0
+        self._batches = 0
+        self._processed = 0
+        self._max_queue_depth = 0
+        self._last_batch_size = 0
+
+    def _ensure_worker(self):
+        # Worker thread'i ilk istekte başlatılır. Fork edilen süreçlere
+        # thread'ler kopyalanmadığı için her süreç kendi thread'ini başlatır.
+        pid = os.getpid()
+        if self._worker_pid == pid:
+            return
+        with self._start_lock:
+            if self._worker_pid == pid:
+                return
+            if self._worker_pid is not None:
+                self._condition = threading.Condition()
+                self._queue = deque()
+            self._worker = threading.Thread(
+                target=self._run, name=self.name, daemon=True)
+            self._worker.start()
+            self._worker_pid = pid
+
+    def submit(self, item):
+        self._ensure_worker()
+        future = Future()
+        with self._condition:
+            closed = self._closed
+            if not closed:
+                self._queue.append((item, future))
+                self._submitted += 1
+                self._max_queue_depth = max(
+                    self._max_queue_depth, len(self._queue))
+                self._condition.notify()
+
+        if closed:
+            # Kapatılmış bir batcher'a geç gelen istekler doğrudan işlenir
+            try:
+                future.set_result(self.process_batch([item])[0])
+            except Exception as e:
+                future.set_exception(e)
+        return future
+
+    def process(self, item, timeout=None):
+        return self.submit(item).result(timeout=timeout)
+
+    def close(self):
+        # Kuyruktaki istekler işlendikten sonra worker thread'i durur
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def _collect_batch(self):
+        with self._condition:
+            while not self._queue:
+                if self._closed:
+                    return None
+                self._condition.wait()
+
+            # Pencere ilk istek alındığında açılır
+            deadline = time.monotonic() + self.max_wait_ms / 1000.0
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+            batch_size = min(len(self._queue), self.max_batch_size)
+            return [self._queue.popleft() for _ in range(batch_size)]
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if batch is None:
+                return
+            items = [item for item, _ in batch]
+            futures = [future for _, future in batch]
+
+            try:
+                results = self.process_batch(items)
+                if len(results) != len(items):
+                    raise RuntimeError(
+                        f"Batch processor returned {len(results)} results for {len(items)} items")
+            except Exception as e:
+                logger.error(f"Error processing batch of {len(items)}: {str(e)}")
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+
+            with self._condition:
+                self._batches += 1
+                self._processed += len(items)
+                self._last_batch_size = len(items)
+
+    def stats(self):
+        with self._condition:
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_ms,
+                "queue_depth": len(self._queue),
+                "max_queue_depth": self._max_queue_depth,
+                "submitted": self._submitted,
+                "processed": self._processed,
+                "batches": self._batches,
+                "last_batch_size": self._last_batch_size,
+                "avg_batch_size": self._processed / self._batches if self._batches else 0.0,
+            }
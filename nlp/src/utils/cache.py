@@ -0,0 +1,106 @@
+# nlp/src/utils/cache.py
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ResultCache:
+    """
+    Boyutu sınırlı LRU + TTL sonuç önbelleği.
+    Aynı anahtar için eşzamanlı gelen istekler tek bir hesaplamayı bekler;
+    hesaplama hata verirse hata tüm bekleyenlere iletilir ve sonuç önbelleğe alınmaz.
+    """
+
+    def __init__(self, max_size=4096, ttl_seconds=600):
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    def _lookup(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= now:
+            del self._entries[key]
+            self._expirations += 1
+            return False, None
+
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key, value, now):
+        expires_at = now + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self._evictions += 1
+
+    def get_or_compute(self, key, compute):
+        with self._lock:
+            found, value = self._lookup(key, time.monotonic())
+            if found:
+                self._hits += 1
+                return value
+
+            future = self._in_flight.get(key)
+            if future is not None:
+                self._coalesced += 1
+                owner = False
+            else:
+                self._misses += 1
+                future = Future()
+                self._in_flight[key] = future
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            with self._lock:
+                del self._in_flight[key]
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, value, time.monotonic())
+            del self._in_flight[key]
+        future.set_result(value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self._hits + self._misses + self._coalesced
+            return {
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl_seconds,
+                "size": len(self._entries),
+                "in_flight": len(self._in_flight),
+                "hits": self._hits,
+                "misses": self._misses,
+                "coalesced": self._coalesced,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+                "hit_rate": (self._hits + self._coalesced) / lookups if lookups else 0.0,
+            }
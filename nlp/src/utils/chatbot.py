@@ -1,43 +1,371 @@
 import torch
-from transformers import AutoTokenizer, BertForSequenceClassification
+from transformers import AutoTokenizer
 import pickle
-from nlp.src.utils.entity_extraction import extract_entities
+import hashlib
+import os
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from nlp.src.utils.entity_extraction import extract_entities, extract_entities_batch
+from nlp.src.utils.fast_entities import extract_fast_entities
 from nlp.src.utils.data_preprocessing import preprocess_text
+from nlp.src.utils.batching import MicroBatcher
+from nlp.src.utils.cache import ResultCache
+from nlp.src.utils.inference_backends import create_backend, softmax
+from nlp.src.utils.lexical_classifier import LEXICAL_MODEL_NAME, LexicalIntentClassifier
+from nlp.src.utils.metrics import (
+    BATCH_SIZE, CASCADE_DECISIONS, EXIT_LAYER, REQUEST_LATENCY, RESPONSE_SOURCE, record_prediction, stage_timer)
+from nlp.src.utils.response_generation import GenerationFallback
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bir aşama zaman aşımına uğradığında kullanılan yedek sonuçlar
+FALLBACK_INTENT = "default"
+FALLBACK_CONFIDENCE = 0.0
+
+# "fast" entity modunda PERSON/ORG için spaCy'nin çalıştırıldığı intent'ler
+SPACY_INTENTS = ("purchase_request",)
+
+
+def empty_entities():
+    return {"DATE": [], "TIME": [], "PERSON": [], "ORG": []}
+
+
+def compute_model_version(model_path, label_encoder_path):
+    # Model dosyalarının adı, boyutu ve değişiklik zamanından kısa bir sürüm kimliği üretir
+    digest = hashlib.sha1()
+    paths = [os.path.join(model_path, name)
+             for name in sorted(os.listdir(model_path))]
+    for path in paths + [label_encoder_path]:
+        stat = os.stat(path)
+        digest.update(
+            f"{os.path.basename(path)}:{stat.st_size}:{stat.st_mtime_ns}".encode())
+    return digest.hexdigest()[:12]
+
 
 class Chatbot:
-    def __init__(self, model_path, label_encoder_path):
+    def __init__(self, model_path, label_encoder_path, enable_batching=True, max_batch_size=16, max_wait_ms=5.0,
+                 cache_size=4096, cache_ttl=600, model_version=None,
+                 parallel_stages=False, stage_workers=4, entity_timeout=1.0, intent_timeout=2.0,
+                 entity_mode="spacy", spacy_intents=SPACY_INTENTS,
+                 backend="torch", backend_options=None, profiler=None,
+                 cascade=False, cascade_threshold=0.9, cascade_path=None,
+                 response_generator=None, response_mode="template"):
+        if entity_mode not in ("spacy", "fast"):
+            raise ValueError(f"Unknown entity mode: {entity_mode}")
+        if response_mode not in ("template", "generate"):
+            raise ValueError(f"Unknown response mode: {response_mode}")
+
         self.device = torch.device(
             "cuda" if torch.cuda.is_available() else "cpu")
         self.tokenizer = AutoTokenizer.from_pretrained(model_path)
-        self.model = BertForSequenceClassification.from_pretrained(
-            model_path).to(self.device)
+        self.backend = create_backend(
+            backend, model_path, self.device, **(backend_options or {}))
+        # Erken çıkışlı backend'ler örnek başına çıkış katmanını da döndürür
+        self.reports_exit_layer = hasattr(self.backend, "logits_with_exits")
 
         with open(label_encoder_path, 'rb') as f:
             self.label_encoder = pickle.load(f)
 
-        logger.info(f"Successfully loaded model and label encoder")
+        self.model_version = model_version or compute_model_version(
+            model_path, label_encoder_path)
+        logger.info(
+            f"Successfully loaded model and label encoder (version {self.model_version}, backend {backend})")
+
+        # Eşzamanlı classify_intent çağrılarını tek bir forward pass'te topla
+        self.batcher = None
+        if enable_batching:
+            self.batcher = MicroBatcher(
+                self._classify_batch, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms,
+                name="intent-batcher")
+
+        # Tekrarlanan mesajlar için normalize edilmiş metin + model sürümüne göre önbellek
+        self.cache = None
+        if cache_size:
+            self.cache = ResultCache(max_size=cache_size, ttl_seconds=cache_ttl)
+
+        # Entity extraction ve intent sınıflandırma birbirinden bağımsız olduğu
+        # için paylaşılan, sınırlı bir thread havuzunda paralel çalıştırılabilir
+        self.parallel_stages = parallel_stages
+        self.stage_workers = stage_workers
+        self.entity_timeout = entity_timeout
+        self.intent_timeout = intent_timeout
+        self._stage_executor = None
+        self._stage_executor_pid = None
+        self._stage_lock = threading.Lock()
+        self._stage_timeouts = {"entities": 0, "intent": 0}
+
+        # "fast": DATE/TIME/DURATION regex ile, PERSON/ORG yalnızca gerektiğinde spaCy ile
+        self.entity_mode = entity_mode
+        self.spacy_intents = frozenset(spacy_intents)
+
+        # İsteğe bağlı ProfilingController; kurulduğunda sonraki n mesaj profillenir
+        self.profiler = profiler
+
+        # Kaskad: kalibre güveni eşiği geçen mesajlar BERT'e hiç gitmez
+        self.lexical = None
+        self.cascade_threshold = cascade_threshold
+        if cascade:
+            self.lexical = LexicalIntentClassifier.load(
+                cascade_path or os.path.join(model_path, LEXICAL_MODEL_NAME))
+            logger.info(f"Cascade enabled with threshold {cascade_threshold}")
+
+        # İsteğe bağlı GPT-2 yanıt üretici; model sürümlerinden bağımsız olduğu için
+        # sunucuda bir kez yüklenip paylaşılır. "template" modunda yalnızca akışta kullanılır
+        self.response_generator = response_generator
+        self.response_mode = response_mode
+
+    def _encode(self, texts):
+        # Tüm liste tek seferde tokenize edilir, padding forward öncesinde yapılır
+        with stage_timer("preprocessing"):
+            normalized_texts = [preprocess_text(text) for text in texts]
+        with stage_timer("tokenization"):
+            return self.tokenizer(normalized_texts, truncation=True)
+
+    def _forward(self, encodings):
+        # padding=True: batch en uzun diziye göre doldurulur. Ayrı aşama olarak ölçülür;
+        # "tokenization" histogramına istek başına ikinci bir gözlem eklenmesin
+        with stage_timer("padding"):
+            inputs = self.tokenizer.pad(
+                encodings, padding=True, return_tensors="np")
+        BATCH_SIZE.observe(len(inputs["input_ids"]))
+
+        exit_layers = None
+        with stage_timer("forward"):
+            if self.reports_exit_layer:
+                logits, exit_layers = self.backend.logits_with_exits(dict(inputs))
+            else:
+                logits = self.backend.logits(dict(inputs))
+        if exit_layers is not None:
+            for layer in exit_layers.tolist():
+                EXIT_LAYER.observe(layer)
+        with stage_timer("softmax"):
+            probabilities = softmax(logits)
+            predicted_classes = probabilities.argmax(axis=-1)
+            confidences = probabilities[np.arange(len(predicted_classes)), predicted_classes]
+        return predicted_classes, confidences, exit_layers
+
+    def _decode_labels(self, predicted_classes):
+        with stage_timer("label_decoding"):
+            return self.label_encoder.inverse_transform(predicted_classes)
+
+    def _classify_batch(self, texts):
+        # Her öğe (intent, confidence, exit_layer); exit_layer erken çıkış yoksa None
+        predicted_classes, confidences, exit_layers = self._forward(self._encode(texts))
+        intents = self._decode_labels(predicted_classes)
+        if exit_layers is None:
+            exit_layers = [None] * len(texts)
+        else:
+            exit_layers = exit_layers.tolist()
+        return list(zip(intents.tolist(), confidences.tolist(), exit_layers))
+
+    def _lexical_predict(self, texts):
+        with stage_timer("lexical"):
+            intents, confidences = self.lexical.predict(texts)
+        confident = confidences >= self.cascade_threshold
+        CASCADE_DECISIONS.inc("lexical", amount=int(confident.sum()))
+        CASCADE_DECISIONS.inc("bert", amount=int(len(texts) - confident.sum()))
+        return intents, confidences, confident
+
+    def _profiling(self):
+        # Profil oturumunda forward'ın izde görünmesi için aşamalar bu thread'de,
+        # önbellek, batcher ve aşama havuzu kullanılmadan çalışır
+        return self.profiler is not None and self.profiler.in_session()
+
+    def _classify_uncached(self, text):
+        if self.lexical is not None:
+            intents, confidences, confident = self._lexical_predict([text])
+            if confident[0]:
+                return intents[0], float(confidences[0]), None
+        if self.batcher is not None and not self._profiling():
+            return self.batcher.process(text)
+        return self._classify_batch([text])[0]
+
+    def _classify_detailed(self, text):
+        if self.cache is None or self._profiling():
+            return self._classify_uncached(text)
+        key = ("intent", preprocess_text(text), self.model_version)
+        return self.cache.get_or_compute(key, lambda: self._classify_uncached(text))
 
     def classify_intent(self, text):
-        normalized_text = preprocess_text(text)
-        inputs = self.tokenizer(
-            normalized_text, return_tensors="pt", truncation=True, padding=True).to(self.device)
+        intent, confidence, _ = self._classify_detailed(text)
+        return intent, confidence
+
+    def _spacy_entities(self, text):
+        with stage_timer("ner"):
+            return extract_entities(text)
+
+    def _spacy_entities_batch(self, texts):
+        with stage_timer("ner_batch"):
+            return extract_entities_batch(texts)
+
+    def extract_entities(self, text):
+        if self.cache is None or self._profiling():
+            return self._spacy_entities(text)
+        # NER büyük/küçük harfe duyarlı olduğu için yalnızca boşluklar normalize edilir
+        key = ("entities", " ".join(text.split()), self.model_version)
+        entities = self.cache.get_or_compute(
+            key, lambda: self._spacy_entities(text))
+        return {label: list(values) for label, values in entities.items()}
+
+    def _fast_entities(self, text):
+        entities = empty_entities()
+        with stage_timer("fast_entities"):
+            entities.update(extract_fast_entities(text))
+        return entities
+
+    def _run_fast_path(self, text):
+        entities = self._fast_entities(text)
+        intent, confidence, exit_layer = self._classify_detailed(text)
+        if intent in self.spacy_intents:
+            spacy_entities = self.extract_entities(text)
+            entities["PERSON"] = spacy_entities.get("PERSON", [])
+            entities["ORG"] = spacy_entities.get("ORG", [])
+        return entities, intent, confidence, exit_layer
 
-        with torch.no_grad():
-            outputs = self.model(**inputs)
+    def _extract_entities_for_batch(self, texts, intents):
+        if self.entity_mode != "fast":
+            return self._spacy_entities_batch(texts)
 
-        logits = outputs.logits
-        probabilities = torch.nn.functional.softmax(logits, dim=-1)
-        confidence, predicted_class = torch.max(probabilities, dim=-1)
+        entities_list = [self._fast_entities(text) for text in texts]
+        spacy_positions = [i for i, intent in enumerate(intents)
+                           if intent in self.spacy_intents]
+        if spacy_positions:
+            spacy_results = self._spacy_entities_batch(
+                [texts[i] for i in spacy_positions])
+            for i, spacy_entities in zip(spacy_positions, spacy_results):
+                entities_list[i]["PERSON"] = spacy_entities.get("PERSON", [])
+                entities_list[i]["ORG"] = spacy_entities.get("ORG", [])
+        return entities_list
 
-        intent = self.label_encoder.inverse_transform(
-            [predicted_class.item()])[0]
-        return intent, confidence.item()
+    def batching_stats(self):
+        if self.batcher is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.batcher.stats()}
+
+    def cache_stats(self):
+        if self.cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **self.cache.stats()}
+
+    def stage_stats(self):
+        with self._stage_lock:
+            return {
+                "parallel": self.parallel_stages,
+                "workers": self.stage_workers,
+                "entity_timeout": self.entity_timeout,
+                "intent_timeout": self.intent_timeout,
+                "timeouts": dict(self._stage_timeouts),
+            }
+
+    def close(self):
+        # Sıcak model değişiminde eski örneğin thread'leri serbest bırakılır;
+        # devam eden istekler tamamlanır
+        if self.batcher is not None:
+            self.batcher.close()
+        with self._stage_lock:
+            if self._stage_executor is not None:
+                self._stage_executor.shutdown(wait=False)
+                self._stage_executor = None
+
+    def _get_stage_executor(self):
+        # Havuz ilk kullanımda oluşturulur; fork sonrası her süreç kendi havuzunu açar
+        pid = os.getpid()
+        with self._stage_lock:
+            if self._stage_executor is None or self._stage_executor_pid != pid:
+                self._stage_executor = ThreadPoolExecutor(
+                    max_workers=self.stage_workers, thread_name_prefix="chatbot-stage")
+                self._stage_executor_pid = pid
+            return self._stage_executor
+
+    def _wait_stage(self, stage, future, deadline, fallback):
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            logger.warning(f"Stage '{stage}' timed out, using fallback result")
+            with self._stage_lock:
+                self._stage_timeouts[stage] += 1
+            return fallback
+
+    def _run_stages_parallel(self, text):
+        executor = self._get_stage_executor()
+        start = time.monotonic()
+        entities_future = executor.submit(self.extract_entities, text)
+        intent_future = executor.submit(self._classify_detailed, text)
+
+        entities = self._wait_stage(
+            "entities", entities_future, start + self.entity_timeout, empty_entities())
+        intent, confidence, exit_layer = self._wait_stage(
+            "intent", intent_future, start + self.intent_timeout,
+            (FALLBACK_INTENT, FALLBACK_CONFIDENCE, None))
+        return entities, intent, confidence, exit_layer
 
     def generate_response(self, intent, entities):
+        with stage_timer("response_generation"):
+            if self.response_generator is None or self.response_mode != "generate":
+                return self._template_response(intent, entities)
+            return self._model_response(intent, entities)
+
+    def _model_response(self, intent, entities):
+        try:
+            response = self.response_generator.generate(intent, entities)
+        except GenerationFallback as e:
+            RESPONSE_SOURCE.inc("template", e.reason)
+            return self._template_response(intent, entities)
+        except Exception as e:
+            logger.error(f"Response generation failed: {str(e)}")
+            RESPONSE_SOURCE.inc("template", "error")
+            return self._template_response(intent, entities)
+        RESPONSE_SOURCE.inc("model", "")
+        return response
+
+    def stream_response(self, intent, entities):
+        """
+        Yanıtı ("token", metin) olayları halinde üretir ve ("done", bilgi) ile bitirir.
+        Metin gönderilmeye başladıktan sonra aşılan bütçe yanıtı keser (source ==
+        "model", reason bütçenin adı). Diğer hatalarda önceden gönderilen parçalar
+        geçersizdir; istemci "done" olayındaki şablon yanıtı kullanır (source == "template").
+        """
+        if self.response_generator is None:
+            response = self._template_response(intent, entities)
+            yield "token", response
+            yield "done", {"response": response, "source": "template", "reason": None}
+            return
+
+        parts = []
+        reason = None
+        truncated = None
+        stream = self.response_generator.stream(intent, entities)
+        try:
+            while True:
+                try:
+                    delta = next(stream)
+                except StopIteration as stop:
+                    truncated = stop.value  # kesildiyse aşılan bütçe
+                    break
+                parts.append(delta)
+                yield "token", delta
+        except GenerationFallback as e:
+            reason = e.reason
+        except Exception as e:
+            logger.error(f"Response generation failed: {str(e)}")
+            reason = "error"
+
+        if reason is not None:
+            RESPONSE_SOURCE.inc("template", reason)
+            yield "done", {"response": self._template_response(intent, entities),
+                           "source": "template", "reason": reason}
+            return
+        RESPONSE_SOURCE.inc("model", truncated or "")
+        yield "done", {"response": "".join(parts), "source": "model", "reason": truncated}
+
+    def warm_up_responses(self):
+        if self.response_generator is not None:
+            self.response_generator.prepare(self.label_encoder.classes_.tolist())
+
+    def _template_response(self, intent, entities):
         responses = {
             "greeting": "Merhaba! Size nasıl yardımcı olabilirim?",
             "leave_request_annual": "Yıllık izin talebinizi aldım. Hangi tarihler için izin almak istiyorsunuz?",
@@ -58,13 +386,138 @@ class Chatbot:
             return "Yıllık izin talebinizi aldım, ancak tarih bilgisi eksik görünüyor. Hangi tarihler için izin almak istiyorsunuz?"
 
     def process_message(self, text):
-        entities = extract_entities(text)
-        intent, confidence = self.classify_intent(text)
-        response = self.generate_response(intent, entities)
+        if self.profiler is not None and self.profiler.remaining:
+            with self.profiler.maybe_session("process_message"):
+                return self._process_message(text)
+        return self._process_message(text)
+
+    def _understand(self, text):
+        if self.entity_mode == "fast":
+            return self._run_fast_path(text)
+        if self.parallel_stages and not self._profiling():
+            return self._run_stages_parallel(text)
+        entities = self.extract_entities(text)
+        intent, confidence, exit_layer = self._classify_detailed(text)
+        return entities, intent, confidence, exit_layer
 
-        return {
+    def _result(self, intent, confidence, entities, exit_layer, response=None):
+        result = {
             "intent": intent,
             "confidence": confidence,
             "entities": entities,
-            "response": response
+            "response": response,
+            "model_version": self.model_version
         }
+        if response is None:
+            del result["response"]  # akışta yanıt ayrı olaylarla gelir
+        if exit_layer is not None:
+            result["exit_layer"] = exit_layer
+        return result
+
+    def _process_message(self, text):
+        start = time.perf_counter()
+        entities, intent, confidence, exit_layer = self._understand(text)
+        response = self.generate_response(intent, entities)
+        record_prediction(intent, confidence)
+        REQUEST_LATENCY.observe(time.perf_counter() - start)
+
+        return self._result(intent, confidence, entities, exit_layer, response)
+
+    def stream_message(self, text):
+        """
+        process_message'ın akış karşılığı: önce intent ve entity'leri içeren
+        ("meta", sonuç) olayı, ardından stream_response olayları.
+        """
+        entities, intent, confidence, exit_layer = self._understand(text)
+        record_prediction(intent, confidence)
+        yield "meta", self._result(intent, confidence, entities, exit_layer)
+        yield from self.stream_response(intent, entities)
+
+    def process_messages(self, texts, chunk_size=32):
+        """
+        Mesaj listesini toplu olarak işler. Sonuçlar girdi sırasıyla döner;
+        hatalı öğeler tüm batch'i düşürmek yerine kendi "error" alanıyla döner.
+        """
+        results = [None] * len(texts)
+        valid_indices = []
+        for i, text in enumerate(texts):
+            if isinstance(text, str) and text.strip():
+                valid_indices.append(i)
+            else:
+                results[i] = {"error": "Invalid text"}
+
+        if not valid_indices:
+            return results
+
+        valid_texts = [texts[i] for i in valid_indices]
+        intents = np.empty(len(valid_texts), dtype=object)
+        confidences = np.zeros(len(valid_texts), dtype=np.float32)
+        succeeded = np.zeros(len(valid_texts), dtype=bool)
+        # 0: erken çıkış bilgisi yok (lexical ya da tam model backend'i)
+        exit_layers = np.zeros(len(valid_texts), dtype=np.int64)
+
+        # Kaskad açıksa yalnızca lexical modelin emin olmadığı mesajlar BERT'e gider
+        bert_positions = np.arange(len(valid_texts))
+        if self.lexical is not None:
+            lexical_intents, lexical_confidences, confident = self._lexical_predict(valid_texts)
+            intents[confident] = lexical_intents[confident]
+            confidences[confident] = lexical_confidences[confident]
+            succeeded[confident] = True
+            bert_positions = np.flatnonzero(~confident)
+
+        if len(bert_positions):
+            encodings = self._encode([valid_texts[i] for i in bert_positions])
+
+            # Forward pass'ler chunk'lar halinde; bir chunk hata verirse yalnızca
+            # o chunk'taki öğeler hatalı işaretlenir
+            predicted_classes = np.zeros(len(bert_positions), dtype=np.int64)
+            bert_confidences = np.zeros(len(bert_positions), dtype=np.float32)
+            bert_exit_layers = np.zeros(len(bert_positions), dtype=np.int64)
+            bert_succeeded = np.zeros(len(bert_positions), dtype=bool)
+            for start in range(0, len(bert_positions), chunk_size):
+                end = start + chunk_size
+                chunk = {key: values[start:end]
+                         for key, values in encodings.items()}
+                try:
+                    predicted_classes[start:end], bert_confidences[start:end], chunk_exits = self._forward(
+                        chunk)
+                    if chunk_exits is not None:
+                        bert_exit_layers[start:end] = chunk_exits
+                    bert_succeeded[start:end] = True
+                except Exception as e:
+                    logger.error(
+                        f"Error classifying items {start}-{min(end, len(bert_positions)) - 1}: {str(e)}")
+
+            if bert_succeeded.any():
+                positions = bert_positions[bert_succeeded]
+                intents[positions] = self._decode_labels(
+                    predicted_classes[bert_succeeded])
+                confidences[positions] = bert_confidences[bert_succeeded]
+                exit_layers[positions] = bert_exit_layers[bert_succeeded]
+                succeeded[positions] = True
+
+        try:
+            entities_list = self._extract_entities_for_batch(
+                valid_texts, intents)
+        except Exception as e:
+            logger.error(f"Error extracting entities in batch: {str(e)}")
+            entities_list = [{} for _ in valid_texts]
+
+        for position, i in enumerate(valid_indices):
+            if not succeeded[position]:
+                results[i] = {"error": "Error processing message"}
+                continue
+            intent = intents[position]
+            entities = entities_list[position]
+            record_prediction(intent, float(confidences[position]))
+            results[i] = {
+                "intent": intent,
+                "confidence": float(confidences[position]),
+                "entities": entities,
+                "response": self.generate_response(intent, entities),
+                "model_version": self.model_version
+            }
+            if exit_layers[position]:
+                results[i]["exit_layer"] = int(exit_layers[position])
+
+        return results
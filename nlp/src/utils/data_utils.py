@@ -1,7 +1,20 @@
 # nlp/src/utils/data_utils.py
 import json
+import logging
+import os
+import pickle
+import numpy as np
+import torch
 from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import LabelEncoder
+from transformers import AutoModelForSequenceClassification
 from .intent_recognition import train_intent_model
+from .dataset_cache import build_intent_dataset
+from .length_bucketing import make_intent_dataloader
+from .model_registry import LABEL_ENCODER_NAME
+from .model_utils import evaluate_model, train_one_epoch
+
+logger = logging.getLogger(__name__)
 
 
 def load_training_data(file_path):
@@ -19,8 +32,182 @@ def load_training_data(file_path):
     return texts, numeric_labels, label_dict
 
 
-def update_model(new_texts, new_labels, texts, labels, label_dict, tokenizer, device):
+def extend_label_dict(new_labels, label_dict):
+    """
+    Yeni örneklerin etiketlerini sayısala çevirir. Etiket isim olarak verilir
+    ve label_dict'te yoksa sona yeni bir sınıf olarak eklenir.
+    """
+    label_dict = dict(label_dict)
+    numeric_labels = []
+    for label in new_labels:
+        if isinstance(label, str):
+            if label not in label_dict:
+                label_dict[label] = len(label_dict)
+                logger.info(f"New intent '{label}' added with id {label_dict[label]}")
+            label = label_dict[label]
+        numeric_labels.append(int(label))
+    return numeric_labels, label_dict
+
+
+def label_dict_from_encoder(label_encoder):
+    # LabelEncoder sınıflarının sırası sınıflandırıcının çıktı satırlarının sırasıdır
+    return {label: i for i, label in enumerate(label_encoder.classes_.tolist())}
+
+
+def extend_label_encoder(label_encoder, label_dict):
+    """
+    Mevcut LabelEncoder'ın sınıflarını koruyup label_dict'teki yeni etiketleri
+    id sırasıyla sona ekler; böylece classes_ büyütülen başlığın satırlarıyla aynı sıradadır.
+    """
+    classes = [label for label, _ in sorted(label_dict.items(), key=lambda item: item[1])]
+    known = label_encoder.classes_.tolist()
+    if classes[:len(known)] != known:
+        raise ValueError(
+            "label_dict ids do not match the order of the checkpoint's label encoder")
+    extended = LabelEncoder()
+    extended.classes_ = np.array(classes)
+    return extended
+
+
+def grow_classifier_head(model, num_labels, label_dict):
+    # Eski sınıfların ağırlıkları korunur, yeni sınıflar için satırlar eklenir
+    old_head = model.classifier
+    old_labels = old_head.out_features
+    if num_labels <= old_labels:
+        return model
+
+    new_head = torch.nn.Linear(old_head.in_features, num_labels).to(
+        old_head.weight.device)
+    with torch.no_grad():
+        new_head.weight.normal_(mean=0.0, std=model.config.initializer_range)
+        new_head.bias.zero_()
+        new_head.weight[:old_labels] = old_head.weight
+        new_head.bias[:old_labels] = old_head.bias
+    model.classifier = new_head
+
+    model.num_labels = num_labels
+    model.config.num_labels = num_labels
+    model.config.id2label = {i: label for label, i in label_dict.items()}
+    model.config.label2id = dict(label_dict)
+    logger.info(f"Classifier head grown from {old_labels} to {num_labels} labels")
+    return model
+
+
+def sample_replay_buffer(labels, per_class, rng, exclude=()):
+    # Her sınıftan en fazla per_class örnek; sınıf dengeli tekrar (replay) tamponu
+    excluded = set(exclude)
+    labels = np.asarray(labels)
+    selected = []
+    for label in np.unique(labels):
+        candidates = [i for i in np.flatnonzero(labels == label) if i not in excluded]
+        if len(candidates) > per_class:
+            candidates = rng.choice(candidates, size=per_class, replace=False)
+        selected.extend(int(i) for i in candidates)
+    return selected
+
+
+def _split_holdout(labels, fraction, rng):
+    labels = np.asarray(labels)
+    holdout = []
+    for label in np.unique(labels):
+        indices = np.flatnonzero(labels == label)
+        count = int(len(indices) * fraction)
+        if count:
+            holdout.extend(int(i) for i in rng.choice(indices, size=count, replace=False))
+    return holdout
+
+
+def _accuracy(model, texts, labels, tokenizer, device):
+    loader = make_intent_dataloader(build_intent_dataset(
+        texts, labels, tokenizer), batch_size=16, shuffle=False)
+    return evaluate_model(model, loader, device)
+
+
+def incremental_update(new_texts, new_labels, texts, labels, label_dict, tokenizer, device,
+                       checkpoint_path, output_path, label_encoder_path, replay_per_class=20,
+                       holdout_fraction=0.2, epochs=3, learning_rate=2e-5, max_accuracy_drop=0.02, seed=42):
+    """
+    Yayındaki checkpoint'ten devam ederek yalnızca yeni örnekler ve eski veriden
+    sınıf dengeli bir replay tamponu üzerinde ince ayar yapar.
+    label_encoder_path checkpoint'in label_encoder.pkl dosyasıdır; label_dict None
+    verilirse ondan türetilir. Yeni etiketlerle genişletilen encoder modelin yanına
+    label_encoder.pkl olarak yazılır (Chatbot ve ModelRegistry bu dosyayı yükler).
+    Eski ve yeni veriden ayrılan held-out set üzerinde eski sınıflardaki doğruluk
+    max_accuracy_drop'tan fazla düşerse yeni model yazılmaz ve (None, label_dict) döner.
+    """
+    rng = np.random.default_rng(seed)
+    with open(label_encoder_path, 'rb') as f:
+        label_encoder = pickle.load(f)
+    if label_dict is None:
+        label_dict = label_dict_from_encoder(label_encoder)
+    new_numeric, updated_label_dict = extend_label_dict(new_labels, label_dict)
+    updated_label_encoder = extend_label_encoder(label_encoder, updated_label_dict)
+
+    model = AutoModelForSequenceClassification.from_pretrained(
+        checkpoint_path).to(device)
+
+    # Held-out: eski veriden sınıf başına bir pay, yeni örneklerin bir kısmı
+    old_holdout = _split_holdout(labels, holdout_fraction, rng)
+    old_holdout_texts = [texts[i] for i in old_holdout]
+    old_holdout_labels = [labels[i] for i in old_holdout]
+    baseline_accuracy = _accuracy(
+        model, old_holdout_texts, old_holdout_labels, tokenizer, device)
+
+    if len(new_texts) >= 5:
+        new_train_texts, new_val_texts, new_train_labels, new_val_labels = train_test_split(
+            new_texts, new_numeric, test_size=holdout_fraction, random_state=seed)
+    else:
+        new_train_texts, new_val_texts, new_train_labels, new_val_labels = new_texts, [], new_numeric, []
+
+    replay = sample_replay_buffer(labels, replay_per_class, rng, exclude=old_holdout)
+    train_texts = list(new_train_texts) + [texts[i] for i in replay]
+    train_labels = list(new_train_labels) + [labels[i] for i in replay]
+    logger.info(
+        f"Incremental update on {len(new_train_texts)} new examples + {len(replay)} replay examples")
+
+    model = grow_classifier_head(model, len(updated_label_dict), updated_label_dict)
+    train_loader = make_intent_dataloader(
+        build_intent_dataset(train_texts, train_labels, tokenizer),
+        batch_size=16, shuffle=True, seed=seed)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=learning_rate)
+    for epoch in range(epochs):
+        train_one_epoch(model, train_loader, optimizer, device)
+
+    old_accuracy = _accuracy(model, old_holdout_texts,
+                             old_holdout_labels, tokenizer, device)
+    new_accuracy = _accuracy(model, new_val_texts, new_val_labels,
+                             tokenizer, device) if new_val_texts else None
+    logger.info(
+        f"Held-out accuracy on existing intents: {baseline_accuracy:.4f} -> {old_accuracy:.4f}"
+        + (f", on new examples: {new_accuracy:.4f}" if new_accuracy is not None else ""))
+
+    if baseline_accuracy - old_accuracy > max_accuracy_drop:
+        logger.error(
+            f"Accuracy on existing intents dropped by {baseline_accuracy - old_accuracy:.4f} "
+            f"(> {max_accuracy_drop}); updated model not saved")
+        return None, label_dict
+
+    os.makedirs(output_path, exist_ok=True)
+    model.save_pretrained(output_path)
+    tokenizer.save_pretrained(output_path)
+    with open(os.path.join(output_path, LABEL_ENCODER_NAME), 'wb') as f:
+        pickle.dump(updated_label_encoder, f)
+    logger.info(f"Updated model saved to {output_path}")
+
+    return model, updated_label_dict
+
+
+def update_model(new_texts, new_labels, texts, labels, label_dict, tokenizer, device,
+                 checkpoint_path=None, output_path=None, label_encoder_path=None, **incremental_options):
+    # Yayındaki checkpoint verilmişse sıfırdan eğitmek yerine artımlı güncelleme yapılır
+    if checkpoint_path is not None:
+        if output_path is None or label_encoder_path is None:
+            raise ValueError("output_path and label_encoder_path are required for incremental updates")
+        return incremental_update(new_texts, new_labels, texts, labels, label_dict, tokenizer, device,
+                                  checkpoint_path, output_path, label_encoder_path, **incremental_options)
+
     # Yeni veriyi mevcut veri ile birleştir
+    new_labels, label_dict = extend_label_dict(new_labels, label_dict)
     all_texts = texts + new_texts
     all_labels = labels + new_labels
 
@@ -0,0 +1,148 @@
+# nlp/src/utils/dataset_cache.py
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+# Proje kök dizinini belirleme
+PROJECT_ROOT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..'))
+
+DEFAULT_CACHE_DIR = os.path.join(PROJECT_ROOT, 'nlp', 'data', '.token_cache')
+
+logger = logging.getLogger(__name__)
+
+
+def tokenizer_fingerprint(tokenizer):
+    digest = hashlib.sha256()
+    digest.update(type(tokenizer).__name__.encode())
+    digest.update(json.dumps(sorted(tokenizer.get_vocab().items()),
+                  ensure_ascii=False).encode())
+    digest.update(json.dumps(tokenizer.special_tokens_map,
+                  sort_keys=True, ensure_ascii=False).encode())
+    digest.update(str(getattr(tokenizer, "do_lower_case", None)).encode())
+    return digest.hexdigest()[:16]
+
+
+def data_fingerprint(texts, max_len):
+    digest = hashlib.sha256()
+    digest.update(str(max_len).encode())
+    for text in texts:
+        digest.update(str(text).encode())
+        digest.update(b"\x1f")
+    return digest.hexdigest()[:16]
+
+
+class TokenizedArrays:
+    """
+    Diskteki tokenize edilmiş veri: (N, max_len) input_ids ve attention_mask
+    dizileri ile her örneğin gerçek token sayısı (lengths).
+    """
+
+    def __init__(self, input_ids, attention_mask, lengths):
+        self.input_ids = input_ids
+        self.attention_mask = attention_mask
+        self.lengths = lengths
+
+    def __len__(self):
+        return len(self.lengths)
+
+
+class TokenizedDatasetStore:
+    """
+    Metinleri bir kez tokenize edip sonucu numpy dizileri olarak diske yazar.
+    Anahtar veri ve tokenizer özetinden oluşur; sonraki çağrılar dizileri
+    mmap ile kopyalamadan açar.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+
+    def _entry_dir(self, texts, tokenizer, max_len):
+        key = f"{data_fingerprint(texts, max_len)}-{tokenizer_fingerprint(tokenizer)}"
+        return os.path.join(self.cache_dir, key)
+
+    def _load(self, entry_dir):
+        # mmap_mode='c': copy-on-write, torch.from_numpy yazılabilir dizi bekler
+        return TokenizedArrays(
+            np.load(os.path.join(entry_dir, 'input_ids.npy'), mmap_mode='c'),
+            np.load(os.path.join(entry_dir, 'attention_mask.npy'), mmap_mode='c'),
+            np.load(os.path.join(entry_dir, 'lengths.npy'), mmap_mode='c'))
+
+    def _write(self, entry_dir, texts, tokenizer, max_len):
+        encodings = tokenizer(
+            [str(text) for text in texts],
+            add_special_tokens=True,
+            max_length=max_len,
+            padding='max_length',
+            truncation=True,
+            return_attention_mask=True,
+            return_token_type_ids=False,
+            return_tensors='np',
+        )
+        input_ids = encodings['input_ids'].astype(np.int64)
+        attention_mask = encodings['attention_mask'].astype(np.int64)
+        lengths = attention_mask.sum(axis=1).astype(np.int32)
+
+        # Yarım kalmış yazımlar okunmasın diye önce geçici dizine yazılır
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_dir = tempfile.mkdtemp(dir=self.cache_dir)
+        try:
+            np.save(os.path.join(tmp_dir, 'input_ids.npy'), input_ids)
+            np.save(os.path.join(tmp_dir, 'attention_mask.npy'), attention_mask)
+            np.save(os.path.join(tmp_dir, 'lengths.npy'), lengths)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not os.path.isdir(entry_dir):
+                raise
+
+    def get(self, texts, tokenizer, max_len=128):
+        entry_dir = self._entry_dir(texts, tokenizer, max_len)
+        if not os.path.isdir(entry_dir):
+            logger.info(f"Tokenizing {len(texts)} texts into {entry_dir}")
+            self._write(entry_dir, texts, tokenizer, max_len)
+        return self._load(entry_dir)
+
+
+class TokenizedIntentDataset(Dataset):
+    """
+    TokenizedArrays üzerinde intent dataset'i. indices verilirse yalnızca o
+    satırlar kullanılır; böylece fold'lar ve train/val bölmeleri aynı diziyi paylaşır.
+    """
+
+    def __init__(self, arrays, labels, indices=None):
+        self.arrays = arrays
+        self.labels = np.asarray(labels, dtype=np.int64)
+        self.indices = np.arange(len(arrays)) if indices is None else np.asarray(indices)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def lengths(self):
+        return self.arrays.lengths[self.indices]
+
+    def __getitem__(self, item):
+        idx = self.indices[item]
+        return {
+            'input_ids': torch.from_numpy(self.arrays.input_ids[idx]),
+            'attention_mask': torch.from_numpy(self.arrays.attention_mask[idx]),
+            'labels': torch.tensor(self.labels[idx], dtype=torch.long)
+        }
+
+
+_default_store = TokenizedDatasetStore()
+
+
+def get_tokenized_arrays(texts, tokenizer, max_len=128, store=None):
+    return (store or _default_store).get(texts, tokenizer, max_len)
+
+
+def build_intent_dataset(texts, labels, tokenizer, max_len=128, store=None):
+    arrays = get_tokenized_arrays(texts, tokenizer, max_len, store)
+    return TokenizedIntentDataset(arrays, labels)
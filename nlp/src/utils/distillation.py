@@ -0,0 +1,192 @@
+# nlp/src/utils/distillation.py
+import logging
+import numpy as np
+import torch
+import torch.nn.functional as F
+from torch.utils.data import Dataset
+from transformers import BertConfig, BertForSequenceClassification
+
+logger = logging.getLogger(__name__)
+
+# Etiketsiz örneklerde hard-label kaybı hesaplanmaz
+IGNORE_LABEL = -100
+
+# 12 katman/768 boyutlu öğretmene göre 4 katman/384 boyut kodlayıcı hesabını ~12 kat azaltır
+DEFAULT_STUDENT_LAYERS = 4
+DEFAULT_STUDENT_HIDDEN = 384
+HEAD_SIZE = 64
+
+
+def augment_text(text, rng, drop_prob=0.1, swap_prob=0.1):
+    """
+    Basit metin çoğaltma: kelime düşürme, komşu kelime yer değiştirme ve
+    büyük/küçük harf varyasyonu. Etiket öğretmen logit'lerinden geldiği için
+    anlamı bozabilecek değişiklikler de kabul edilebilir.
+    """
+    words = text.split()
+    if len(words) > 2:
+        kept = [word for word in words if rng.random() >= drop_prob]
+        words = kept or words
+    for i in range(len(words) - 1):
+        if rng.random() < swap_prob:
+            words[i], words[i + 1] = words[i + 1], words[i]
+    augmented = " ".join(words)
+    if rng.random() < 0.2:
+        augmented = augmented.lower()
+    return augmented
+
+
+def build_distillation_texts(texts, labels, unlabeled_texts=(), augment_copies=2, seed=42):
+    # Etiketli metinler + çoğaltılmış kopyalar (etiketsiz) + dışarıdan verilen etiketsiz metinler
+    rng = np.random.default_rng(seed)
+    all_texts = list(texts)
+    all_labels = list(labels)
+    for _ in range(augment_copies):
+        for text in texts:
+            all_texts.append(augment_text(text, rng))
+            all_labels.append(IGNORE_LABEL)
+    for text in unlabeled_texts:
+        all_texts.append(text)
+        all_labels.append(IGNORE_LABEL)
+    return all_texts, all_labels
+
+
+class DistillationDataset(Dataset):
+    """
+    Tokenize edilmiş veri setine öğretmen logit'lerini ekler.
+    """
+
+    def __init__(self, base, teacher_logits):
+        self.base = base
+        self.teacher_logits = teacher_logits
+
+    def __len__(self):
+        return len(self.base)
+
+    def __getitem__(self, idx):
+        item = dict(self.base[idx])
+        item['teacher_logits'] = self.teacher_logits[idx]
+        return item
+
+    def lengths(self):
+        return self.base.lengths()
+
+
+@torch.no_grad()
+def teacher_logits(teacher, loader, device):
+    # Sıralı (shuffle=False, bucketed=False) bir loader ile veri seti sırasında logit'ler
+    teacher.eval()
+    outputs = []
+    for batch in loader:
+        outputs.append(teacher(input_ids=batch['input_ids'].to(device),
+                               attention_mask=batch['attention_mask'].to(device)).logits.cpu())
+    return torch.cat(outputs)
+
+
+def student_attention_heads(hidden_size, num_heads=None):
+    """
+    Öğrencinin attention head sayısı. Verilmezse 64 boyutlu head'ler kullanılır;
+    gizli boyut head sayısına tam bölünmelidir (ör. 312 için 12 head).
+    """
+    if hidden_size <= 0:
+        raise ValueError(f"Student hidden size must be positive, got {hidden_size}")
+    if num_heads is None:
+        if hidden_size % HEAD_SIZE:
+            raise ValueError(
+                f"Student hidden size {hidden_size} is not a multiple of {HEAD_SIZE}; "
+                f"pass the number of attention heads explicitly (e.g. 12 for 312)")
+        num_heads = hidden_size // HEAD_SIZE
+    if num_heads <= 0 or hidden_size % num_heads:
+        raise ValueError(
+            f"Student hidden size {hidden_size} is not divisible by {num_heads} attention heads")
+    return num_heads
+
+
+@torch.no_grad()
+def _project_embeddings(student, teacher):
+    # Öğretmen kelime gömmelerinin ilk hidden_size temel bileşenine izdüşümü;
+    # konum ve token tipi gömmeleri aynı izdüşümle küçültülür
+    source = teacher.bert.embeddings
+    target = student.bert.embeddings
+    words = source.word_embeddings.weight
+    _, _, components = torch.linalg.svd(words - words.mean(dim=0), full_matrices=False)
+    projection = components[:target.word_embeddings.embedding_dim].T
+    target.word_embeddings.weight.copy_(words @ projection)
+    target.position_embeddings.weight.copy_(source.position_embeddings.weight @ projection)
+    target.token_type_embeddings.weight.copy_(source.token_type_embeddings.weight @ projection)
+
+
+def build_student(teacher, num_layers=DEFAULT_STUDENT_LAYERS, hidden_size=DEFAULT_STUDENT_HIDDEN,
+                  num_heads=None):
+    """
+    Öğretmenle aynı kelime dağarcığını kullanan küçük BERT. Gizli boyut öğretmeninkiyle
+    aynıysa gömmeler ve öğretmenin eşit aralıklı katmanları kopyalanarak başlatılır;
+    daha küçükse gömmeler öğretmeninkilerin izdüşümüyle başlatılır.
+    """
+    teacher_config = teacher.config
+    hidden_size = hidden_size or teacher_config.hidden_size
+    if hidden_size > teacher_config.hidden_size:
+        raise ValueError(
+            f"Student hidden size {hidden_size} exceeds the teacher's {teacher_config.hidden_size}")
+    config = BertConfig(
+        vocab_size=teacher_config.vocab_size,
+        hidden_size=hidden_size,
+        num_hidden_layers=num_layers,
+        num_attention_heads=student_attention_heads(hidden_size, num_heads),
+        intermediate_size=hidden_size * 4,
+        max_position_embeddings=teacher_config.max_position_embeddings,
+        type_vocab_size=teacher_config.type_vocab_size,
+        num_labels=teacher_config.num_labels,
+        id2label=teacher_config.id2label,
+        label2id=teacher_config.label2id,
+    )
+    student = BertForSequenceClassification(config)
+
+    if hidden_size == teacher_config.hidden_size:
+        student.bert.embeddings.load_state_dict(teacher.bert.embeddings.state_dict())
+        step = teacher_config.num_hidden_layers / num_layers
+        for i, layer in enumerate(student.bert.encoder.layer):
+            source = int(round((i + 1) * step)) - 1
+            layer.load_state_dict(teacher.bert.encoder.layer[source].state_dict())
+        student.bert.pooler.load_state_dict(teacher.bert.pooler.state_dict())
+        student.classifier.load_state_dict(teacher.classifier.state_dict())
+        logger.info(f"Student initialized from teacher layers (every {step:.1f})")
+    else:
+        _project_embeddings(student, teacher)
+        logger.info(f"Student embeddings projected from {teacher_config.hidden_size} to {hidden_size} dimensions")
+    return student
+
+
+def distillation_loss(student_logits, teacher_logits, labels, temperature=2.0, alpha=0.5):
+    # Yumuşak hedefler için KL (T^2 ile ölçeklenir) + etiketli örneklerde cross entropy
+    soft = F.kl_div(F.log_softmax(student_logits / temperature, dim=-1),
+                    F.softmax(teacher_logits / temperature, dim=-1),
+                    reduction='batchmean') * temperature ** 2
+    labeled = labels != IGNORE_LABEL
+    if not labeled.any():
+        return soft
+    hard = F.cross_entropy(student_logits[labeled], labels[labeled])
+    return alpha * soft + (1 - alpha) * hard
+
+
+def train_student(student, loader, device, epochs=10, learning_rate=5e-5, temperature=2.0, alpha=0.5):
+    optimizer = torch.optim.AdamW(student.parameters(), lr=learning_rate)
+    student.to(device)
+    for epoch in range(epochs):
+        student.train()
+        total_loss = 0.0
+        for batch in loader:
+            logits = student(input_ids=batch['input_ids'].to(device),
+                             attention_mask=batch['attention_mask'].to(device)).logits
+            loss = distillation_loss(logits, batch['teacher_logits'].to(device),
+                                     batch['labels'].to(device), temperature, alpha)
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+        logger.info(f"Distillation epoch {epoch + 1}/{epochs}, loss {total_loss / len(loader):.4f}")
+    return student.eval()
+
+
+def parameter_count(model):
+    return sum(param.numel() for param in model.parameters())
@@ -0,0 +1,180 @@
+# nlp/src/utils/early_exit.py
+import json
+import logging
+import os
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+logger = logging.getLogger(__name__)
+
+EARLY_EXIT_HEADS_NAME = 'early_exit_heads.pt'
+DEFAULT_EXIT_THRESHOLDS = (0.5, 0.7, 0.8, 0.9, 0.95, 0.99)
+
+
+class EarlyExitHeads(torch.nn.Module):
+    """
+    Ara encoder katmanlarının [CLS] gizli durumu üzerinde hafif sınıflandırıcılar.
+    exit_layers 1 tabanlıdır: 3, 3. encoder katmanının çıktısı demektir.
+    Son katman için modelin kendi pooler + classifier'ı kullanılır.
+    """
+
+    def __init__(self, hidden_size, num_labels, exit_layers, dropout=0.1):
+        super().__init__()
+        self.exit_layers = list(exit_layers)
+        self.dropout = torch.nn.Dropout(dropout)
+        self.heads = torch.nn.ModuleList(
+            torch.nn.Linear(hidden_size, num_labels) for _ in self.exit_layers)
+
+    def forward_layer(self, index, hidden_states):
+        return self.heads[index](self.dropout(hidden_states[:, 0]))
+
+    def save(self, path):
+        torch.save({"hidden_size": self.heads[0].in_features,
+                    "num_labels": self.heads[0].out_features,
+                    "exit_layers": self.exit_layers,
+                    "state_dict": self.state_dict()}, path)
+
+    @classmethod
+    def load(cls, path, map_location="cpu"):
+        checkpoint = torch.load(path, map_location=map_location)
+        heads = cls(checkpoint["hidden_size"], checkpoint["num_labels"], checkpoint["exit_layers"])
+        heads.load_state_dict(checkpoint["state_dict"])
+        return heads.eval()
+
+
+def exit_score(logits, criterion):
+    # Büyük skor = daha emin. entropy için negatif normalize entropi kullanılır
+    probabilities = F.softmax(logits, dim=-1)
+    if criterion == "confidence":
+        return probabilities.max(dim=-1).values
+    if criterion == "entropy":
+        entropy = -(probabilities * torch.log(probabilities.clamp_min(1e-12))).sum(dim=-1)
+        return 1 - entropy / np.log(logits.shape[-1])
+    raise ValueError(f"Unknown early exit criterion: {criterion}")
+
+
+@torch.no_grad()
+def early_exit_forward(model, heads, input_ids, attention_mask, threshold=0.9, criterion="confidence",
+                       token_type_ids=None):
+    """
+    Encoder katmanlarını tek tek çalıştırır; bir çıkış katmanında skoru eşiği geçen
+    örnekler batch'ten çıkarılır, kalanlar sonraki katmana devam eder.
+    Dönüş: (logits [batch, num_labels], exit_layers [batch]) — exit katmanı 1 tabanlıdır.
+    """
+    bert = model.bert
+    num_layers = len(bert.encoder.layer)
+    batch_size = input_ids.shape[0]
+
+    hidden_states = bert.embeddings(input_ids=input_ids, token_type_ids=token_type_ids)
+    extended_mask = bert.get_extended_attention_mask(attention_mask, input_ids.shape)
+
+    logits = torch.zeros(batch_size, model.config.num_labels, device=input_ids.device)
+    exit_layers = torch.full((batch_size,), num_layers, dtype=torch.long)
+    active = torch.arange(batch_size, device=input_ids.device)
+    head_index = {layer: i for i, layer in enumerate(heads.exit_layers)}
+
+    for depth, layer in enumerate(bert.encoder.layer, start=1):
+        hidden_states = layer(hidden_states, extended_mask)[0]
+        if depth == num_layers or depth not in head_index:
+            continue
+
+        layer_logits = heads.forward_layer(head_index[depth], hidden_states)
+        done = exit_score(layer_logits, criterion) >= threshold
+        if done.any():
+            logits[active[done]] = layer_logits[done]
+            exit_layers[active[done].cpu()] = depth
+            keep = ~done
+            active = active[keep]
+            hidden_states = hidden_states[keep]
+            extended_mask = extended_mask[keep]
+            if len(active) == 0:
+                return logits, exit_layers
+
+    pooled = bert.pooler(hidden_states) if bert.pooler is not None else hidden_states[:, 0]
+    logits[active] = model.classifier(model.dropout(pooled))
+    return logits, exit_layers
+
+
+def train_exit_heads(model, loader, device, exit_layers=None, epochs=3, learning_rate=1e-3):
+    """
+    İnce ayarlı modelin ağırlıkları dondurulur, yalnızca ara katman başlıkları
+    modelin gizli durumları üzerinde eğitilir; son katmanın tahmini değişmez.
+    """
+    num_layers = model.config.num_hidden_layers
+    exit_layers = exit_layers or list(range(1, num_layers))
+    heads = EarlyExitHeads(model.config.hidden_size, model.config.num_labels, exit_layers).to(device)
+
+    model.eval()
+    for param in model.parameters():
+        param.requires_grad = False
+
+    optimizer = torch.optim.AdamW(heads.parameters(), lr=learning_rate)
+    for epoch in range(epochs):
+        heads.train()
+        total_loss = 0.0
+        for batch in loader:
+            input_ids = batch['input_ids'].to(device)
+            attention_mask = batch['attention_mask'].to(device)
+            labels = batch['labels'].to(device)
+            with torch.no_grad():
+                hidden_states = model.bert(input_ids, attention_mask=attention_mask,
+                                           output_hidden_states=True).hidden_states
+            # hidden_states[0] embedding çıktısıdır; hidden_states[k] k. katman
+            loss = sum(F.cross_entropy(heads.forward_layer(i, hidden_states[layer]), labels)
+                       for i, layer in enumerate(heads.exit_layers))
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            total_loss += loss.item()
+        logger.info(f"Early exit heads epoch {epoch + 1}/{epochs}, loss {total_loss / len(loader):.4f}")
+
+    return heads.eval()
+
+
+@torch.no_grad()
+def evaluate_early_exit(model, heads, loader, device, thresholds=DEFAULT_EXIT_THRESHOLDS,
+                        criterion="confidence"):
+    """
+    Her eşik için ortalama çalıştırılan katman sayısını ve doğruluğu, ayrıca
+    tam modelin doğruluğunu raporlar.
+    """
+    num_layers = model.config.num_hidden_layers
+    report = {"num_layers": num_layers, "criterion": criterion, "thresholds": []}
+
+    full_correct = total = 0
+    for batch in loader:
+        labels = batch['labels'].to(device)
+        outputs = model(input_ids=batch['input_ids'].to(device),
+                        attention_mask=batch['attention_mask'].to(device))
+        full_correct += (outputs.logits.argmax(dim=-1) == labels).sum().item()
+        total += len(labels)
+    report["full_accuracy"] = full_correct / total
+
+    for threshold in thresholds:
+        correct = 0
+        layers = []
+        for batch in loader:
+            labels = batch['labels'].to(device)
+            logits, exits = early_exit_forward(
+                model, heads, batch['input_ids'].to(device), batch['attention_mask'].to(device),
+                threshold=threshold, criterion=criterion)
+            correct += (logits.argmax(dim=-1) == labels).sum().item()
+            layers.extend(exits.tolist())
+        entry = {"threshold": threshold, "accuracy": correct / total,
+                 "avg_layers": float(np.mean(layers)),
+                 "layer_fraction": float(np.mean(layers)) / num_layers}
+        report["thresholds"].append(entry)
+        logger.info(
+            f"Early exit threshold {threshold}: accuracy {entry['accuracy']:.4f} "
+            f"(full {report['full_accuracy']:.4f}), avg layers {entry['avg_layers']:.2f}/{num_layers}")
+    return report
+
+
+def save_report(report, path):
+    with open(path, 'w') as f:
+        json.dump(report, f, indent=2)
+
+
+def heads_path(model_path):
+    return os.path.join(model_path, EARLY_EXIT_HEADS_NAME)
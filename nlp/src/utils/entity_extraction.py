@@ -1,32 +1,111 @@
 import spacy
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
-try:
-    nlp = spacy.load("tr_core_news_md")
-    logger.info("Successfully loaded Turkish language model (tr_core_news_md)")
-except IOError:
-    logger.error(
-        "Couldn't load tr_core_news_md. Please ensure it's installed correctly.")
-    nlp = None
+MODEL_NAME = "tr_core_news_md"
+# NER için gereken bileşenler; tagger, parser, lemmatizer vb. hiç yüklenmez
+NER_COMPONENTS = ("tok2vec", "ner")
+ENTITY_LABELS = ("DATE", "TIME", "PERSON", "ORG")
+
+
+class EntityExtractor:
+    """
+    spaCy tabanlı entity çıkarıcı.
+    Model ilk kullanımda yüklenir ve yalnızca NER'in ihtiyaç duyduğu bileşenler
+    etkin tutulur.
+    """
+
+    def __init__(self, model_name=MODEL_NAME, components=NER_COMPONENTS, labels=ENTITY_LABELS,
+                 batch_size=64, n_process=1):
+        self.model_name = model_name
+        self.components = tuple(components)
+        self.labels = tuple(labels)
+        self.batch_size = batch_size
+        self.n_process = n_process
+
+        self._nlp = None
+        self._load_failed = False
+        self._lock = threading.Lock()
+
+    def _load(self):
+        try:
+            meta = spacy.util.get_model_meta(
+                spacy.util.get_package_path(self.model_name))
+            pipe_names = meta.get("components", meta.get("pipeline", []))
+            exclude = [name for name in pipe_names if name not in self.components]
+            nlp = spacy.load(self.model_name, exclude=exclude)
+        except (IOError, ImportError):
+            logger.error(
+                f"Couldn't load {self.model_name}. Please ensure it's installed correctly.")
+            return None
+
+        # NER kendi tok2vec katmanını kullanıyorsa paylaşılan tok2vec gereksizdir
+        if "tok2vec" in nlp.pipe_names:
+            listeners = getattr(nlp.get_pipe("tok2vec"),
+                                "listening_components", [])
+            if not listeners:
+                nlp.remove_pipe("tok2vec")
+
+        logger.info(
+            f"Successfully loaded Turkish language model ({self.model_name}) with components {nlp.pipe_names}")
+        return nlp
+
+    @property
+    def nlp(self):
+        if self._nlp is None and not self._load_failed:
+            with self._lock:
+                if self._nlp is None and not self._load_failed:
+                    self._nlp = self._load()
+                    self._load_failed = self._nlp is None
+        return self._nlp
+
+    def _collect_entities(self, doc):
+        entities = {label: [] for label in self.labels}
+
+        for ent in doc.ents:
+            if ent.label_ in entities:
+                entities[ent.label_].append(ent.text)
+
+        return entities
+
+    def extract(self, text):
+        if self.nlp is None:
+            logger.error("No language model available. Cannot extract entities.")
+            return {}
+
+        return self._collect_entities(self.nlp(text))
+
+    def extract_batch(self, texts, n_process=None, batch_size=None):
+        if self.nlp is None:
+            logger.error("No language model available. Cannot extract entities.")
+            return [{} for _ in texts]
+
+        docs = self.nlp.pipe(
+            texts,
+            n_process=n_process or self.n_process,
+            batch_size=batch_size or self.batch_size)
+        return [self._collect_entities(doc) for doc in docs]
+
+
+_default_extractor = EntityExtractor()
+
+
+def configure_extractor(**kwargs):
+    # Varsayılan çıkarıcıyı yeni ayarlarla değiştirir (model yine ilk kullanımda yüklenir)
+    global _default_extractor
+    _default_extractor = EntityExtractor(**kwargs)
+    return _default_extractor
+
+
+def get_extractor():
+    return _default_extractor
 
 
 def extract_entities(text):
-    if nlp is None:
-        logger.error("No language model available. Cannot extract entities.")
-        return {}
-
-    doc = nlp(text)
-    entities = {
-        "DATE": [],
-        "TIME": [],
-        "PERSON": [],
-        "ORG": [],
-    }
-
-    for ent in doc.ents:
-        if ent.label_ in entities:
-            entities[ent.label_].append(ent.text)
-
-    return entities
+    return _default_extractor.extract(text)
+
+
+def extract_entities_batch(texts, n_process=None, batch_size=None):
+    return _default_extractor.extract_batch(texts, n_process=n_process, batch_size=batch_size)
@@ -0,0 +1,106 @@
+# nlp/src/utils/fast_entities.py
+import re
+
+# Türkçe ay ve gün adları (küçük harf)
+MONTHS = {
+    "ocak": 1, "şubat": 2, "mart": 3, "nisan": 4, "mayıs": 5, "haziran": 6,
+    "temmuz": 7, "ağustos": 8, "eylül": 9, "ekim": 10, "kasım": 11, "aralık": 12,
+}
+WEEKDAYS = {
+    "pazartesi": 0, "salı": 1, "çarşamba": 2, "perşembe": 3,
+    "cuma": 4, "cumartesi": 5, "pazar": 6,
+}
+RELATIVE_DAYS = {
+    "bugün": 0, "yarın": 1, "öbür gün": 2, "ertesi gün": 2,
+}
+NUMBER_WORDS = {
+    "bir": 1, "iki": 2, "üç": 3, "dört": 4, "beş": 5,
+    "altı": 6, "yedi": 7, "sekiz": 8, "dokuz": 9, "on": 10,
+}
+# Bileşik sayılar onlar + birler olarak yazılır: "on iki", "yirmi beş"
+TENS_WORDS = {
+    "on": 10, "yirmi": 20, "otuz": 30, "kırk": 40, "elli": 50,
+    "altmış": 60, "yetmiş": 70, "seksen": 80, "doksan": 90,
+}
+DURATION_UNITS = ("saat", "dakika", "dk", "gün", "hafta", "ay")
+# Tek harfli birimler yalnızca rakama bitişik yazıldığında süredir ("2h", "30m");
+# "2 m kablo" bir uzunluktur
+SHORT_DURATION_UNITS = ("h", "m")
+
+FAST_ENTITY_LABELS = ("DATE", "TIME", "DURATION")
+
+
+def word_alternation(words):
+    # Uzun kelimeler önce denenir ("cumartesi" "cuma"dan önce)
+    return "|".join(re.escape(w) for w in sorted(words, key=len, reverse=True))
+
+
+_MONTH = word_alternation(MONTHS)
+_WEEKDAY = word_alternation(WEEKDAYS)
+_ONES = word_alternation(word for word, number in NUMBER_WORDS.items() if number < 10)
+_TENS = word_alternation(TENS_WORDS)
+# Yazıyla sayı: "on iki", "yirmi", "beş"; değeri kelimelerin toplamıdır
+NUMBER_PHRASE = rf"(?:(?:{_TENS})\s+(?:{_ONES})|{_TENS}|{_ONES})"
+# Harf gelmemeli: "2h" süre, "2hafta" değil
+_WORD_END = r"(?![^\W\d_])"
+# Türkçe hal ekleri: "Pazartesi'den", "yarından", "15 Temmuz'da"
+CASE_SUFFIXES = ("ndan", "nden", "dan", "den", "tan", "ten", "nda", "nde", "da", "de", "ta", "te",
+                 "ya", "ye", "yı", "yi", "ki", "nin", "nın", "nun", "nün", "ın", "in", "un", "ün",
+                 "yu", "yü", "a", "e", "ı", "i", "u", "ü")
+_SUFFIX = rf"(?:'?(?:{'|'.join(CASE_SUFFIXES)}))?\b"
+
+_UNIT = word_alternation(DURATION_UNITS)
+
+_ENTITY_PATTERN = re.compile(
+    rf"""
+    (?P<DATE>
+        \b\d{{1,2}}[./]\d{{1,2}}[./]\d{{4}}\b
+      | \b\d{{4}}-\d{{1,2}}-\d{{1,2}}\b
+      | \b\d{{1,2}}\s+(?:{_MONTH}){_SUFFIX}(?:\s+\d{{4}}{_SUFFIX})?
+      | \b(?:(?:haftaya|gelecek\s+hafta|önümüzdeki|gelecek|bu)\s+)?(?:{_WEEKDAY}){_SUFFIX}(?:\s+gün{_SUFFIX})?
+      | \b(?:{word_alternation(RELATIVE_DAYS)}){_SUFFIX}
+      | \b(?:haftaya|gelecek\s+hafta|önümüzdeki\s+hafta|bu\s+hafta|gelecek\s+ay|önümüzdeki\s+ay)\b
+        # "3 gün sonra" normalize_date'te göreli bir tarihtir, süre değil
+      | \b(?<![\d.,])(?:\d{{1,3}}|{NUMBER_PHRASE})\s+(?:gün|hafta)\s+sonra\b
+    )
+  | (?P<TIME>
+        \b(?:[01]?\d|2[0-3])[:.][0-5]\d(?:\s*[ap]m\b)?
+        # "1.50 saat" ondalıklı bir süredir, saat değil
+        (?!\d|\s*(?:saat|dakika|dk)(?:lik|lık|luk|lük)?\b)
+    )
+  | (?P<DURATION>
+        \b(?<![\d.,])
+        (?:\d+(?:[.,]\d+)?(?:(?:{word_alternation(SHORT_DURATION_UNITS)})(?=l[ıiuü]k|{_WORD_END})|\s*(?:buçuk\s+)?(?:{_UNIT}))
+          | (?:{NUMBER_PHRASE}|yarım)\s+(?:buçuk\s+)?(?:{_UNIT}))
+        (?:lik|lık|luk|lük)?\b
+    )
+    """,
+    re.VERBOSE,
+)
+
+
+def turkish_lower(text):
+    # str.lower() "İ" harfini iki karaktere çevirir; uzunluğu koruyarak küçült
+    return text.replace("İ", "i").replace("I", "ı").lower()
+
+
+def find_entity_spans(text):
+    """
+    Metni tek geçişte tarar ve (etiket, başlangıç, bitiş) listesi döndürür.
+    Eşleştirme küçük harfe çevrilmiş metin üzerinde yapılır; indeksler
+    orijinal metinle aynıdır.
+    """
+    return [(match.lastgroup, match.start(), match.end())
+            for match in _ENTITY_PATTERN.finditer(turkish_lower(text))]
+
+
+def extract_fast_entities(text):
+    """
+    DATE, TIME ve DURATION entity'lerini spaCy çalıştırmadan çıkarır.
+    Örnek: 'Yarın 14:30'da 2 saat izin' ->
+    {'DATE': ['Yarın'], 'TIME': ['14:30'], 'DURATION': ['2 saat']}
+    """
+    entities = {label: [] for label in FAST_ENTITY_LABELS}
+    for label, start, end in find_entity_spans(text):
+        entities[label].append(text[start:end])
+    return entities
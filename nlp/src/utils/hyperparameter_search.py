@@ -0,0 +1,193 @@
+# nlp/src/utils/hyperparameter_search.py
+import json
+import logging
+import math
+import os
+import torch
+from sklearn.model_selection import ParameterGrid
+from transformers import DistilBertForSequenceClassification
+
+from nlp.src.utils.dataset_cache import TokenizedIntentDataset, get_tokenized_arrays
+from nlp.src.utils.length_bucketing import make_intent_dataloader
+from nlp.src.utils.model_utils import evaluate_model, train_one_epoch
+from nlp.src.utils.parallel_training import (
+    build_worker_model, create_training_pool, default_threads_per_worker,
+    share_tokenized_arrays, shared_model_state, worker_arrays, worker_state)
+
+logger = logging.getLogger(__name__)
+
+BASE_MODEL_NAME = 'distilbert-base-multilingual-cased'
+TRIAL_LOG_NAME = 'trials.jsonl'
+
+
+def rung_budgets(max_epochs, eta, min_epochs):
+    # Successive halving basamakları: min_epochs, min_epochs*eta, ... , max_epochs
+    budgets = []
+    budget = min_epochs
+    while budget < max_epochs:
+        budgets.append(budget)
+        budget *= eta
+    budgets.append(max_epochs)
+    return budgets
+
+
+def _run_trial(trial_id, params, epochs, checkpoint_path, seed):
+    """
+    Worker sürecinde çalışır. Varsa denemenin checkpoint'inden devam eder,
+    toplam epochs sayısına kadar eğitir, doğrulama doğruluğunu döndürür.
+    """
+    state = worker_state()
+    device = torch.device('cpu')
+    torch.manual_seed(seed + trial_id)
+
+    arrays = worker_arrays()
+    n_train = state['n_train']
+    labels = state['labels']
+    train_dataset = TokenizedIntentDataset(
+        arrays, labels, indices=range(n_train))
+    val_dataset = TokenizedIntentDataset(
+        arrays, labels, indices=range(n_train, len(labels)))
+
+    model = build_worker_model(device)
+    optimizer = torch.optim.AdamW(
+        model.parameters(), lr=params['learning_rate'])
+    completed = 0
+    if os.path.exists(checkpoint_path):
+        checkpoint = torch.load(checkpoint_path, map_location=device)
+        model.load_state_dict(checkpoint['model'])
+        optimizer.load_state_dict(checkpoint['optimizer'])
+        completed = checkpoint['epochs']
+
+    train_loader = make_intent_dataloader(
+        train_dataset, batch_size=params['batch_size'], shuffle=True,
+        bucketed=state['bucketed'], seed=seed + trial_id * 1000 + completed)
+    for _ in range(completed, epochs):
+        train_one_epoch(model, train_loader, optimizer, device)
+
+    torch.save({'model': model.state_dict(), 'optimizer': optimizer.state_dict(), 'epochs': epochs},
+               checkpoint_path)
+
+    val_loader = make_intent_dataloader(
+        val_dataset, batch_size=16, shuffle=False, bucketed=state['bucketed'])
+    return evaluate_model(model, val_loader, device)
+
+
+class SuccessiveHalvingSearch:
+    """
+    Grid konfigürasyonlarını süreç havuzunda paralel eğitir ve her basamakta
+    yalnızca en iyi 1/eta kadarını bir sonraki epoch bütçesine taşır.
+    Her sonuç work_dir/trials.jsonl dosyasına yazılır; yarıda kalan bir arama
+    aynı work_dir ile yeniden başlatıldığında tamamlanmış denemeleri atlar.
+    """
+
+    def __init__(self, param_grid, work_dir, n_workers=4, threads_per_worker=None, eta=3, min_epochs=1,
+                 seed=42, bucketed=True, base_model_name=BASE_MODEL_NAME):
+        self.param_grid = param_grid
+        self.work_dir = work_dir
+        self.n_workers = n_workers
+        self.threads_per_worker = threads_per_worker or default_threads_per_worker(
+            n_workers)
+        self.eta = eta
+        self.min_epochs = min_epochs
+        self.seed = seed
+        self.bucketed = bucketed
+        self.base_model_name = base_model_name
+        self.log_path = os.path.join(work_dir, TRIAL_LOG_NAME)
+
+    def _load_log(self):
+        results = {}
+        if not os.path.exists(self.log_path):
+            return results
+        with open(self.log_path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # Süreç yazarken öldüyse son satır yarım kalmış olabilir
+                    continue
+                results[(entry['trial'], entry['rung'])] = entry['accuracy']
+        return results
+
+    def _append_log(self, entry):
+        with open(self.log_path, 'a') as f:
+            f.write(json.dumps(entry) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _checkpoint_path(self, trial_id):
+        return os.path.join(self.work_dir, f'trial_{trial_id}.pt')
+
+    def run(self, X_train, y_train, X_val, y_val, tokenizer, num_labels):
+        os.makedirs(self.work_dir, exist_ok=True)
+        trials = list(ParameterGrid(self.param_grid))
+        completed = self._load_log()
+        if completed:
+            logger.info(
+                f"Resuming search from {self.log_path} ({len(completed)} completed trial rungs)")
+
+        # Veri bir kez tokenize edilir, temel ağırlıklar bir kez yüklenir
+        arrays = get_tokenized_arrays(list(X_train) + list(X_val), tokenizer)
+        base_model = DistilBertForSequenceClassification.from_pretrained(
+            self.base_model_name, num_labels=num_labels)
+        shared = {
+            'arrays': share_tokenized_arrays(arrays),
+            'labels': list(y_train) + list(y_val),
+            'n_train': len(X_train),
+            'bucketed': self.bucketed,
+            'base_model': shared_model_state(base_model),
+        }
+        del base_model
+
+        max_epochs = max(params['num_epochs'] for params in trials)
+        budgets = rung_budgets(max_epochs, self.eta, self.min_epochs)
+        active = list(range(len(trials)))
+        # Yalnızca kendi num_epochs bütçesini tamamlamış denemeler en iyi seçilebilir
+        finished = {}
+
+        with create_training_pool(self.n_workers, self.threads_per_worker, shared) as pool:
+            for rung, budget in enumerate(budgets):
+                if not active:
+                    break
+
+                scores = {}
+                futures = {}
+                for trial_id in active:
+                    if (trial_id, rung) in completed:
+                        scores[trial_id] = completed[(trial_id, rung)]
+                        continue
+                    epochs = min(budget, trials[trial_id]['num_epochs'])
+                    futures[trial_id] = pool.submit(
+                        _run_trial, trial_id, trials[trial_id], epochs,
+                        self._checkpoint_path(trial_id), self.seed)
+
+                for trial_id, future in futures.items():
+                    accuracy = future.result()
+                    scores[trial_id] = accuracy
+                    epochs = min(budget, trials[trial_id]['num_epochs'])
+                    self._append_log({'trial': trial_id, 'rung': rung, 'epochs': epochs,
+                                      'params': trials[trial_id], 'accuracy': accuracy})
+                    logger.info(
+                        f"Rung {rung} ({epochs} epochs) trial {trial_id} {trials[trial_id]}: {accuracy:.4f}")
+
+                for trial_id in active:
+                    if trials[trial_id]['num_epochs'] <= budget:
+                        finished[trial_id] = scores[trial_id]
+
+                # En iyi 1/eta bir sonraki basamağa geçer; bütçesi dolmuş olanlar
+                # sıralamada yer alır ama daha fazla eğitilmez
+                ranked = sorted(active, key=lambda t: scores[t], reverse=True)
+                keep = max(1, math.ceil(len(ranked) / self.eta))
+                for trial_id in ranked[keep:]:
+                    finished.pop(trial_id, None)
+                for trial_id in ranked[keep:] + [t for t in ranked[:keep] if t in finished]:
+                    if os.path.exists(self._checkpoint_path(trial_id)):
+                        os.remove(self._checkpoint_path(trial_id))
+                active = [t for t in ranked[:keep] if t not in finished]
+
+        best_trial = max(finished, key=lambda t: finished[t])
+        logger.info(
+            f"Best parameters: {trials[best_trial]} (validation accuracy {finished[best_trial]:.4f})")
+        return trials[best_trial], finished[best_trial]
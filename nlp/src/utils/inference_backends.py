@@ -0,0 +1,186 @@
+# nlp/src/utils/inference_backends.py
+import os
+import logging
+import numpy as np
+import torch
+from transformers import BertConfig, BertForSequenceClassification
+
+from nlp.src.utils.early_exit import EarlyExitHeads, early_exit_forward, heads_path
+from nlp.src.utils.mmap_weights import load_model_mmap
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_NAME = "model.onnx"
+QUANTIZED_STATE_DICT_NAME = "quantized_state_dict.pt"
+# quantization.py'nin varsayılan çıktı dizini: fp32 model dizininin yanında
+QUANTIZED_DIR_SUFFIX = "_int8"
+
+
+def quantize_model(model):
+    # Linear katmanların ağırlıkları int8'e çevrilir, aktivasyonlar çalışma anında ölçeklenir
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def default_quantized_path(model_path):
+    return os.path.normpath(model_path) + QUANTIZED_DIR_SUFFIX
+
+
+def load_quantized_model(model_path):
+    """
+    quantization.py ile kaydedilen int8 modeli yükler. Dizinde kayıtlı
+    quantized state dict yoksa fp32 model yüklenip anında quantize edilir.
+    """
+    state_dict_path = os.path.join(model_path, QUANTIZED_STATE_DICT_NAME)
+    if not os.path.exists(state_dict_path):
+        logger.info(
+            f"No quantized artifact in {model_path}, quantizing fp32 model on load")
+        model = BertForSequenceClassification.from_pretrained(model_path)
+        model.eval()
+        return quantize_model(model)
+
+    config = BertConfig.from_pretrained(model_path)
+    model = quantize_model(BertForSequenceClassification(config).eval())
+    model.load_state_dict(torch.load(state_dict_path, map_location="cpu"))
+    model.eval()
+    return model
+
+
+class TorchBackend:
+    """
+    PyTorch (eager) intent sınıflandırma backend'i.
+    """
+    name = "torch"
+
+    def __init__(self, model_path, device, intra_op_threads=None, mmap_weights=False, **_):
+        self.device = device
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+
+        model = None
+        if mmap_weights and device.type == "cpu":
+            # Fork edilen worker'lar aynı ağırlık sayfalarını paylaşır
+            model = load_model_mmap(BertForSequenceClassification, model_path)
+            if model is None:
+                logger.info(
+                    f"Could not memory-map weights in {model_path}, falling back to from_pretrained")
+        if model is None:
+            model = BertForSequenceClassification.from_pretrained(model_path)
+        self.model = model.to(self.device)
+        self.model.eval()
+
+    def logits(self, inputs):
+        # inputs: isim -> numpy dizisi (batch, sequence)
+        tensors = {name: torch.from_numpy(values).to(self.device)
+                   for name, values in inputs.items()}
+        with torch.no_grad():
+            outputs = self.model(**tensors)
+        return outputs.logits.cpu().numpy()
+
+
+class QuantizedTorchBackend(TorchBackend):
+    """
+    Linear katmanları dinamik int8 quantize edilmiş PyTorch backend'i (yalnızca CPU).
+    int8 artifact sırasıyla quantized_path'te (NLP_QUANTIZED_MODEL), model
+    dizininin yanındaki "<model>_int8" dizininde ve model dizininde aranır.
+    """
+    name = "torch_int8"
+
+    def __init__(self, model_path, device, quantized_path=None, intra_op_threads=None, **_):
+        self.device = torch.device("cpu")
+        if intra_op_threads:
+            torch.set_num_threads(intra_op_threads)
+        if quantized_path is not None:
+            if not os.path.exists(os.path.join(quantized_path, QUANTIZED_STATE_DICT_NAME)):
+                raise FileNotFoundError(
+                    f"Quantized model not found: {quantized_path}. Run quantization.py first.")
+        elif os.path.exists(os.path.join(default_quantized_path(model_path), QUANTIZED_STATE_DICT_NAME)):
+            quantized_path = default_quantized_path(model_path)
+        else:
+            quantized_path = model_path
+        self.model = load_quantized_model(quantized_path)
+        logger.info(f"Loaded int8 model from {quantized_path}")
+
+
+class EarlyExitBackend(TorchBackend):
+    """
+    Ara katman başlıklarıyla erken çıkış yapan PyTorch backend'i.
+    Başlıklar model_training.py --task early_exit ile eğitilir.
+    """
+    name = "early_exit"
+
+    def __init__(self, model_path, device, exit_threshold=0.9, exit_criterion="confidence", **options):
+        super().__init__(model_path, device, **options)
+        self.heads = EarlyExitHeads.load(heads_path(model_path), map_location=self.device).to(self.device)
+        self.exit_threshold = exit_threshold
+        self.exit_criterion = exit_criterion
+        logger.info(
+            f"Early exit heads on layers {self.heads.exit_layers}, "
+            f"{exit_criterion} threshold {exit_threshold}")
+
+    def logits_with_exits(self, inputs):
+        # Dönüş: (logits, örnek başına 1 tabanlı çıkış katmanı)
+        tensors = {name: torch.from_numpy(values).to(self.device)
+                   for name, values in inputs.items()}
+        logits, exit_layers = early_exit_forward(
+            self.model, self.heads, tensors["input_ids"], tensors["attention_mask"],
+            threshold=self.exit_threshold, criterion=self.exit_criterion,
+            token_type_ids=tensors.get("token_type_ids"))
+        return logits.cpu().numpy(), exit_layers.numpy()
+
+    def logits(self, inputs):
+        return self.logits_with_exits(inputs)[0]
+
+
+class OnnxBackend:
+    """
+    onnx_export.py ile dışa aktarılan modeli onnxruntime üzerinde çalıştırır.
+    """
+    name = "onnx"
+
+    def __init__(self, model_path, device=None, onnx_path=None, intra_op_threads=None, inter_op_threads=None,
+                 providers=("CPUExecutionProvider",), **_):
+        import onnxruntime as ort
+
+        onnx_path = onnx_path or os.path.join(model_path, ONNX_MODEL_NAME)
+        if not os.path.exists(onnx_path):
+            raise FileNotFoundError(
+                f"ONNX model not found: {onnx_path}. Run onnx_export.py first.")
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+
+        self.session = ort.InferenceSession(
+            onnx_path, sess_options=options, providers=list(providers))
+        self.input_names = [i.name for i in self.session.get_inputs()]
+        logger.info(f"Loaded ONNX model from {onnx_path}")
+
+    def logits(self, inputs):
+        feed = {name: inputs[name].astype(np.int64)
+                for name in self.input_names if name in inputs}
+        return self.session.run(["logits"], feed)[0]
+
+
+BACKENDS = {
+    TorchBackend.name: TorchBackend,
+    QuantizedTorchBackend.name: QuantizedTorchBackend,
+    OnnxBackend.name: OnnxBackend,
+    EarlyExitBackend.name: EarlyExitBackend,
+}
+
+
+def create_backend(name, model_path, device, **options):
+    if name not in BACKENDS:
+        raise ValueError(
+            f"Unknown inference backend: {name}. Available: {sorted(BACKENDS)}")
+    return BACKENDS[name](model_path, device, **options)
+
+
+def softmax(logits):
+    shifted = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(shifted)
+    return exp / exp.sum(axis=-1, keepdims=True)
@@ -1,8 +1,10 @@
 # nlp/src/utils/intent_recognition.py
 from transformers import DistilBertForSequenceClassification, AutoTokenizer
 import torch
-from torch.utils.data import Dataset, DataLoader
+from torch.utils.data import Dataset
 import nlpaug.augmenter.word as naw
+from nlp.src.utils.dataset_cache import build_intent_dataset
+from nlp.src.utils.length_bucketing import make_intent_dataloader, TokenThroughputMeter
 
 
 class IntentDataset(Dataset):
@@ -55,9 +57,11 @@ def augment_data(texts, labels, num_aug=1):
     return augmented_texts, augmented_labels
 
 
-def train_intent_model(texts, labels, tokenizer, device, num_labels):
-    dataset = IntentDataset(texts, labels, tokenizer)
-    dataloader = DataLoader(dataset, batch_size=16, shuffle=True)
+def train_intent_model(texts, labels, tokenizer, device, num_labels, bucketed=True):
+    dataset = build_intent_dataset(texts, labels, tokenizer)
+    dataloader = make_intent_dataloader(
+        dataset, batch_size=16, shuffle=True, bucketed=bucketed)
+    meter = TokenThroughputMeter()
 
     model = DistilBertForSequenceClassification.from_pretrained(
         'dbmdz/distilbert-base-turkish-cased', num_labels=num_labels)
@@ -67,7 +71,9 @@ def train_intent_model(texts, labels, tokenizer, device, num_labels):
 
     for epoch in range(5):  # 5 epoch eğitim
         model.train()
+        meter.reset()
         for batch in dataloader:
+            meter.update(batch)
             optimizer.zero_grad()
             input_ids = batch['input_ids'].to(device)
             attention_mask = batch['attention_mask'].to(device)
@@ -77,6 +83,7 @@ def train_intent_model(texts, labels, tokenizer, device, num_labels):
             loss = outputs.loss
             loss.backward()
             optimizer.step()
+        meter.log(f"Epoch {epoch + 1}")
 
     return model
 
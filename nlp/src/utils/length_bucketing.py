@@ -0,0 +1,133 @@
+# nlp/src/utils/length_bucketing.py
+import logging
+import time
+import numpy as np
+import torch
+from torch.utils.data import DataLoader, Sampler
+
+logger = logging.getLogger(__name__)
+
+PADDED_KEYS = ('input_ids', 'attention_mask')
+
+
+class LengthBucketBatchSampler(Sampler):
+    """
+    Benzer uzunluktaki örnekleri aynı batch'e koyar.
+    Her epoch'ta indeksler karıştırılır, batch_size * bucket_multiplier
+    büyüklüğündeki havuzlar kendi içinde uzunluğa göre sıralanıp batch'lere
+    bölünür ve batch sırası yeniden karıştırılır.
+    """
+
+    def __init__(self, lengths, batch_size, shuffle=True, bucket_multiplier=50, drop_last=False, seed=None):
+        self.lengths = np.asarray(lengths)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.bucket_multiplier = bucket_multiplier
+        self.drop_last = drop_last
+        self._rng = np.random.default_rng(seed)
+
+    def _batches(self):
+        if not self.shuffle:
+            # Değerlendirmede karıştırmaya gerek yok: tümü uzunluğa göre sıralanır
+            order = np.argsort(self.lengths, kind='stable')
+            return [order[i:i + self.batch_size] for i in range(0, len(order), self.batch_size)]
+
+        order = self._rng.permutation(len(self.lengths))
+        pool_size = self.batch_size * self.bucket_multiplier
+        batches = []
+        for start in range(0, len(order), pool_size):
+            pool = order[start:start + pool_size]
+            pool = pool[np.argsort(self.lengths[pool], kind='stable')]
+            batches.extend(pool[i:i + self.batch_size]
+                           for i in range(0, len(pool), self.batch_size))
+        self._rng.shuffle(batches)
+        return batches
+
+    def __iter__(self):
+        for batch in self._batches():
+            if self.drop_last and len(batch) < self.batch_size:
+                continue
+            yield batch.tolist()
+
+    def __len__(self):
+        if self.drop_last:
+            return len(self.lengths) // self.batch_size
+        return (len(self.lengths) + self.batch_size - 1) // self.batch_size
+
+
+def dynamic_padding_collate(batch):
+    """
+    Batch'i yalnızca kendi en uzun dizisine kadar doldurur.
+    Girdi örnekleri sabit uzunlukta doldurulmuş olabilir; fazla sütunlar kırpılır.
+    """
+    collated = {}
+    for key in batch[0]:
+        values = [item[key] for item in batch]
+        if isinstance(values[0], torch.Tensor):
+            collated[key] = torch.stack(values)
+        else:
+            collated[key] = values
+
+    max_length = int(collated['attention_mask'].sum(dim=1).max())
+    for key in PADDED_KEYS:
+        if key in collated:
+            collated[key] = collated[key][:, :max_length]
+    return collated
+
+
+def dataset_lengths(dataset):
+    if hasattr(dataset, 'lengths'):
+        return dataset.lengths()
+    # Önceden hesaplanmış uzunluk yoksa attention mask'ten çıkarılır
+    return [int(dataset[i]['attention_mask'].sum()) for i in range(len(dataset))]
+
+
+def make_intent_dataloader(dataset, batch_size, shuffle, bucketed=True, seed=None):
+    if not bucketed:
+        return DataLoader(dataset, batch_size=batch_size, shuffle=shuffle, collate_fn=dynamic_padding_collate)
+    sampler = LengthBucketBatchSampler(
+        dataset_lengths(dataset), batch_size, shuffle=shuffle, seed=seed)
+    return DataLoader(dataset, batch_sampler=sampler, collate_fn=dynamic_padding_collate)
+
+
+class TokenThroughputMeter:
+    """
+    Eğitim/değerlendirme döngüsünde işlenen token sayısını ölçer.
+    full_length, sabit uzunluk padding'inde (ör. 128) işlenecek token sayısını
+    hesaplamak için kullanılır; böylece dinamik padding kazancı raporlanır.
+    """
+
+    def __init__(self, full_length=128):
+        self.full_length = full_length
+        self.reset()
+
+    def reset(self):
+        self.real_tokens = 0
+        self.padded_tokens = 0
+        self.full_length_tokens = 0
+        self._start = time.perf_counter()
+
+    def update(self, batch):
+        attention_mask = batch['attention_mask']
+        self.real_tokens += int(attention_mask.sum())
+        self.padded_tokens += attention_mask.numel()
+        self.full_length_tokens += attention_mask.shape[0] * self.full_length
+
+    def summary(self):
+        elapsed = time.perf_counter() - self._start
+        return {
+            "seconds": elapsed,
+            "tokens_per_second": self.padded_tokens / elapsed if elapsed else 0.0,
+            "real_tokens_per_second": self.real_tokens / elapsed if elapsed else 0.0,
+            "padding_ratio": 1 - self.real_tokens / self.padded_tokens if self.padded_tokens else 0.0,
+            # Sabit uzunluk padding'ine göre kaç kat daha az token işlendiği
+            "token_reduction": self.full_length_tokens / self.padded_tokens if self.padded_tokens else 1.0,
+        }
+
+    def log(self, label):
+        stats = self.summary()
+        logger.info(
+            f"{label}: {stats['real_tokens_per_second']:.0f} real tokens/s, "
+            f"padding {stats['padding_ratio']:.1%}, "
+            f"{stats['token_reduction']:.2f}x fewer tokens than fixed {self.full_length}-token padding")
+        return stats
@@ -0,0 +1,110 @@
+# nlp/src/utils/lexical_classifier.py
+import logging
+import pickle
+import time
+import numpy as np
+from sklearn.calibration import CalibratedClassifierCV
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.pipeline import FeatureUnion, make_pipeline
+from sklearn.svm import LinearSVC
+
+from nlp.src.utils.fast_entities import turkish_lower
+
+logger = logging.getLogger(__name__)
+
+# Intent model dizininde BERT ağırlıklarının yanına kaydedilir
+LEXICAL_MODEL_NAME = 'lexical_intent.pkl'
+DEFAULT_THRESHOLDS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.95, 0.99)
+
+
+class LexicalIntentClassifier:
+    """
+    Karakter n-gram + kelime TF-IDF özellikleri üzerinde doğrusal SVM.
+    Olasılıklar sigmoid kalibrasyonu ile elde edilir; böylece güven eşiği
+    BERT'e düşülüp düşülmeyeceğine karar vermek için kullanılabilir.
+    """
+
+    def __init__(self, char_ngrams=(2, 5), word_ngrams=(1, 2), C=1.0, calibration_folds=3):
+        features = FeatureUnion([
+            ("char", TfidfVectorizer(analyzer="char_wb", ngram_range=char_ngrams,
+                                     preprocessor=turkish_lower, sublinear_tf=True)),
+            ("word", TfidfVectorizer(analyzer="word", ngram_range=word_ngrams,
+                                     preprocessor=turkish_lower, sublinear_tf=True)),
+        ])
+        self.pipeline = make_pipeline(features, CalibratedClassifierCV(
+            LinearSVC(C=C), method="sigmoid", cv=calibration_folds))
+
+    @property
+    def classes_(self):
+        return self.pipeline.classes_
+
+    def fit(self, texts, intents):
+        self.pipeline.fit(list(texts), list(intents))
+        return self
+
+    def predict(self, texts):
+        probabilities = self.pipeline.predict_proba(list(texts))
+        best = probabilities.argmax(axis=1)
+        return self.classes_[best], probabilities[np.arange(len(best)), best]
+
+    def predict_one(self, text):
+        intents, confidences = self.predict([text])
+        return intents[0], float(confidences[0])
+
+    def save(self, path):
+        with open(path, 'wb') as f:
+            pickle.dump(self, f)
+        logger.info(f"Lexical intent model saved to {path}")
+
+    @staticmethod
+    def load(path):
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+
+def lexical_latency_ms(classifier, texts):
+    # Tek mesajlık çağrıların ortalama süresi (Chatbot'taki kullanım şekli)
+    start = time.perf_counter()
+    for text in texts:
+        classifier.predict_one(text)
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+
+def evaluate_cascade(classifier, texts, labels, bert_intents, bert_ms_per_message,
+                     thresholds=DEFAULT_THRESHOLDS):
+    """
+    Her eşik için BERT'e düşen mesaj oranı, kaskad doğruluğu ve yalnız BERT'e
+    göre farkı ile mesaj başına tahmini gecikme kazancını raporlar.
+    bert_intents: aynı metinler için BERT tahminleri (etiket adı olarak).
+    """
+    labels = np.asarray(labels)
+    bert_intents = np.asarray(bert_intents)
+    lexical_intents, confidences = classifier.predict(texts)
+    lexical_ms = lexical_latency_ms(classifier, texts)
+    bert_accuracy = float((bert_intents == labels).mean())
+
+    report = {
+        "bert_accuracy": bert_accuracy,
+        "lexical_accuracy": float((lexical_intents == labels).mean()),
+        "bert_ms_per_message": bert_ms_per_message,
+        "lexical_ms_per_message": lexical_ms,
+        "thresholds": [],
+    }
+    for threshold in thresholds:
+        confident = confidences >= threshold
+        cascade_intents = np.where(confident, lexical_intents, bert_intents)
+        fall_through = float(1 - confident.mean())
+        accuracy = float((cascade_intents == labels).mean())
+        report["thresholds"].append({
+            "threshold": threshold,
+            "fall_through_rate": fall_through,
+            "accuracy": accuracy,
+            "accuracy_diff_vs_bert": accuracy - bert_accuracy,
+            # Lexical model her mesajda çalışır, BERT yalnızca düşenlerde
+            "ms_per_message": lexical_ms + fall_through * bert_ms_per_message,
+            "ms_saved_per_message": bert_ms_per_message - (lexical_ms + fall_through * bert_ms_per_message),
+        })
+        logger.info(
+            f"Cascade threshold {threshold}: fall-through {fall_through:.1%}, "
+            f"accuracy {accuracy:.4f} ({accuracy - bert_accuracy:+.4f} vs BERT)")
+    return report
@@ -0,0 +1,214 @@
+# nlp/src/utils/metrics.py
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+
+# Aşama süreleri için saniye cinsinden kova sınırları (0.1 ms - 5 s)
+LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+                   0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+CONFIDENCE_BUCKETS = (0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 0.95, 0.99, 1.0)
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        if len(labels) != len(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {labels}")
+        return tuple(labels)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}",
+                 f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+            lines.extend(self._render_samples(items))
+        return lines
+
+    def _render_samples(self, items):
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+                for labels, value in items]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, *labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+class Histogram(_Metric):
+    """
+    Sabit kovalı histogram. Her gözlem bir kilit ve bir ikili arama maliyetindedir;
+    kova sayaçları kümülatif değil, render sırasında toplanır.
+    """
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def snapshot(self, *labels):
+        # Kümülatif olmayan kova sayaçları, toplam ve gözlem sayısı
+        with self._lock:
+            state = self._values.get(self._key(labels))
+            if state is None:
+                return {"buckets": [0] * (len(self.buckets) + 1), "sum": 0.0, "count": 0}
+            return {"buckets": list(state[0]), "sum": state[1], "count": state[2]}
+
+    def totals(self):
+        # Etiket değerleri -> (toplam, gözlem sayısı)
+        with self._lock:
+            return {labels: (state[1], state[2]) for labels, state in self._values.items()}
+
+    def _render_samples(self, items):
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                le = _format_labels(self.labelnames, labels, [("le", _format_value(bound))])
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            suffix = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labelnames=()):
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        # Prometheus metin formatı (text/plain; version=0.0.4)
+        with self._lock:
+            metrics = list(self._metrics)
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+STAGE_LATENCY = REGISTRY.histogram(
+    "nlp_stage_latency_seconds", "Latency of each Chatbot pipeline stage", ("stage",))
+REQUEST_LATENCY = REGISTRY.histogram(
+    "nlp_request_latency_seconds", "End-to-end latency of process_message", ())
+INTENT_REQUESTS = REGISTRY.counter(
+    "nlp_intent_requests_total", "Messages processed per predicted intent", ("intent",))
+INTENT_CONFIDENCE = REGISTRY.histogram(
+    "nlp_intent_confidence", "Confidence of the predicted intent", ("intent",),
+    buckets=CONFIDENCE_BUCKETS)
+BATCH_SIZE = REGISTRY.histogram(
+    "nlp_forward_batch_size", "Number of texts per model forward pass", (),
+    buckets=BATCH_SIZE_BUCKETS)
+CASCADE_DECISIONS = REGISTRY.counter(
+    "nlp_cascade_decisions_total", "Messages answered by the lexical model or passed to BERT", ("path",))
+EXIT_LAYER = REGISTRY.histogram(
+    "nlp_early_exit_layer", "Encoder layer at which early-exit inference stopped", (),
+    buckets=tuple(range(1, 13)))
+RESPONSE_FIRST_TOKEN = REGISTRY.histogram(
+    "nlp_response_first_token_seconds", "Time from generation start to the first streamed token", ())
+RESPONSE_TOKENS = REGISTRY.histogram(
+    "nlp_response_generated_tokens", "Tokens generated per model response", (),
+    buckets=(1, 4, 8, 16, 32, 64, 128, 256))
+RESPONSE_SOURCE = REGISTRY.counter(
+    "nlp_responses_total", "Responses by source (model or template) and fallback reason", ("source", "reason"))
+MODEL_INFO = REGISTRY.gauge(
+    "nlp_model_info", "Currently served model version", ("version", "backend"))
+
+
+# Profil oturumu sırasında aşamaları izde işaretlemek için (ör. torch record_function)
+_stage_annotator = None
+
+
+def set_stage_annotator(annotator):
+    global _stage_annotator
+    _stage_annotator = annotator
+
+
+@contextmanager
+def stage_timer(stage):
+    annotator = _stage_annotator
+    start = time.perf_counter()
+    try:
+        if annotator is None:
+            yield
+        else:
+            with annotator(stage):
+                yield
+    finally:
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage)
+
+
+def record_prediction(intent, confidence):
+    INTENT_REQUESTS.inc(intent)
+    INTENT_CONFIDENCE.observe(confidence, intent)
@@ -0,0 +1,122 @@
+# nlp/src/utils/mmap_weights.py
+import json
+import logging
+import mmap
+import os
+import struct
+import torch
+
+logger = logging.getLogger(__name__)
+
+SAFETENSORS_NAME = "model.safetensors"
+
+_DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def load_safetensors_mmap(path):
+    """
+    Bir safetensors dosyasını kopyalamadan, dosyaya eşlenmiş bellek üzerinde
+    tensörler olarak açar. Eşleme copy-on-write (ACCESS_COPY) olduğu için
+    sayfalar yazılmadıkça aynı dosyayı açan tüm süreçler arasında paylaşılır.
+    """
+    with open(path, 'rb') as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    header_size = struct.unpack("<Q", buffer[:8])[0]
+    header = json.loads(buffer[8:8 + header_size])
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = _DTYPES[info["dtype"]]
+        shape = info["shape"]
+        begin, end = info["data_offsets"]
+        if end == begin:
+            tensors[name] = torch.empty(shape, dtype=dtype)
+            continue
+        numel = (end - begin) // torch.tensor([], dtype=dtype).element_size()
+        tensors[name] = torch.frombuffer(
+            buffer, dtype=dtype, count=numel, offset=data_start + begin).view(shape)
+    return tensors
+
+
+def _optional_keys(model):
+    # Dosyada bulunmayabilecek anahtarlar: buffer'lar (position_ids gibi) ve bağlı (tied) ağırlıklar
+    optional = {name for name, _ in model.named_buffers()}
+    optional.update(getattr(model, "_tied_weights_keys", None) or [])
+    return optional
+
+
+def load_model_mmap(model_class, model_path):
+    """
+    Modeli config'den oluşturur ve ağırlıklarını model.safetensors dosyasından
+    mmap ile bağlar (load_state_dict(assign=True) kopya yapmaz).
+    Dosya yoksa ya da checkpoint modelle uyuşmuyorsa (eksik parametre) None
+    döner; çağıran from_pretrained'e düşer.
+    """
+    weights_path = os.path.join(model_path, SAFETENSORS_NAME)
+    if not os.path.exists(weights_path):
+        return None
+
+    config = model_class.config_class.from_pretrained(model_path)
+    model = model_class(config)
+    state_dict = load_safetensors_mmap(weights_path)
+    missing, unexpected = model.load_state_dict(
+        state_dict, strict=False, assign=True)
+    missing = [key for key in missing if key not in _optional_keys(model)]
+    if missing:
+        # Rastgele başlatılmış ağırlıklarla servis yapılmamalı
+        logger.warning(
+            f"Checkpoint {weights_path} does not match {model_class.__name__} "
+            f"(missing: {missing}, unexpected: {unexpected}); not memory-mapping")
+        return None
+    if unexpected:
+        logger.warning(f"Unexpected keys in {weights_path}: {unexpected}")
+    model.tie_weights()
+    model.eval()
+    logger.info(f"Memory-mapped model weights from {weights_path}")
+    return model
+
+
+def convert_to_safetensors(model_class, model_path):
+    # Eski .bin ağırlıklarını model.safetensors olarak yeniden kaydeder
+    from safetensors.torch import save_file
+
+    model = model_class.from_pretrained(model_path)
+    state_dict = {name: tensor.contiguous()
+                  for name, tensor in model.state_dict().items()}
+    weights_path = os.path.join(model_path, SAFETENSORS_NAME)
+    save_file(state_dict, weights_path, metadata={"format": "pt"})
+    logger.info(f"Saved safetensors weights to {weights_path}")
+    return weights_path
+
+
+if __name__ == "__main__":
+    import argparse
+    from transformers import BertForSequenceClassification
+
+    PROJECT_ROOT = os.path.abspath(os.path.join(
+        os.path.dirname(__file__), '..', '..', '..'))
+
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(
+        description="Write model.safetensors next to a saved intent classifier")
+    parser.add_argument('--model-path', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'models', 'intent_classifier_model'))
+    args = parser.parse_args()
+
+    convert_to_safetensors(BertForSequenceClassification, args.model_path)
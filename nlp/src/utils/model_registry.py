@@ -0,0 +1,185 @@
+# nlp/src/utils/model_registry.py
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+from datetime import datetime, timezone
+
+# Proje kök dizinini belirleme
+PROJECT_ROOT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..'))
+
+DEFAULT_REGISTRY_ROOT = os.path.join(PROJECT_ROOT, 'nlp', 'models', 'registry')
+MANIFEST_NAME = 'manifest.json'
+ACTIVE_NAME = 'ACTIVE'
+MODEL_DIR_NAME = 'intent_classifier_model'
+LABEL_ENCODER_NAME = 'label_encoder.pkl'
+
+logger = logging.getLogger(__name__)
+
+_VERSION_PATTERN = re.compile(r'^v(\d+)$')
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _atomic_write(path, content):
+    directory = os.path.dirname(path)
+    fd, tmp_path = tempfile.mkstemp(dir=directory)
+    with os.fdopen(fd, 'w') as f:
+        f.write(content)
+    os.replace(tmp_path, path)
+
+
+class ModelRegistry:
+    """
+    Diskte sürümlü model deposu.
+    root/
+        v0001/
+            intent_classifier_model/   (tokenizer + ağırlıklar)
+            label_encoder.pkl
+            manifest.json              (metrikler, dosya özetleri)
+        ACTIVE                         (etkin sürüm adı)
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_ROOT):
+        self.root = root
+
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def list_versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        versions = [name for name in os.listdir(self.root)
+                    if _VERSION_PATTERN.match(name)
+                    and os.path.exists(os.path.join(self.root, name, MANIFEST_NAME))]
+        return sorted(versions, key=lambda v: int(_VERSION_PATTERN.match(v).group(1)))
+
+    def _next_version(self):
+        versions = self.list_versions()
+        last = int(_VERSION_PATTERN.match(versions[-1]).group(1)) if versions else 0
+        return f"v{last + 1:04d}"
+
+    def get_manifest(self, version):
+        with open(os.path.join(self.version_dir(version), MANIFEST_NAME), 'r') as f:
+            return json.load(f)
+
+    def paths(self, version):
+        directory = self.version_dir(version)
+        return os.path.join(directory, MODEL_DIR_NAME), os.path.join(directory, LABEL_ENCODER_NAME)
+
+    def register(self, model_path, label_encoder_path, metrics=None, description=None):
+        """
+        Model dizinini ve label encoder'ı yeni bir sürüm olarak kopyalar.
+        Kopyalama geçici dizinde yapılır, manifest yazıldıktan sonra yerine taşınır.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        version = self._next_version()
+        tmp_dir = tempfile.mkdtemp(dir=self.root, prefix='.incoming-')
+        try:
+            shutil.copytree(model_path, os.path.join(tmp_dir, MODEL_DIR_NAME))
+            shutil.copy(label_encoder_path, os.path.join(tmp_dir, LABEL_ENCODER_NAME))
+
+            files = {}
+            for directory, _, names in os.walk(tmp_dir):
+                for name in sorted(names):
+                    path = os.path.join(directory, name)
+                    files[os.path.relpath(path, tmp_dir)] = file_sha256(path)
+
+            manifest = {
+                'version': version,
+                'created_at': datetime.now(timezone.utc).isoformat(),
+                'source': os.path.abspath(model_path),
+                'description': description,
+                'metrics': metrics or {},
+                'files': files,
+            }
+            with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w') as f:
+                json.dump(manifest, f, indent=2)
+            os.replace(tmp_dir, self.version_dir(version))
+        except Exception:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            raise
+
+        logger.info(f"Registered model {model_path} as {version}")
+        return version
+
+    def verify(self, version):
+        # Manifest'teki özetler diskteki dosyalarla uyuşuyor mu
+        manifest = self.get_manifest(version)
+        directory = self.version_dir(version)
+        for relative_path, expected in manifest['files'].items():
+            path = os.path.join(directory, relative_path)
+            if not os.path.exists(path) or file_sha256(path) != expected:
+                logger.error(f"Hash mismatch for {relative_path} in {version}")
+                return False
+        return True
+
+    def active_version(self):
+        # ACTIVE yoksa etkin sürüm yoktur; kayıtlı en yeni sürüm kendiliğinden etkinleşmez
+        path = os.path.join(self.root, ACTIVE_NAME)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return f.read().strip() or None
+
+    def set_active(self, version):
+        if version not in self.list_versions():
+            raise ValueError(f"Unknown model version: {version}")
+        _atomic_write(os.path.join(self.root, ACTIVE_NAME), version + '\n')
+        logger.info(f"Active model version set to {version}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO,
+                        format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Manage the versioned model registry")
+    parser.add_argument('--root', type=str, default=DEFAULT_REGISTRY_ROOT)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    register_parser = subparsers.add_parser('register')
+    register_parser.add_argument('--model-path', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'models', 'intent_classifier_model'))
+    register_parser.add_argument('--label-encoder', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'models', 'label_encoder.pkl'))
+    register_parser.add_argument('--metrics', type=str, default=None,
+                                 help="Path to a JSON file with evaluation metrics")
+    register_parser.add_argument('--description', type=str, default=None)
+    register_parser.add_argument('--activate', action='store_true')
+
+    subparsers.add_parser('list')
+
+    activate_parser = subparsers.add_parser('activate')
+    activate_parser.add_argument('version', type=str)
+
+    args = parser.parse_args()
+    registry = ModelRegistry(args.root)
+
+    if args.command == 'register':
+        metrics = None
+        if args.metrics:
+            with open(args.metrics, 'r') as f:
+                metrics = json.load(f)
+        version = registry.register(
+            args.model_path, args.label_encoder, metrics=metrics, description=args.description)
+        if args.activate:
+            registry.set_active(version)
+        print(version)
+    elif args.command == 'list':
+        active = registry.active_version()
+        for version in registry.list_versions():
+            manifest = registry.get_manifest(version)
+            marker = '*' if version == active else ' '
+            print(f"{marker} {version} {manifest['created_at']} {json.dumps(manifest['metrics'])}")
+    elif args.command == 'activate':
+        registry.set_active(args.version)
@@ -9,6 +9,15 @@ from transformers import AutoTokenizer, AutoModelForSequenceClassification, GPT2
 from torch.utils.data import Dataset
 import numpy as np
 import os
+import time
+from nlp.src.utils.dataset_cache import build_intent_dataset
+from nlp.src.utils.distillation import (
+    DEFAULT_STUDENT_HIDDEN, DEFAULT_STUDENT_LAYERS, DistillationDataset, build_distillation_texts, build_student,
+    parameter_count, student_attention_heads, teacher_logits, train_student)
+from nlp.src.utils.early_exit import evaluate_early_exit, heads_path, save_report, train_exit_heads
+from nlp.src.utils.length_bucketing import dynamic_padding_collate, make_intent_dataloader
+from nlp.src.utils.lexical_classifier import LEXICAL_MODEL_NAME, LexicalIntentClassifier, evaluate_cascade
+from nlp.src.utils.model_utils import evaluate_model
 os.environ["CUDA_VISIBLE_DEVICES"] = ""
 
 
@@ -24,21 +33,6 @@ logging.basicConfig(level=logging.INFO,
 logger = logging.getLogger(__name__)
 
 
-class IntentDataset(Dataset):
-    def __init__(self, encodings, labels):
-        self.encodings = encodings
-        self.labels = labels
-
-    def __getitem__(self, idx):
-        item = {key: torch.tensor(val[idx])
-                for key, val in self.encodings.items()}
-        item['labels'] = torch.tensor(self.labels[idx])
-        return item
-
-    def __len__(self):
-        return len(self.labels)
-
-
 class ResponseDataset(Dataset):
     def __init__(self, encodings):
         self.encodings = encodings
@@ -99,13 +93,9 @@ def train_intent_model(data_path, model_save_path):
     for param in model.parameters():
         param.data = param.data.contiguous()
 
-    # Veriyi tokenize etme
-    train_encodings = tokenizer(train_texts, truncation=True, padding=True)
-    val_encodings = tokenizer(val_texts, truncation=True, padding=True)
-
-    # Dataset oluşturma
-    train_dataset = IntentDataset(train_encodings, train_labels)
-    val_dataset = IntentDataset(val_encodings, val_labels)
+    # Tokenize edilmiş veri önbellekten okunur (ilk çalıştırmada oluşturulur)
+    train_dataset = build_intent_dataset(train_texts, train_labels, tokenizer)
+    val_dataset = build_intent_dataset(val_texts, val_labels, tokenizer)
 
     # Eğitim ayarları
     training_args = TrainingArguments(
@@ -125,12 +115,14 @@ def train_intent_model(data_path, model_save_path):
         fp16=False,  # CPU kullanıyoruz, bu yüzden fp16'yı devre dışı bırakıyoruz
     )
 
-    # Trainer oluşturma ve eğitim
+    # Trainer oluşturma ve eğitim; önbellekteki diziler max_len'e kadar doldurulmuş
+    # olduğundan her batch kendi en uzun örneğine kırpılır
     trainer = MixedPrecisionTrainer(
         model=model,
         args=training_args,
         train_dataset=train_dataset,
-        eval_dataset=val_dataset
+        eval_dataset=val_dataset,
+        data_collator=dynamic_padding_collate
     )
 
     trainer.train()
@@ -145,6 +137,154 @@ def train_intent_model(data_path, model_save_path):
 
     logger.info(f"Intent classification model saved to {model_save_path}")
 
+    train_lexical_cascade(model, tokenizer, label_encoder, trainer,
+                          train_texts, label_encoder.inverse_transform(train_labels),
+                          val_texts, val_dataset, label_encoder.inverse_transform(val_labels),
+                          model_save_path)
+
+
+def bert_latency_ms(model, tokenizer, texts, limit=50):
+    # Tek mesajlık forward pass'in CPU'daki ortalama süresi
+    model.eval()
+    texts = texts[:limit]
+    with torch.no_grad():
+        start = time.perf_counter()
+        for text in texts:
+            model(**tokenizer(text, truncation=True, return_tensors="pt"))
+    return (time.perf_counter() - start) / len(texts) * 1000
+
+
+def train_lexical_cascade(model, tokenizer, label_encoder, trainer, train_texts, train_intents,
+                          val_texts, val_dataset, val_intents, model_save_path):
+    """
+    Aynı eğitim bölümü üzerinde TF-IDF/char n-gram kaskad modelini eğitir, BERT
+    ağırlıklarının yanına kaydeder ve doğrulama bölümünde kaskad raporunu yazar.
+    """
+    lexical = LexicalIntentClassifier().fit(train_texts, train_intents)
+    lexical.save(os.path.join(model_save_path, LEXICAL_MODEL_NAME))
+
+    predictions = trainer.predict(val_dataset).predictions
+    bert_intents = label_encoder.inverse_transform(predictions.argmax(axis=-1))
+    report = evaluate_cascade(lexical, val_texts, val_intents, bert_intents,
+                              bert_latency_ms(model, tokenizer, val_texts))
+
+    with open(os.path.join(model_save_path, 'cascade_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(
+        f"Cascade report written (BERT accuracy {report['bert_accuracy']:.4f}, "
+        f"lexical accuracy {report['lexical_accuracy']:.4f})")
+
+
+def load_intent_split(data_path, model_path):
+    # train_intent_model ile aynı bölme; etiket sırası kaydedilen label_encoder.json'dan okunur
+    data = load_data(data_path)
+    with open(os.path.join(model_path, 'label_encoder.json'), 'r') as f:
+        classes = json.load(f)
+    label_ids = {label: i for i, label in enumerate(classes)}
+    texts = [item['text'] for item in data]
+    labels = [label_ids[item['intent']] for item in data]
+    return train_test_split(texts, labels, test_size=0.2, random_state=42)
+
+
+def train_early_exit_model(data_path, model_path, epochs=3):
+    """
+    Eğitilmiş intent modelinin ara katmanlarına erken çıkış başlıkları ekler.
+    Başlıklar model dizinine kaydedilir; eşiklere göre doğruluk / ortalama
+    katman raporu early_exit_report.json olarak yazılır.
+    """
+    logger.info("Starting early exit head training")
+    device = torch.device('cpu')
+    train_texts, val_texts, train_labels, val_labels = load_intent_split(data_path, model_path)
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = AutoModelForSequenceClassification.from_pretrained(model_path).to(device)
+
+    train_loader = make_intent_dataloader(
+        build_intent_dataset(train_texts, train_labels, tokenizer),
+        batch_size=16, shuffle=True, seed=42)
+    val_loader = make_intent_dataloader(
+        build_intent_dataset(val_texts, val_labels, tokenizer),
+        batch_size=16, shuffle=False)
+
+    heads = train_exit_heads(model, train_loader, device, epochs=epochs)
+    heads.save(heads_path(model_path))
+    logger.info(f"Early exit heads saved to {heads_path(model_path)}")
+
+    for criterion in ("confidence", "entropy"):
+        report = evaluate_early_exit(model, heads, val_loader, device, criterion=criterion)
+        save_report(report, os.path.join(model_path, f'early_exit_report_{criterion}.json'))
+
+
+def train_distilled_model(data_path, teacher_path, student_path, num_layers=DEFAULT_STUDENT_LAYERS,
+                          hidden_size=DEFAULT_STUDENT_HIDDEN, num_heads=None, epochs=10, temperature=2.0,
+                          alpha=0.5, augment_copies=2, unlabeled_path=None):
+    """
+    Eğitilmiş intent modelini (öğretmen) 2-4 katmanlı, varsayılan olarak 384 boyutlu
+    bir BERT öğrenciye damıtır.
+    Öğrenci etiketli veri, çoğaltılmış kopyalar ve isteğe bağlı etiketsiz metinler
+    üzerinde öğretmenin yumuşak logit'lerinden öğrenir. Çıktı dizini Chatbot'un
+    doğrudan yükleyebileceği formattadır (ağırlıklar, tokenizer, label_encoder.json).
+    """
+    logger.info("Starting intent model distillation")
+    # Geçersiz boyutlar öğretmen logit'leri hesaplanmadan reddedilir
+    if hidden_size:
+        student_attention_heads(hidden_size, num_heads)
+    device = torch.device('cpu')
+    train_texts, val_texts, train_labels, val_labels = load_intent_split(data_path, teacher_path)
+
+    unlabeled_texts = []
+    if unlabeled_path:
+        with open(unlabeled_path, 'r', encoding='utf-8') as f:
+            unlabeled_texts = [line.strip() for line in f if line.strip()]
+
+    tokenizer = AutoTokenizer.from_pretrained(teacher_path)
+    teacher = AutoModelForSequenceClassification.from_pretrained(teacher_path).to(device)
+
+    texts, labels = build_distillation_texts(
+        train_texts, train_labels, unlabeled_texts, augment_copies=augment_copies)
+    base_dataset = build_intent_dataset(texts, labels, tokenizer)
+    logits = teacher_logits(
+        teacher, make_intent_dataloader(base_dataset, batch_size=32, shuffle=False, bucketed=False), device)
+    train_loader = make_intent_dataloader(
+        DistillationDataset(base_dataset, logits), batch_size=16, shuffle=True, seed=42)
+    logger.info(f"Distilling on {len(texts)} texts ({len(train_texts)} labeled)")
+
+    student = build_student(teacher, num_layers=num_layers, hidden_size=hidden_size, num_heads=num_heads)
+    student = train_student(student, train_loader, device, epochs=epochs,
+                            temperature=temperature, alpha=alpha)
+
+    os.makedirs(student_path, exist_ok=True)
+    student.save_pretrained(student_path)
+    tokenizer.save_pretrained(student_path)
+    with open(os.path.join(teacher_path, 'label_encoder.json'), 'r') as f:
+        classes = json.load(f)
+    with open(os.path.join(student_path, 'label_encoder.json'), 'w') as f:
+        json.dump(classes, f)
+
+    val_loader = make_intent_dataloader(
+        build_intent_dataset(val_texts, val_labels, tokenizer), batch_size=16, shuffle=False)
+    teacher_ms = bert_latency_ms(teacher, tokenizer, val_texts)
+    student_ms = bert_latency_ms(student, tokenizer, val_texts)
+    report = {
+        "student_layers": num_layers,
+        "student_hidden_size": student.config.hidden_size,
+        "student_attention_heads": student.config.num_attention_heads,
+        "teacher_accuracy": evaluate_model(teacher, val_loader, device),
+        "student_accuracy": evaluate_model(student, val_loader, device),
+        "teacher_parameters": parameter_count(teacher),
+        "student_parameters": parameter_count(student),
+        "teacher_cpu_ms_per_message": teacher_ms,
+        "student_cpu_ms_per_message": student_ms,
+        "speedup": teacher_ms / student_ms if student_ms else None,
+    }
+    with open(os.path.join(student_path, 'distill_report.json'), 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(
+        f"Student accuracy {report['student_accuracy']:.4f} vs teacher {report['teacher_accuracy']:.4f}, "
+        f"{report['student_parameters']:,} vs {report['teacher_parameters']:,} parameters, "
+        f"{report['speedup']:.1f}x faster on CPU")
+    logger.info(f"Distilled model saved to {student_path}")
+
 
 def train_response_model(data_path, model_save_path):
     logger.info("Starting response generation model training")
@@ -155,12 +295,6 @@ def train_response_model(data_path, model_save_path):
     # Veri yapısını kontrol et
     logger.info(f"Sample data item: {data[0]}")
 
-    # Veriyi uygun formata dönüştürme
-    texts = [
-        f"Intent: {item['intent']}\nContext: {json.dumps(item.get('context', {}))}\nResponse: {item['response']}"
-        for item in data
-    ]
-
     # GPT-2 modelini ve tokenizer'ı yükle
     model_name = "ytu-ce-cosmos/turkish-gpt2"
     try:
@@ -180,6 +314,14 @@ def train_response_model(data_path, model_save_path):
     num_added_toks = tokenizer.add_special_tokens(special_tokens_dict)
     model.resize_token_embeddings(len(tokenizer))
 
+    # Veriyi uygun formata dönüştürme. Yanıt eos_token ile biter ki model durmayı öğrensin;
+    # pad_token eos'tan farklı olduğu için collator eos etiketini maskelemez
+    texts = [
+        f"Intent: {item['intent']}\nContext: {json.dumps(item.get('context', {}))}\nResponse: {item['response']}"
+        f"{tokenizer.eos_token}"
+        for item in data
+    ]
+
     # Veriyi tokenize etme
     encodings = tokenizer(texts, truncation=True, padding=True,
                           max_length=512, return_tensors="pt")
@@ -227,8 +369,29 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Train intent classification and response generation models")
     parser.add_argument('--task', type=str, required=True, choices=[
-                        'intent', 'response'], help="Task to perform: 'intent' for intent classification, 'response' for response generation")
+                        'intent', 'response', 'early_exit', 'distill'],
+                        help="Task to perform: 'intent' for intent classification, 'response' for response generation, "
+                             "'early_exit' to train intermediate-layer exit heads for an existing intent model, "
+                             "'distill' to distill the intent model into a small student")
+    parser.add_argument('--student-layers', type=int, default=DEFAULT_STUDENT_LAYERS, choices=[2, 3, 4])
+    parser.add_argument('--student-hidden', type=int, default=DEFAULT_STUDENT_HIDDEN,
+                        help="Student hidden size; 0 uses the teacher's size, which copies teacher layers "
+                             "but gives at most ~3x speedup")
+    parser.add_argument('--student-heads', type=int, default=None,
+                        help="Student attention heads (defaults to hidden size / 64; required otherwise, e.g. 12 for 312)")
+    parser.add_argument('--temperature', type=float, default=2.0)
+    parser.add_argument('--alpha', type=float, default=0.5,
+                        help="Weight of the soft-target loss on labeled examples")
+    parser.add_argument('--epochs', type=int, default=10)
+    parser.add_argument('--augment-copies', type=int, default=2)
+    parser.add_argument('--unlabeled', type=str, default=None,
+                        help="Optional text file with one unlabeled message per line")
     args = parser.parse_args()
+    if args.task == 'distill' and args.student_hidden:
+        try:
+            student_attention_heads(args.student_hidden, args.student_heads)
+        except ValueError as e:
+            parser.error(str(e))
 
     if args.task == 'intent':
         intent_data_path = os.path.join(
@@ -242,3 +405,22 @@ if __name__ == "__main__":
         response_model_save_path = os.path.join(
             PROJECT_ROOT, 'nlp', 'models', 'response_generator')
         train_response_model(response_data_path, response_model_save_path)
+    elif args.task == 'early_exit':
+        intent_data_path = os.path.join(
+            PROJECT_ROOT, 'nlp', 'data', 'intent_data.json')
+        intent_model_save_path = os.path.join(
+            PROJECT_ROOT, 'nlp', 'models', 'intent_classifier_model')
+        train_early_exit_model(intent_data_path, intent_model_save_path)
+    elif args.task == 'distill':
+        intent_data_path = os.path.join(
+            PROJECT_ROOT, 'nlp', 'data', 'intent_data.json')
+        intent_model_save_path = os.path.join(
+            PROJECT_ROOT, 'nlp', 'models', 'intent_classifier_model')
+        student_save_path = os.path.join(
+            PROJECT_ROOT, 'nlp', 'models', 'intent_classifier_student')
+        train_distilled_model(
+            intent_data_path, intent_model_save_path, student_save_path,
+            num_layers=args.student_layers, hidden_size=args.student_hidden, num_heads=args.student_heads,
+            epochs=args.epochs,
+            temperature=args.temperature, alpha=args.alpha, augment_copies=args.augment_copies,
+            unlabeled_path=args.unlabeled)
@@ -1,20 +1,43 @@
 # nlp/src/utils/model_utils.py
+import random
+import numpy as np
 import torch
-from torch.utils.data import DataLoader
 from sklearn.metrics import classification_report, confusion_matrix
 from sklearn.model_selection import ParameterGrid, KFold
 from transformers import BertForSequenceClassification
-from nlp.src.utils.intent_recognition import IntentDataset
+from nlp.src.utils.dataset_cache import TokenizedIntentDataset, build_intent_dataset, get_tokenized_arrays
+from nlp.src.utils.length_bucketing import make_intent_dataloader, TokenThroughputMeter
+from nlp.src.utils.parallel_training import (
+    build_worker_model, create_training_pool, default_threads_per_worker, reinitialize_head,
+    share_tokenized_arrays, shared_model_state, worker_arrays, worker_state)
 from transformers import DistilBertForSequenceClassification
 
 
-def evaluate_model(model, test_loader, device):
+def train_one_epoch(model, train_loader, optimizer, device, meter=None):
+    model.train()
+    for batch in train_loader:
+        if meter is not None:
+            meter.update(batch)
+        optimizer.zero_grad()
+        input_ids = batch['input_ids'].to(device)
+        attention_mask = batch['attention_mask'].to(device)
+        labels = batch['labels'].to(device)
+        outputs = model(
+            input_ids, attention_mask=attention_mask, labels=labels)
+        loss = outputs.loss
+        loss.backward()
+        optimizer.step()
+
+
+def evaluate_model(model, test_loader, device, return_report=False):
     model.eval()
     predictions = []
     actual_labels = []
+    meter = TokenThroughputMeter()
 
     with torch.no_grad():
         for batch in test_loader:
+            meter.update(batch)
             input_ids = batch['input_ids'].to(device)
             attention_mask = batch['attention_mask'].to(device)
             labels = batch['labels'].to(device)
@@ -30,48 +53,59 @@ def evaluate_model(model, test_loader, device):
     print(classification_report(actual_labels, predictions))
     print("\nConfusion Matrix:")
     print(confusion_matrix(actual_labels, predictions))
+    meter.log("Evaluation")
 
+    if return_report:
+        return report
     return report['accuracy']  # Accuracy'yi döndür
 
 
-def optimize_hyperparameters(X_train, y_train, X_val, y_val, tokenizer, label_dict, device):
+def optimize_hyperparameters(X_train, y_train, X_val, y_val, tokenizer, label_dict, device, bucketed=True,
+                             n_workers=None, work_dir=None):
     param_grid = {
         'learning_rate': [1e-5, 2e-5, 3e-5],
         'batch_size': [8, 16, 32],
         'num_epochs': [3, 5, 10]
     }
 
+    if n_workers:
+        # Paralel arama: süreç havuzu + successive halving, work_dir'den devam edebilir
+        from nlp.src.utils.hyperparameter_search import SuccessiveHalvingSearch
+
+        search = SuccessiveHalvingSearch(
+            param_grid, work_dir or 'hyperparameter_search', n_workers=n_workers, bucketed=bucketed)
+        best_params, best_score = search.run(
+            X_train, y_train, X_val, y_val, tokenizer, len(label_dict))
+        print(f"Best parameters: {best_params}")
+        print(f"Best validation accuracy: {best_score}")
+        return best_params
+
     best_score = 0
     best_params = None
 
+    # Tüm grid konfigürasyonları aynı tokenize edilmiş veriyi kullanır
+    train_dataset = build_intent_dataset(X_train, y_train, tokenizer)
+    val_dataset = build_intent_dataset(X_val, y_val, tokenizer)
+
     for params in ParameterGrid(param_grid):
         model = DistilBertForSequenceClassification.from_pretrained(
             'distilbert-base-multilingual-cased', num_labels=len(label_dict))
         model.to(device)
 
-        train_dataset = IntentDataset(X_train, y_train, tokenizer)
-        train_loader = DataLoader(
-            train_dataset, batch_size=params['batch_size'], shuffle=True)
+        train_loader = make_intent_dataloader(
+            train_dataset, batch_size=params['batch_size'], shuffle=True, bucketed=bucketed)
 
         optimizer = torch.optim.AdamW(
             model.parameters(), lr=params['learning_rate'])
 
+        meter = TokenThroughputMeter()
         for epoch in range(params['num_epochs']):
-            model.train()
-            for batch in train_loader:
-                optimizer.zero_grad()
-                input_ids = batch['input_ids'].to(device)
-                attention_mask = batch['attention_mask'].to(device)
-                labels = batch['labels'].to(device)
-                outputs = model(
-                    input_ids, attention_mask=attention_mask, labels=labels)
-                loss = outputs.loss
-                loss.backward()
-                optimizer.step()
+            train_one_epoch(model, train_loader, optimizer, device, meter)
+        meter.log(f"Training {params}")
 
         # Validasyon seti üzerinde değerlendirme
-        val_dataset = IntentDataset(X_val, y_val, tokenizer)
-        val_loader = DataLoader(val_dataset, batch_size=16, shuffle=False)
+        val_loader = make_intent_dataloader(
+            val_dataset, batch_size=16, shuffle=False, bucketed=bucketed)
         val_accuracy = evaluate_model(model, val_loader, device)
 
         print(f"Parameters: {params}, Validation Accuracy: {val_accuracy}")
@@ -85,46 +119,104 @@ def optimize_hyperparameters(X_train, y_train, X_val, y_val, tokenizer, label_di
     return best_params
 
 
-def cross_validate(X, y, tokenizer, label_dict, device, n_splits=5):
-    kf = KFold(n_splits=n_splits, shuffle=True, random_state=42)
-
-    fold_scores = []
+def seed_everything(seed):
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
 
-    for fold, (train_index, val_index) in enumerate(kf.split(X), 1):
-        X_train_fold, X_val_fold = [X[i]
-                                    for i in train_index], [X[i] for i in val_index]
-        y_train_fold, y_val_fold = [y[i]
-                                    for i in train_index], [y[i] for i in val_index]
 
-        model = DistilBertForSequenceClassification.from_pretrained(
+def aggregate_reports(reports):
+    """
+    Fold'ların classification_report(output_dict=True) çıktılarını tek bir
+    özette birleştirir: her sınıf/ortalama ve metrik için ortalama ve standart sapma.
+    """
+    accuracies = [report['accuracy'] for report in reports]
+    summary = {
+        'accuracy': {'mean': float(np.mean(accuracies)), 'std': float(np.std(accuracies))},
+        'folds': len(reports),
+    }
+    keys = [key for key in reports[0] if key != 'accuracy']
+    for key in keys:
+        summary[key] = {}
+        for metric in reports[0][key]:
+            values = [report[key][metric]
+                      for report in reports if key in report]
+            summary[key][metric] = {
+                'mean': float(np.mean(values)), 'std': float(np.std(values))}
+    return summary
+
+
+def _train_and_evaluate_fold(model, arrays, y, train_index, val_index, device, bucketed, seed, fold):
+    train_dataset = TokenizedIntentDataset(arrays, y, indices=train_index)
+    train_loader = make_intent_dataloader(
+        train_dataset, batch_size=16, shuffle=True, bucketed=bucketed, seed=seed)
+
+    optimizer = torch.optim.AdamW(model.parameters(), lr=2e-5)
+
+    meter = TokenThroughputMeter()
+    for epoch in range(5):  # 5 epoch eğitim
+        train_one_epoch(model, train_loader, optimizer, device, meter)
+    meter.log(f"Fold {fold} training")
+
+    # Validasyon
+    val_dataset = TokenizedIntentDataset(arrays, y, indices=val_index)
+    val_loader = make_intent_dataloader(
+        val_dataset, batch_size=16, shuffle=False, bucketed=bucketed)
+    return evaluate_model(model, val_loader, device, return_report=True)
+
+
+def _run_fold(fold, train_index, val_index, seed):
+    # Worker sürecinde çalışır; fold başına sabit seed
+    state = worker_state()
+    device = torch.device('cpu')
+    model = build_worker_model(device)
+    seed_everything(seed + fold)
+    reinitialize_head(model)
+    return _train_and_evaluate_fold(model, worker_arrays(), state['labels'], train_index, val_index,
+                                    device, state['bucketed'], seed + fold, fold)
+
+
+def cross_validate(X, y, tokenizer, label_dict, device, n_splits=5, bucketed=True,
+                   n_workers=None, threads_per_worker=None, seed=42):
+    kf = KFold(n_splits=n_splits, shuffle=True, random_state=seed)
+    splits = list(enumerate(kf.split(X), 1))
+
+    # Metinler bir kez tokenize edilir, fold'lar aynı diziler üzerinde indekslenir
+    arrays = get_tokenized_arrays(X, tokenizer)
+
+    if n_workers:
+        # Fold'lar ayrı süreçlerde eşzamanlı eğitilir; temel ağırlıklar bir kez yüklenip paylaşılır
+        base_model = DistilBertForSequenceClassification.from_pretrained(
             'distilbert-base-multilingual-cased', num_labels=len(label_dict))
-        model.to(device)
-
-        train_dataset = IntentDataset(X_train_fold, y_train_fold, tokenizer)
-        train_loader = DataLoader(train_dataset, batch_size=16, shuffle=True)
-
-        optimizer = torch.optim.AdamW(model.parameters(), lr=2e-5)
-
-        for epoch in range(5):  # 5 epoch eğitim
-            model.train()
-            for batch in train_loader:
-                optimizer.zero_grad()
-                input_ids = batch['input_ids'].to(device)
-                attention_mask = batch['attention_mask'].to(device)
-                labels = batch['labels'].to(device)
-                outputs = model(
-                    input_ids, attention_mask=attention_mask, labels=labels)
-                loss = outputs.loss
-                loss.backward()
-                optimizer.step()
-
-        # Validasyon
-        val_dataset = IntentDataset(X_val_fold, y_val_fold, tokenizer)
-        val_loader = DataLoader(val_dataset, batch_size=16, shuffle=False)
-        fold_score = evaluate_model(model, val_loader, device)
-        fold_scores.append(fold_score)
-
-        print(f"Fold {fold} score: {fold_score}")
-
+        shared = {
+            'arrays': share_tokenized_arrays(arrays),
+            'labels': list(y),
+            'bucketed': bucketed,
+            'base_model': shared_model_state(base_model),
+        }
+        del base_model
+
+        threads = threads_per_worker or default_threads_per_worker(n_workers)
+        with create_training_pool(n_workers, threads, shared) as pool:
+            futures = [pool.submit(_run_fold, fold, train_index, val_index, seed)
+                       for fold, (train_index, val_index) in splits]
+            reports = [future.result() for future in futures]
+    else:
+        reports = []
+        for fold, (train_index, val_index) in splits:
+            model = DistilBertForSequenceClassification.from_pretrained(
+                'distilbert-base-multilingual-cased', num_labels=len(label_dict))
+            # Paralel yolla aynı: başlık fold seed'inden yeniden başlatılır
+            seed_everything(seed + fold)
+            reinitialize_head(model)
+            model.to(device)
+            reports.append(_train_and_evaluate_fold(
+                model, arrays, y, train_index, val_index, device, bucketed, seed + fold, fold))
+
+    for fold, report in enumerate(reports, 1):
+        print(f"Fold {fold} score: {report['accuracy']}")
+
+    summary = aggregate_reports(reports)
     print(
-        f"Average cross-validation score: {sum(fold_scores) / len(fold_scores)}")
+        f"Average cross-validation score: {summary['accuracy']['mean']} (std {summary['accuracy']['std']})")
+    return summary
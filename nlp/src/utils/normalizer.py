@@ -1,58 +1,237 @@
+import calendar
 import re
-from datetime import datetime
+from datetime import date, timedelta
+from functools import partial
 
+from nlp.src.utils.fast_entities import (
+    CASE_SUFFIXES, MONTHS, NUMBER_PHRASE, NUMBER_WORDS, RELATIVE_DAYS, TENS_WORDS, WEEKDAYS, turkish_lower,
+    word_alternation)
 
-def normalize_date(date_string):
+# datetime.strptime'ın %d, %m, %Y, %H, %I, %M alanları için kullandığı ifadeler;
+# eski formatlarda sonucun strptime ile birebir aynı kalması için aynen kullanılır
+_DAY = r"3[0-1]|[1-2]\d|0[1-9]|[1-9]|[ ][1-9]"
+_MONTH_NUMBER = r"1[0-2]|0[1-9]|[1-9]"
+_YEAR = r"\d\d\d\d"
+_HOUR24 = r"2[0-3]|[0-1]\d|\d"
+_HOUR12 = r"1[0-2]|0[1-9]|[1-9]"
+_MINUTE = r"[0-5]\d|\d"
+
+_SUFFIX = rf"(?:'?(?:{'|'.join(CASE_SUFFIXES)}))?"
+# Tek harfli birimlerden sonra harf gelmemeli: "2 hafta" 2 saat, "10 mart" 10 dakika sayılmaz
+_WORD_END = r"(?![^\W\d_])"
+_NUMBER = rf"\d{{1,3}}|{NUMBER_PHRASE}"
+_RELATIVE_DAY = word_alternation(RELATIVE_DAYS).replace(r"\ ", r"\s+")
+
+# Girdinin biçimine göre tek fullmatch ile dallanır; strptime gibi format başına
+# istisna fırlatıp yakalamaz
+_DATE_PATTERN = re.compile(
+    rf"""
+        (?P<day>{_DAY})(?P<sep>[./])(?P<month>{_MONTH_NUMBER})(?P=sep)(?P<year>{_YEAR})
+      | (?P<iso_year>{_YEAR})-(?P<iso_month>{_MONTH_NUMBER})-(?P<iso_day>{_DAY})
+      | (?P<named_day>\d{{1,2}})\s+(?P<month_name>{word_alternation(MONTHS)}){_SUFFIX}
+        (?:\s+(?P<named_year>{_YEAR}){_SUFFIX})?
+      | (?:(?P<next_week>haftaya|gelecek\s+hafta)\s+|(?:önümüzdeki|gelecek|bu)\s+)?
+        (?P<weekday>{word_alternation(WEEKDAYS)}){_SUFFIX}(?:\s+gün{_SUFFIX})?
+      | (?P<relative_day>{_RELATIVE_DAY}){_SUFFIX}
+      | (?P<count>{_NUMBER})\s+(?P<unit>gün|hafta)\s+sonra
+      | (?P<plain_next_week>haftaya|gelecek\s+hafta|önümüzdeki\s+hafta)
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+_TIME_PATTERN = re.compile(
+    rf"""
+        (?P<hour>{_HOUR24})[:.](?P<minute>{_MINUTE}){_SUFFIX}
+      | (?P<hour12>{_HOUR12}):(?P<minute12>{_MINUTE})\s+(?P<meridiem>am|pm)
+      | saat\s+(?P<spoken_hour>{_HOUR24})(?:[:.](?P<spoken_minute>{_MINUTE}))?(?P<half>\s+buçuk)?{_SUFFIX}
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+
+
+# Eski davranıştaki gibi önek eşleşmesi: "2 saat", "2,5 saat", "bir buçuk saat", "yarım saat",
+# "30dk"; ardından gelen rakamla yazılmış ikinci parça bileşik süreyi tamamlar
+# ("1 saat 30 dakika", "2h30m", "1 saat ve 15 dk")
+_DURATION_UNIT = rf"saat|dakika|dk|min|[hm](?=l[ıiuü]k|{_WORD_END})"
+_DURATION_PATTERN = re.compile(
+    rf"""
+        \s*(?:(?P<amount>\d+(?:[.,]\d+)?)\s*|(?P<word>{NUMBER_PHRASE}|yarım)\s+)
+        (?P<half>buçuk\s+)?
+        (?P<unit>{_DURATION_UNIT})[^\W\d_]*
+        (?:\s*(?:ve\s+)?(?P<next_amount>\d+)\s*(?P<next_unit>{_DURATION_UNIT})[^\W\d_]*)?
+    """,
+    re.VERBOSE | re.IGNORECASE,
+)
+_MINUTES_PER_UNIT = {"saat": 60, "h": 60, "dakika": 1, "dk": 1, "min": 1, "m": 1}
+
+
+def _fold(word):
+    # IGNORECASE eşleşmesi I/ı/İ/i harflerini ayırt etmez; sözlük aramaları da etmemeli
+    return " ".join(turkish_lower(word).replace("ı", "i").split())
+
+
+_MONTH_KEYS = {_fold(name): month for name, month in MONTHS.items()}
+_WEEKDAY_KEYS = {_fold(name): weekday for name, weekday in WEEKDAYS.items()}
+_RELATIVE_DAY_KEYS = {_fold(name): days for name, days in RELATIVE_DAYS.items()}
+_NUMBER_KEYS = {_fold(name): number for name, number in {**NUMBER_WORDS, **TENS_WORDS}.items()}
+
+
+def _number_value(words):
+    # Bileşik sayılar kelimelerin toplamıdır: "on iki" -> 12
+    return sum(_NUMBER_KEYS[word] for word in _fold(words).split())
+
+
+def _first(value):
+    if isinstance(value, list):
+        return value[0] if value else ""
+    return value
+
+
+def _make_date(year, month, day):
+    # Geçersiz günler (31.02 gibi) için istisna yerine None
+    if year < 1 or not 1 <= day <= calendar.monthrange(year, month)[1]:
+        return None
+    return date(year, month, day)
+
+
+def _resolve_date(match, today):
+    if match.group("day"):
+        return _make_date(int(match.group("year")), int(match.group("month")), int(match.group("day")))
+    if match.group("iso_year"):
+        return _make_date(int(match.group("iso_year")), int(match.group("iso_month")),
+                          int(match.group("iso_day")))
+    if match.group("month_name"):
+        month = _MONTH_KEYS[_fold(match.group("month_name"))]
+        day = int(match.group("named_day"))
+        if match.group("named_year"):
+            return _make_date(int(match.group("named_year")), month, day)
+        # Yıl belirtilmemişse bugünden itibaren ilk denk gelen tarih
+        resolved = _make_date(today.year, month, day)
+        if resolved is None or resolved < today:
+            resolved = _make_date(today.year + 1, month, day)
+        return resolved
+    if match.group("weekday"):
+        weekday = _WEEKDAY_KEYS[_fold(match.group("weekday"))]
+        if match.group("next_week"):
+            # "haftaya cuma": bir sonraki haftanın cuması
+            return today + timedelta(days=7 - today.weekday() + weekday)
+        return today + timedelta(days=(weekday - today.weekday()) % 7)
+    if match.group("relative_day"):
+        return today + timedelta(days=_RELATIVE_DAY_KEYS[_fold(match.group("relative_day"))])
+    if match.group("count"):
+        count = match.group("count")
+        count = int(count) if count.isdigit() else _number_value(count)
+        return today + timedelta(days=count * (7 if _fold(match.group("unit")) == "hafta" else 1))
+    return today + timedelta(days=7)
+
+
+def normalize_date(date_string, today=None):
     """
     Farklı formatlardaki tarih girişlerini standart bir formata dönüştürür.
-    Örnek: '15.07.2024', '15/07/2024', '2024-07-15' -> '2024-07-15'
+    Örnek: '15.07.2024', '15/07/2024', '2024-07-15', '15 Temmuz 2024' -> '2024-07-15'
+    Göreli ifadeler ('yarın', 'haftaya cuma', '3 gün sonra') today'e göre çözülür.
     """
-    if isinstance(date_string, list):
-        date_string = date_string[0] if date_string else ""
+    date_string = _first(date_string)
+    if not isinstance(date_string, str):
+        return date_string
 
-    date_formats = ['%d.%m.%Y', '%d/%m/%Y', '%Y-%m-%d']
-    for date_format in date_formats:
-        try:
-            return datetime.strptime(date_string, date_format).strftime('%Y-%m-%d')
-        except ValueError:
-            continue
+    match = _DATE_PATTERN.fullmatch(date_string.strip())
+    if match:
+        resolved = _resolve_date(match, today or date.today())
+        if resolved is not None:
+            return resolved.isoformat()
     return date_string  # Eğer hiçbir format uymuyorsa, orijinal string'i döndür
 
 
 def normalize_time(time_string):
     """
     Farklı formatlardaki saat girişlerini standart bir formata dönüştürür.
-    Örnek: '14:30', '14.30', '2:30 PM' -> '14:30'
+    Örnek: '14:30', '14.30', '2:30 PM', "14:30'da", 'saat 2 buçuk' -> '14:30' / '02:30'
     """
-    if isinstance(time_string, list):
-        time_string = time_string[0] if time_string else ""
+    time_string = _first(time_string)
+    if not isinstance(time_string, str):
+        return time_string
+
+    match = _TIME_PATTERN.fullmatch(time_string.strip())
+    if match is None:
+        return time_string  # Eğer hiçbir format uymuyorsa, orijinal string'i döndür
+
+    if match.group("hour"):
+        hour, minute = int(match.group("hour")), int(match.group("minute"))
+    elif match.group("hour12"):
+        hour, minute = int(match.group("hour12")) % 12, int(match.group("minute12"))
+        if match.group("meridiem").lower() == "pm":
+            hour += 12
+    else:
+        hour = int(match.group("spoken_hour"))
+        minute = 30 if match.group("half") else int(match.group("spoken_minute") or 0)
+    return f"{hour:02d}:{minute:02d}"
+
+
+def _unit_minutes(unit):
+    return _MINUTES_PER_UNIT.get(unit) or _MINUTES_PER_UNIT.get(unit.lower()) or _MINUTES_PER_UNIT[_fold(unit)]
+
 
-    time_formats = ['%H:%M', '%H.%M', '%I:%M %p']
-    for time_format in time_formats:
-        try:
-            return datetime.strptime(time_string, time_format).strftime('%H:%M')
-        except ValueError:
-            continue
-    return time_string  # Eğer hiçbir format uymuyorsa, orijinal string'i döndür
+def _part_minutes(amount, word, half, unit):
+    if amount:
+        amount = int(amount) if amount.isdigit() else float(amount.replace(",", "."))
+    elif _fold(word) == "yarim":
+        amount = 0.5
+    else:
+        amount = _number_value(word)
+    if half:
+        amount += 0.5
+    return amount * _unit_minutes(unit)
 
 
 def normalize_duration(duration_string):
     """
     Süre girişlerini dakika cinsinden standart bir formata dönüştürür.
-    Örnek: '2 saat', '2h', '120 dakika', '120m' -> 120
+    Örnek: '2 saat', '2h', '120 dakika', '120m', 'iki saat', '1 saat 30 dakika' -> 120 / 90
     """
-    if isinstance(duration_string, list):
-        duration_string = duration_string[0] if duration_string else ""
+    duration_string = _first(duration_string)
+    if not isinstance(duration_string, str):
+        return duration_string
 
-    duration_pattern = r'(\d+)\s*(saat|h|dakika|m)'
-    match = re.match(duration_pattern, duration_string, re.IGNORECASE)
-    if match:
-        value, unit = match.groups()
-        if unit.lower() in ['saat', 'h']:
-            return int(value) * 60
-        else:
-            return int(value)
-    return duration_string  # Eğer pattern uymuyorsa, orijinal string'i döndür
+    match = _DURATION_PATTERN.match(duration_string)
+    if match is None:
+        return duration_string  # Eğer pattern uymuyorsa, orijinal string'i döndür
+
+    minutes = _part_minutes(*match.group("amount", "word", "half", "unit"))
+    if match.group("next_unit"):
+        minutes += int(match.group("next_amount")) * _unit_minutes(match.group("next_unit"))
+    return int(round(minutes))
+
+
+_NORMALIZERS = {"DATE": normalize_date, "TIME": normalize_time, "DURATION": normalize_duration}
+
+
+def normalize_entities_batch(entities_list, today=None):
+    """
+    Bir batch'teki entity sözlüklerinin DATE, TIME ve DURATION değerlerini normalize eder.
+    Göreli tarihler için bugünün tarihi bir kez alınır; batch içinde tekrar eden
+    değerler bir kez çözülür. Diğer etiketler olduğu gibi kopyalanır.
+    Örnek: [{'DATE': ['yarın'], 'TIME': ['14.30']}] -> [{'DATE': ['2024-07-16'], 'TIME': ['14:30']}]
+    """
+    normalizers = dict(_NORMALIZERS, DATE=partial(normalize_date, today=today or date.today()))
+    resolved = {}
+    normalized_list = []
+    for entities in entities_list:
+        normalized = {}
+        for label, values in entities.items():
+            normalizer = normalizers.get(label)
+            if normalizer is None:
+                normalized[label] = list(values)
+                continue
+            normalized_values = []
+            for value in values:
+                key = (label, value)
+                if key not in resolved:
+                    resolved[key] = normalizer(value)
+                normalized_values.append(resolved[key])
+            normalized[label] = normalized_values
+        normalized_list.append(normalized)
+    return normalized_list
 
 
 def normalize_entity(entity_type, value):
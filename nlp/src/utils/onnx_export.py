@@ -0,0 +1,135 @@
+# nlp/src/utils/onnx_export.py
+import argparse
+import json
+import logging
+import os
+import numpy as np
+import torch
+from transformers import AutoTokenizer, BertForSequenceClassification
+
+from nlp.src.utils.inference_backends import ONNX_MODEL_NAME, OnnxBackend
+
+# Proje kök dizinini belirleme
+PROJECT_ROOT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..'))
+
+QUANTIZED_ONNX_MODEL_NAME = "model.int8.onnx"
+INPUT_NAMES = ["input_ids", "attention_mask", "token_type_ids"]
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def export_to_onnx(model_path, output_path, opset=14):
+    logger.info(f"Exporting {model_path} to ONNX")
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = BertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+
+    sample = tokenizer(["Merhaba", "Yıllık izin almak istiyorum"],
+                       padding=True, return_tensors="pt")
+    input_names = [name for name in INPUT_NAMES if name in sample]
+
+    # Batch ve sequence eksenleri dinamik bırakılır
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in input_names}
+    dynamic_axes["logits"] = {0: "batch"}
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            tuple(sample[name] for name in input_names),
+            output_path,
+            input_names=input_names,
+            output_names=["logits"],
+            dynamic_axes=dynamic_axes,
+            opset_version=opset,
+            do_constant_folding=True,
+        )
+
+    logger.info(f"ONNX model saved to {output_path}")
+    return output_path
+
+
+def quantize_onnx(onnx_path, output_path):
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    quantize_dynamic(onnx_path, output_path, weight_type=QuantType.QInt8)
+    logger.info(f"Quantized ONNX model saved to {output_path}")
+    return output_path
+
+
+def check_parity(model_path, onnx_path, data_path, batch_size=32, atol=1e-3):
+    """
+    ONNX modelinin logit'lerini intent_data.json üzerinde PyTorch modeliyle karşılaştırır.
+    Maksimum mutlak farkı ve tahmin uyuşma oranını döndürür.
+    """
+    with open(data_path, 'r', encoding='utf-8') as f:
+        texts = [item['text'] for item in json.load(f)]
+
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    model = BertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    backend = OnnxBackend(model_path, onnx_path=onnx_path)
+
+    max_abs_diff = 0.0
+    agreements = 0
+    for start in range(0, len(texts), batch_size):
+        inputs = tokenizer(texts[start:start + batch_size],
+                           padding=True, truncation=True, return_tensors="np")
+        with torch.no_grad():
+            torch_logits = model(
+                **{name: torch.from_numpy(values) for name, values in inputs.items()}).logits.numpy()
+        onnx_logits = backend.logits(dict(inputs))
+
+        max_abs_diff = max(max_abs_diff, float(
+            np.abs(torch_logits - onnx_logits).max()))
+        agreements += int((torch_logits.argmax(axis=-1) ==
+                          onnx_logits.argmax(axis=-1)).sum())
+
+    agreement = agreements / len(texts)
+    logger.info(
+        f"Parity for {onnx_path}: max abs logit diff {max_abs_diff:.6f}, prediction agreement {agreement:.4f}")
+    return {
+        "max_abs_diff": max_abs_diff,
+        "agreement": agreement,
+        "passed": max_abs_diff <= atol,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the intent classifier to ONNX")
+    parser.add_argument('--model-path', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'models', 'intent_classifier_model'))
+    parser.add_argument('--output-dir', type=str, default=None,
+                        help="Defaults to the model directory")
+    parser.add_argument('--opset', type=int, default=14)
+    parser.add_argument('--quantize', action='store_true',
+                        help="Also write an int8 dynamically quantized variant")
+    parser.add_argument('--check-parity', action='store_true',
+                        help="Compare ONNX logits against PyTorch on intent_data.json")
+    parser.add_argument('--atol', type=float, default=1e-3)
+    args = parser.parse_args()
+
+    output_dir = args.output_dir or args.model_path
+    os.makedirs(output_dir, exist_ok=True)
+    onnx_path = export_to_onnx(args.model_path, os.path.join(
+        output_dir, ONNX_MODEL_NAME), opset=args.opset)
+
+    quantized_path = None
+    if args.quantize:
+        quantized_path = quantize_onnx(onnx_path, os.path.join(
+            output_dir, QUANTIZED_ONNX_MODEL_NAME))
+
+    if args.check_parity:
+        data_path = os.path.join(PROJECT_ROOT, 'nlp', 'data', 'intent_data.json')
+        result = check_parity(args.model_path, onnx_path,
+                              data_path, atol=args.atol)
+        if quantized_path:
+            # int8 modelde logit'ler birebir tutmaz; yalnızca uyuşma oranı raporlanır
+            check_parity(args.model_path, quantized_path,
+                         data_path, atol=args.atol)
+        if not result["passed"]:
+            raise SystemExit(
+                f"ONNX parity check failed: max abs diff {result['max_abs_diff']:.6f} > {args.atol}")
@@ -0,0 +1,89 @@
+# nlp/src/utils/parallel_training.py
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+import torch
+import torch.multiprocessing as mp
+
+from nlp.src.utils.dataset_cache import TokenizedArrays
+
+logger = logging.getLogger(__name__)
+
+# Worker süreçlerinde initializer ile doldurulur
+_worker_state = {}
+
+
+def default_threads_per_worker(n_workers):
+    return max(1, (os.cpu_count() or 1) // n_workers)
+
+
+def share_tokenized_arrays(arrays):
+    # Tensörler paylaşımlı belleğe alınır; worker'lara kopya yerine handle gider
+    return {
+        'input_ids': torch.from_numpy(arrays.input_ids[:]).share_memory_(),
+        'attention_mask': torch.from_numpy(arrays.attention_mask[:]).share_memory_(),
+        'lengths': torch.from_numpy(arrays.lengths[:]).share_memory_(),
+    }
+
+
+def shared_model_state(model):
+    """
+    Önceden eğitilmiş temel modelin config'i ve paylaşımlı bellekteki ağırlıkları.
+    Worker'lar her deneme için from_pretrained yerine bu ağırlıklardan model kurar.
+    """
+    state_dict = {name: tensor.detach().clone().share_memory_()
+                  for name, tensor in model.state_dict().items()}
+    return {'model_class': type(model), 'config': model.config, 'state_dict': state_dict}
+
+
+def _init_worker(threads, shared):
+    torch.set_num_threads(threads)
+    _worker_state.clear()
+    _worker_state.update(shared)
+    _worker_state['threads'] = threads
+
+
+def worker_state():
+    return _worker_state
+
+
+def worker_arrays():
+    shared = _worker_state['arrays']
+    return TokenizedArrays(shared['input_ids'].numpy(), shared['attention_mask'].numpy(),
+                           shared['lengths'].numpy())
+
+
+def build_worker_model(device):
+    base = _worker_state['base_model']
+    model = base['model_class'](base['config'])
+    model.load_state_dict(base['state_dict'])
+    return model.to(device)
+
+
+def reinitialize_head(model):
+    """
+    Önceden eğitilmiş gövde dışındaki (sınıflandırma başlığı) katmanları
+    o anki torch RNG durumundan yeniden başlatır. Paylaşılan ağırlıklarla
+    kurulan modelde başlık her fold'da aynı kalmasın ve from_pretrained
+    ile kurulan modelle aynı seed'den aynı başlık çıksın diye kullanılır.
+    """
+    body = getattr(model, model.base_model_prefix)
+    for child in model.children():
+        if child is not body:
+            child.apply(model._init_weights)
+    return model
+
+
+def create_training_pool(n_workers, threads_per_worker, shared):
+    """
+    Eğitim işleri için süreç havuzu. Her worker torch thread'lerini
+    threads_per_worker ile sınırlar ki çekirdekler aşırı paylaşılmasın.
+    shared: worker'larda worker_state() ile erişilen sözlük.
+    """
+    logger.info(
+        f"Starting {n_workers} training workers with {threads_per_worker} torch threads each")
+    return ProcessPoolExecutor(
+        max_workers=n_workers,
+        mp_context=mp.get_context('spawn'),
+        initializer=_init_worker,
+        initargs=(threads_per_worker, shared))
@@ -0,0 +1,179 @@
+# nlp/src/utils/profiling.py
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+from nlp.src.utils import metrics
+
+# Proje kök dizinini belirleme
+PROJECT_ROOT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..'))
+
+DEFAULT_PROFILE_DIR = os.path.join(PROJECT_ROOT, 'nlp', 'profiles')
+
+logger = logging.getLogger(__name__)
+
+
+class StackSampler:
+    """
+    Basit Python örnekleyici profiler. Ayrı bir thread, interval aralıklarla
+    tüm thread'lerin yığınlarını sys._current_frames() ile okur ve
+    flamegraph.pl / speedscope'un okuduğu "folded stacks" formatında sayar.
+    """
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @staticmethod
+    def _frame_name(frame):
+        code = frame.f_code
+        return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {thread.ident: thread.name for thread in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(self._frame_name(frame))
+                frame = frame.f_back
+            stack.append(names.get(thread_id, str(thread_id)))
+            self.samples[";".join(reversed(stack))] += 1
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_folded(self, path):
+        with open(path, 'w') as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class ProfilingController:
+    """
+    İsteğe bağlı, örneklemeli profil oturumları.
+    arm(n) sonraki n isteği torch.profiler + StackSampler ile sarar; her oturum
+    output_dir altında ayrı bir dizine Chrome trace (trace.json), operatör
+    tablosu (operators.txt), folded stack dosyası (stacks.folded) ve özet yazar.
+    Kapalıyken istek başına maliyet tek bir tamsayı okumasıdır.
+    Aynı anda tek oturum açılır; oturum süreç genelidir, eşzamanlı istekler de izde görünür.
+    torch.profiler operatörleri yalnızca oturumu açan thread'de kaydeder; bu yüzden
+    Chatbot, in_session() doğruyken isteği batcher ve aşama havuzu olmadan bu thread'de çalıştırır.
+    """
+
+    def __init__(self, output_dir=DEFAULT_PROFILE_DIR, sample_interval=0.002, row_limit=50):
+        self.output_dir = output_dir
+        self.sample_interval = sample_interval
+        self.row_limit = row_limit
+
+        self.remaining = 0
+        self._lock = threading.Lock()
+        self._session_lock = threading.Lock()
+        self._sessions = []
+        self._local = threading.local()
+
+    def arm(self, count):
+        with self._lock:
+            self.remaining = max(0, int(count))
+        logger.info(f"Profiling armed for the next {self.remaining} requests")
+
+    def take(self):
+        # Sıradaki istek profillenecekse sayaç bir azaltılır
+        with self._lock:
+            if self.remaining <= 0:
+                return False
+            self.remaining -= 1
+            return True
+
+    def in_session(self):
+        # Çağıran thread şu anda bir profil oturumunun içinde mi
+        return self._session_lock.locked() and getattr(self._local, "active", False)
+
+    def maybe_session(self, label):
+        if self.remaining and self.take():
+            return self.session(label)
+        return nullcontext()
+
+    @contextmanager
+    def session(self, label):
+        if not self._session_lock.acquire(blocking=False):
+            # Başka bir oturum sürüyor; bu istek profillenmeden çalışır
+            yield None
+            return
+
+        try:
+            import torch
+            from torch.profiler import ProfilerActivity, profile, record_function
+
+            session_dir = os.path.join(
+                self.output_dir, f"{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{len(self._sessions)}")
+            os.makedirs(session_dir, exist_ok=True)
+
+            sampler = StackSampler(self.sample_interval)
+            # Aşama sınırları (forward, ner, ...) izde ayrı bloklar olarak görünür
+            metrics.set_stage_annotator(record_function)
+            start = time.perf_counter()
+            with profile(activities=[ProfilerActivity.CPU], record_shapes=True) as prof:
+                sampler.start()
+                self._local.active = True
+                try:
+                    with record_function(label):
+                        yield session_dir
+                finally:
+                    self._local.active = False
+                    sampler.stop()
+                    metrics.set_stage_annotator(None)
+            elapsed = time.perf_counter() - start
+
+            prof.export_chrome_trace(os.path.join(session_dir, 'trace.json'))
+            with open(os.path.join(session_dir, 'operators.txt'), 'w') as f:
+                f.write(prof.key_averages().table(
+                    sort_by="self_cpu_time_total", row_limit=self.row_limit))
+                f.write("\n\nGrouped by input shape\n")
+                f.write(prof.key_averages(group_by_input_shape=True).table(
+                    sort_by="self_cpu_time_total", row_limit=self.row_limit))
+            sampler.write_folded(os.path.join(session_dir, 'stacks.folded'))
+
+            summary = {
+                "label": label,
+                "pid": os.getpid(),
+                "seconds": elapsed,
+                "samples": sum(sampler.samples.values()),
+                "torch_threads": torch.get_num_threads(),
+                "directory": session_dir,
+            }
+            with open(os.path.join(session_dir, 'summary.json'), 'w') as f:
+                json.dump(summary, f, indent=2)
+            with self._lock:
+                self._sessions.append(summary)
+                del self._sessions[:-20]
+            logger.info(f"Profile for '{label}' written to {session_dir}")
+        finally:
+            self._session_lock.release()
+
+    def status(self):
+        with self._lock:
+            return {
+                "remaining": self.remaining,
+                "output_dir": self.output_dir,
+                "recent_sessions": list(self._sessions),
+            }
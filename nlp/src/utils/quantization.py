@@ -0,0 +1,153 @@
+# nlp/src/utils/quantization.py
+import argparse
+import io
+import json
+import logging
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+import torch
+from sklearn.model_selection import train_test_split
+from transformers import AutoTokenizer, BertForSequenceClassification
+
+from nlp.src.utils.inference_backends import QUANTIZED_STATE_DICT_NAME, default_quantized_path, quantize_model
+from nlp.src.utils.dataset_cache import build_intent_dataset
+from nlp.src.utils.length_bucketing import make_intent_dataloader
+from nlp.src.utils.model_utils import evaluate_model
+
+# Proje kök dizinini belirleme
+PROJECT_ROOT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..'))
+
+REPORT_NAME = "quantization_report.json"
+
+logging.basicConfig(level=logging.INFO,
+                    format='%(asctime)s - %(levelname)s - %(message)s')
+logger = logging.getLogger(__name__)
+
+
+def load_validation_split(data_path, label_encoder):
+    # model_training.train_intent_model ile aynı bölme
+    with open(data_path, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    texts = [item['text'] for item in data]
+    labels = label_encoder.transform([item['intent'] for item in data])
+    _, val_texts, _, val_labels = train_test_split(
+        texts, labels, test_size=0.2, random_state=42)
+    return val_texts, list(val_labels)
+
+
+def state_dict_size_mb(model):
+    buffer = io.BytesIO()
+    torch.save(model.state_dict(), buffer)
+    return buffer.tell() / (1024 * 1024)
+
+
+def measure_latency_ms(model, tokenizer, texts, warmup=5):
+    # Tekil istekler (batch boyutu 1) üzerinden CPU gecikmesi
+    encoded = [tokenizer(text, truncation=True, return_tensors="pt")
+               for text in texts]
+    timings = []
+    with torch.no_grad():
+        for i, inputs in enumerate(encoded):
+            start = time.perf_counter()
+            model(**inputs)
+            if i >= warmup:
+                timings.append((time.perf_counter() - start) * 1000)
+    if not timings:
+        return {"p50": 0.0, "p99": 0.0}
+    return {
+        "p50": float(np.percentile(timings, 50)),
+        "p99": float(np.percentile(timings, 99)),
+    }
+
+
+def quantize_and_gate(model_path, output_path, label_encoder_path, data_path, max_accuracy_drop=0.01):
+    """
+    Modeli dinamik int8'e quantize eder ve doğruluk kaybı eşiği aşmıyorsa
+    ayrı bir artifact olarak kaydeder. Rapor sözlüğünü döndürür.
+    """
+    device = torch.device("cpu")
+    tokenizer = AutoTokenizer.from_pretrained(model_path)
+    with open(label_encoder_path, 'rb') as f:
+        label_encoder = pickle.load(f)
+
+    model = BertForSequenceClassification.from_pretrained(model_path)
+    model.eval()
+    quantized = quantize_model(model)
+
+    val_texts, val_labels = load_validation_split(data_path, label_encoder)
+    val_loader = make_intent_dataloader(build_intent_dataset(
+        val_texts, val_labels, tokenizer), batch_size=16, shuffle=False)
+
+    logger.info("Evaluating fp32 model")
+    fp32_accuracy = evaluate_model(model, val_loader, device)
+    logger.info("Evaluating int8 model")
+    int8_accuracy = evaluate_model(quantized, val_loader, device)
+
+    fp32_latency = measure_latency_ms(model, tokenizer, val_texts)
+    int8_latency = measure_latency_ms(quantized, tokenizer, val_texts)
+    fp32_size = state_dict_size_mb(model)
+    int8_size = state_dict_size_mb(quantized)
+
+    accuracy_drop = fp32_accuracy - int8_accuracy
+    report = {
+        "fp32_accuracy": fp32_accuracy,
+        "int8_accuracy": int8_accuracy,
+        "accuracy_drop": accuracy_drop,
+        "max_accuracy_drop": max_accuracy_drop,
+        "fp32_size_mb": fp32_size,
+        "int8_size_mb": int8_size,
+        "size_reduction": 1 - int8_size / fp32_size,
+        "fp32_latency_ms": fp32_latency,
+        "int8_latency_ms": int8_latency,
+        "p50_speedup": fp32_latency["p50"] / int8_latency["p50"] if int8_latency["p50"] else 0.0,
+        "p99_speedup": fp32_latency["p99"] / int8_latency["p99"] if int8_latency["p99"] else 0.0,
+        "promoted": accuracy_drop <= max_accuracy_drop,
+    }
+
+    for key, value in report.items():
+        logger.info(f"{key}: {value}")
+
+    if not report["promoted"]:
+        logger.error(
+            f"Accuracy drop {accuracy_drop:.4f} exceeds threshold {max_accuracy_drop:.4f}; quantized model not saved")
+        return report
+
+    os.makedirs(output_path, exist_ok=True)
+    torch.save(quantized.state_dict(), os.path.join(
+        output_path, QUANTIZED_STATE_DICT_NAME))
+    model.config.save_pretrained(output_path)
+    tokenizer.save_pretrained(output_path)
+    shutil.copy(label_encoder_path, os.path.join(
+        output_path, os.path.basename(label_encoder_path)))
+    with open(os.path.join(output_path, REPORT_NAME), 'w') as f:
+        json.dump(report, f, indent=2)
+
+    logger.info(
+        f"Quantized model saved to {output_path}; serve it with NLP_BACKEND=torch_int8 NLP_QUANTIZED_MODEL={output_path}")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Quantize the intent classifier to dynamic int8 with an accuracy gate")
+    parser.add_argument('--model-path', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'models', 'intent_classifier_model'))
+    parser.add_argument('--output-path', type=str, default=None,
+                        help="Defaults to <model-path>_int8, which NLP_BACKEND=torch_int8 picks up without NLP_QUANTIZED_MODEL")
+    parser.add_argument('--label-encoder', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'models', 'label_encoder.pkl'))
+    parser.add_argument('--data', type=str, default=os.path.join(
+        PROJECT_ROOT, 'nlp', 'data', 'intent_data.json'))
+    parser.add_argument('--max-accuracy-drop', type=float, default=0.01,
+                        help="Refuse to save the quantized model if validation accuracy drops by more than this")
+    args = parser.parse_args()
+    args.output_path = args.output_path or default_quantized_path(args.model_path)
+
+    result = quantize_and_gate(args.model_path, args.output_path, args.label_encoder,
+                               args.data, max_accuracy_drop=args.max_accuracy_drop)
+    if not result["promoted"]:
+        raise SystemExit(1)
@@ -0,0 +1,264 @@
+# nlp/src/utils/response_generation.py
+import copy
+import json
+import logging
+import os
+import re
+import threading
+import time
+import torch
+from transformers import GPT2LMHeadModel, GPT2Tokenizer
+
+from nlp.src.utils.metrics import RESPONSE_FIRST_TOKEN, RESPONSE_TOKENS
+
+logger = logging.getLogger(__name__)
+
+PROJECT_ROOT = os.path.abspath(os.path.join(
+    os.path.dirname(__file__), '..', '..', '..'))
+DEFAULT_RESPONSE_MODEL_DIR = os.path.join(PROJECT_ROOT, 'nlp', 'models', 'response_generator')
+
+# response_data.json'daki bağlamlar; yer tutucular üretilen yanıtta entity
+# değerleriyle doldurulur. Böylece her intent'in istemi sabittir ve önbelleğe alınabilir.
+RESPONSE_CONTEXTS = {
+    "leave_request_annual": {"awaiting_dates": True},
+    "leave_request_excuse": {"awaiting_date_time": True},
+    "confirm_annual_leave": {"leave_type": "annual", "start_date": "{start_date}", "end_date": "{end_date}"},
+    "confirm_excuse_leave": {"leave_type": "excuse", "date": "{date}",
+                             "start_time": "{start_time}", "end_time": "{end_time}"},
+    "purchase_request": {"awaiting_product_details": True},
+}
+
+_PLACEHOLDER = re.compile(r"\{(\w*)\}")
+# Yanıt satır sonunda ya da model bir sonraki eğitim örneğine geçerse biter
+_STOP_MARKERS = ("\n", "Intent:")
+
+
+class GenerationFallback(Exception):
+    """
+    Model yanıtı kullanılamadığında fırlatılır; çağıran şablon yanıta döner.
+    reason: first_token_budget, latency_budget, max_tokens, missing_entities,
+    unfilled_slot, empty veya error.
+    """
+
+    def __init__(self, reason):
+        super().__init__(reason)
+        self.reason = reason
+
+
+def _stop_index(text):
+    positions = [text.find(marker) for marker in _STOP_MARKERS if marker in text]
+    return min(positions) if positions else None
+
+
+def _held_back(text):
+    # Bir durdurma işaretinin başı olabilecek son ek ("Int" gibi) netleşene kadar gönderilmez
+    for size in range(min(len(text), max(len(marker) for marker in _STOP_MARKERS) - 1), 0, -1):
+        if any(marker.startswith(text[-size:]) for marker in _STOP_MARKERS):
+            return size
+    return 0
+
+
+def build_prompt(intent, context):
+    # train_response_model'deki eğitim metninin "Response:" dahil ön kısmı
+    return f"Intent: {intent}\nContext: {json.dumps(context)}\nResponse:"
+
+
+def slot_values(intent, entities):
+    """
+    Yer tutucular için entity değerleri. Gerekli entity'ler eksikse None döner
+    (şablon yanıt eksik bilgiyi kendisi sorar).
+    """
+    dates = entities.get("DATE", [])
+    times = entities.get("TIME", [])
+    if intent == "confirm_annual_leave":
+        if len(dates) < 2:
+            return None
+        return {"start_date": dates[0], "end_date": dates[1]}
+    if intent == "confirm_excuse_leave":
+        if not dates or len(times) < 2:
+            return None
+        return {"date": dates[0], "start_time": times[0], "end_time": times[1]}
+    return {}
+
+
+class _SlotFiller:
+    """
+    Akış halindeki metinde {ad} yer tutucularını doldurur. Kapanmamış bir "{"
+    görüldüğünde metin yer tutucu tamamlanana kadar bekletilir.
+    """
+
+    def __init__(self, values):
+        self.values = values
+        self.pending = ""
+
+    def feed(self, text):
+        self.pending += text
+        output = []
+        while self.pending:
+            start = self.pending.find("{")
+            if start < 0:
+                output.append(self.pending)
+                self.pending = ""
+                break
+            output.append(self.pending[:start])
+            self.pending = self.pending[start:]
+            match = _PLACEHOLDER.match(self.pending)
+            if match is None:
+                if re.fullmatch(r"\{\w*", self.pending):
+                    break  # yer tutucu henüz tamamlanmadı
+                output.append(self.pending[0])
+                self.pending = self.pending[1:]
+                continue
+            name = match.group(1)
+            if name not in self.values:
+                raise GenerationFallback("unfilled_slot")
+            output.append(str(self.values[name]))
+            self.pending = self.pending[match.end():]
+        return "".join(output)
+
+    def flush(self):
+        if self.pending:
+            raise GenerationFallback("unfilled_slot")
+        return ""
+
+
+class ResponseGenerator:
+    """
+    Eğitilmiş GPT-2 yanıt modeliyle akış halinde yanıt üretir.
+    Her intent'in istemi sabit olduğundan istemin past_key_values'u ve son
+    konumun logit'leri bir kez hesaplanıp saklanır; ilk token istem üzerinde
+    hiç forward yapılmadan örneklenir. Bütçeler aşılırsa GenerationFallback.
+    """
+
+    def __init__(self, model_path=DEFAULT_RESPONSE_MODEL_DIR, device=None, max_new_tokens=64,
+                 first_token_budget_ms=300.0, latency_budget_ms=3000.0, temperature=0.0, top_p=0.9):
+        self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.tokenizer = GPT2Tokenizer.from_pretrained(model_path)
+        self.model = GPT2LMHeadModel.from_pretrained(model_path).to(self.device).eval()
+        self.max_new_tokens = max_new_tokens
+        self.first_token_budget_ms = first_token_budget_ms
+        self.latency_budget_ms = latency_budget_ms
+        self.temperature = temperature
+        self.top_p = top_p
+        self.stop_token_ids = {token_id for token_id in (
+            self.tokenizer.eos_token_id, self.tokenizer.pad_token_id) if token_id is not None}
+
+        self._prompts = {}
+        self._lock = threading.Lock()
+        logger.info(f"Response generator loaded from {model_path}")
+
+    @torch.no_grad()
+    def _prompt_state(self, prompt):
+        state = self._prompts.get(prompt)
+        if state is None:
+            input_ids = self.tokenizer(prompt, return_tensors="pt").input_ids.to(self.device)
+            outputs = self.model(input_ids=input_ids, use_cache=True)
+            state = (outputs.past_key_values, outputs.logits[0, -1])
+            with self._lock:
+                state = self._prompts.setdefault(prompt, state)
+        return state
+
+    def prepare(self, intents):
+        # Isınma sırasında (fork sonrası, her worker'da) bilinen intent'lerin istemleri hesaplanır
+        start = time.perf_counter()
+        for intent in intents:
+            self._prompt_state(build_prompt(intent, RESPONSE_CONTEXTS.get(intent, {})))
+        logger.info(
+            f"Cached {len(self._prompts)} response prompts in {time.perf_counter() - start:.2f}s")
+
+    def _next_token(self, logits):
+        if self.temperature <= 0:
+            return int(logits.argmax())
+        probabilities = torch.softmax(logits / self.temperature, dim=-1)
+        sorted_probabilities, sorted_ids = probabilities.sort(descending=True)
+        # top-p: kümülatif olasılığı top_p'ye ulaşan en küçük küme
+        keep = sorted_probabilities.cumsum(dim=-1) - sorted_probabilities < self.top_p
+        choice = torch.multinomial(sorted_probabilities[keep], 1)
+        return int(sorted_ids[keep][choice])
+
+    @torch.no_grad()
+    def stream(self, intent, entities, truncate=True):
+        """
+        Yanıtı metin parçaları halinde üretir. Yer tutucular entity değerleriyle
+        doldurulur; yanıt bitiş token'ında, satır sonunda ya da "Intent:" işaretinde biter.
+        truncate verilirse metin gönderilmeye başladıktan sonra aşılan token ya da
+        süre bütçesi yanıtı orada keser ve üreteç bütçenin adını döndürür
+        (StopIteration.value); aksi halde GenerationFallback yükseltilir.
+        """
+        values = slot_values(intent, entities)
+        if values is None:
+            raise GenerationFallback("missing_entities")
+
+        start = time.perf_counter()
+        past_key_values, logits = self._prompt_state(build_prompt(intent, RESPONSE_CONTEXTS.get(intent, {})))
+        # Önbellekteki istem durumu değişmemeli; yeni Cache nesneleri yerinde güncellenir
+        past_key_values = copy.deepcopy(past_key_values)
+        filler = _SlotFiller(values)
+        generated = []
+        decoded = ""
+        emitted = False
+        truncated = None
+
+        def over_budget(reason):
+            # Gönderilmiş metin geri alınamaz; kesilebiliyorsa yanıt burada biter
+            if truncate and emitted and not filler.pending:
+                return reason
+            raise GenerationFallback(reason)
+
+        while True:
+            token_id = self._next_token(logits)
+            ended = token_id in self.stop_token_ids
+            if not ended:
+                generated.append(token_id)
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                if len(generated) == 1 and elapsed_ms > self.first_token_budget_ms:
+                    raise GenerationFallback("first_token_budget")
+                if elapsed_ms > self.latency_budget_ms:
+                    truncated = over_budget("latency_budget")
+                    break
+
+            # Türkçe karakterler birden fazla token'a bölünebilir; tamamlanana kadar beklenir
+            text = self.tokenizer.decode(generated, skip_special_tokens=True,
+                                         clean_up_tokenization_spaces=False)
+            stop = _stop_index(text)
+            finished = ended or stop is not None
+            if stop is not None:
+                text = text[:stop].rstrip()
+            elif not ended:
+                text = text[:len(text) - _held_back(text)]
+            if not text.endswith("\ufffd") and len(text) > len(decoded):
+                chunk = text[len(decoded):]
+                decoded = text
+                if not emitted and not filler.pending:
+                    chunk = chunk.lstrip()
+                delta = filler.feed(chunk)
+                if delta:
+                    if not emitted:
+                        RESPONSE_FIRST_TOKEN.observe(time.perf_counter() - start)
+                        emitted = True
+                    yield delta
+            if finished:
+                break
+            if len(generated) >= self.max_new_tokens:
+                truncated = over_budget("max_tokens")
+                break
+
+            outputs = self.model(input_ids=torch.tensor([[token_id]], device=self.device),
+                                 past_key_values=past_key_values, use_cache=True)
+            past_key_values = outputs.past_key_values
+            logits = outputs.logits[0, -1]
+
+        filler.flush()
+        RESPONSE_TOKENS.observe(len(generated))
+        if not emitted:
+            raise GenerationFallback("empty")
+        return truncated
+
+    def generate(self, intent, entities):
+        # Akış dışında kesik yanıt yerine şablona dönülür
+        return "".join(self.stream(intent, entities, truncate=False))
+
+
+def sse_event(event, data):
+    # Server-sent events çerçevesi
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
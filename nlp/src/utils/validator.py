@@ -1,8 +1,14 @@
 
 # nlp/src/utils/validator.py
-from datetime import datetime, timedelta
+import re
+from datetime import date, datetime, timedelta
+import numpy as np
 from dateutil.parser import parse
 
+from nlp.src.utils.normalizer import normalize_date, normalize_duration
+
+_ISO_DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+
 
 def parse_date(date):
     if isinstance(date, str):
@@ -18,16 +24,20 @@ def parse_date(date):
     return None
 
 
-def validate_date(date_str):
+def validate_date(date_str, today=None):
     if date_str is None:
         return False, "Tarih belirtilmemiş."
 
     try:
-        parsed_date = parse(date_str, dayfirst=True).date()
+        # ISO tarihler dayfirst ile yıl-gün-ay okunmasın (2024-13-01 -> 13 Ocak)
+        if isinstance(date_str, str) and _ISO_DATE.fullmatch(date_str.strip()):
+            parsed_date = date.fromisoformat(date_str.strip())
+        else:
+            parsed_date = parse(date_str, dayfirst=True).date()
     except ValueError:
         return False, "Geçersiz tarih formatı. Lütfen GG.AA.YYYY formatında bir tarih girin."
 
-    today = datetime.now().date()
+    today = today or datetime.now().date()
     if parsed_date < today:
         return False, "Geçmiş tarihler için izin talebi oluşturamazsınız."
     if parsed_date > today + timedelta(days=365):
@@ -53,8 +63,9 @@ def validate_duration(duration_minutes):
 
 
 def validate_leave_request(start_date, end_date, start_time, end_time, duration):
+    today = datetime.now().date()
     # Tarih kontrolü
-    is_valid, message = validate_date(start_date)
+    is_valid, message = validate_date(start_date, today)
     if not is_valid:
         return False, message
 
@@ -62,7 +73,7 @@ def validate_leave_request(start_date, end_date, start_time, end_time, duration)
     parsed_end_date = parse_date(end_date) if end_date else parsed_start_date
 
     if parsed_end_date:
-        is_valid, message = validate_date(end_date)
+        is_valid, message = validate_date(end_date, today)
         if not is_valid:
             return False, message
         if parsed_end_date < parsed_start_date:
@@ -89,3 +100,181 @@ def validate_leave_request(start_date, end_date, start_time, end_time, duration)
             return False, "En fazla 30 günlük izin talep edebilirsiniz."
 
     return True, None
+
+
+# Toplu doğrulama (validate_leave_requests) için satır başına hata kodları;
+# sıralama validate_leave_request'teki kontrol sırasıyla aynıdır
+VALID = 0
+MISSING_DATE = 1
+INVALID_DATE = 2
+PAST_DATE = 3
+DATE_TOO_FAR = 4
+INVALID_END_DATE = 5
+PAST_END_DATE = 6
+END_DATE_TOO_FAR = 7
+END_BEFORE_START = 8
+INVALID_DURATION = 9
+NON_POSITIVE_DURATION = 10
+DURATION_TOO_LONG = 11
+RANGE_TOO_LONG = 12
+
+ERROR_MESSAGES = {
+    MISSING_DATE: "Tarih belirtilmemiş.",
+    INVALID_DATE: "Geçersiz tarih formatı. Lütfen GG.AA.YYYY formatında bir tarih girin.",
+    PAST_DATE: "Geçmiş tarihler için izin talebi oluşturamazsınız.",
+    DATE_TOO_FAR: "En fazla bir yıl ilerisine kadar izin talebi oluşturabilirsiniz.",
+    INVALID_END_DATE: "Geçersiz tarih formatı. Lütfen GG.AA.YYYY formatında bir tarih girin.",
+    PAST_END_DATE: "Geçmiş tarihler için izin talebi oluşturamazsınız.",
+    END_DATE_TOO_FAR: "En fazla bir yıl ilerisine kadar izin talebi oluşturabilirsiniz.",
+    END_BEFORE_START: "Bitiş tarihi başlangıç tarihinden önce olamaz.",
+    INVALID_DURATION: "Geçersiz süre formatı.",
+    NON_POSITIVE_DURATION: "Süre sıfırdan büyük olmalıdır.",
+    DURATION_TOO_LONG: "Bir günde en fazla 8 saatlik izin talep edebilirsiniz.",
+    RANGE_TOO_LONG: "En fazla 30 günlük izin talep edebilirsiniz.",
+}
+
+MAX_DAYS_AHEAD = 365
+MAX_RANGE_DAYS = 30
+MAX_DURATION_MINUTES = 480  # 8 saat
+
+# Memo'da geçersiz ve boş değerleri ayırt etmek için
+_MISSING = object()
+_INVALID = object()
+
+
+def _is_missing(value):
+    return value is None or (isinstance(value, float) and value != value) or (
+        isinstance(value, str) and not value.strip())
+
+
+def _parse_leave_date(value, today):
+    # Tek bir hücreyi date'e çevirir; normalizer ile biçimi tanınmayanlar için dateutil
+    if _is_missing(value):
+        return _MISSING
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, np.datetime64):
+        return _INVALID if np.isnat(value) else value.astype('datetime64[D]').item()
+    if not isinstance(value, str):
+        return _INVALID
+
+    normalized = normalize_date(value, today=today)
+    try:
+        if _ISO_DATE.fullmatch(normalized):
+            # 2024-02-31, 2024-13-01 gibi var olmayan tarihler de bu biçimdedir
+            return date.fromisoformat(normalized)
+        return parse(value, dayfirst=True).date()
+    except (ValueError, OverflowError):
+        return _INVALID
+
+
+def _parse_date_column(values, today, memo):
+    """
+    Tarih sütununu datetime64[D] dizisine çevirir; her farklı değer memo
+    üzerinden bir kez çözülür. Boş ve geçersiz hücreler NaT olur ve ayrı
+    maskelerle döndürülür.
+    """
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.datetime64):
+        parsed = values.astype('datetime64[D]')
+        return parsed, np.isnat(parsed), np.zeros(len(parsed), dtype=bool)
+
+    parsed = np.empty(len(values), dtype='datetime64[D]')
+    missing = np.zeros(len(values), dtype=bool)
+    invalid = np.zeros(len(values), dtype=bool)
+    for i, value in enumerate(values):
+        try:
+            result = memo[value]
+        except KeyError:
+            result = memo[value] = _parse_leave_date(value, today)
+        except TypeError:  # hashlenemeyen hücreler memo'ya alınmaz
+            result = _parse_leave_date(value, today)
+        if result is _MISSING:
+            missing[i] = True
+            parsed[i] = np.datetime64('NaT')
+        elif result is _INVALID:
+            invalid[i] = True
+            parsed[i] = np.datetime64('NaT')
+        else:
+            parsed[i] = result
+    return parsed, missing, invalid
+
+
+def _duration_column(values, count):
+    # Dakika cinsinden float dizi; boş hücreler NaN, çözülemeyen metinler ayrıca işaretlenir
+    if values is None:
+        return np.full(count, np.nan), np.zeros(count, dtype=bool)
+    if isinstance(values, np.ndarray) and np.issubdtype(values.dtype, np.number):
+        return values.astype(float), np.zeros(count, dtype=bool)
+
+    minutes = np.full(count, np.nan)
+    invalid = np.zeros(count, dtype=bool)
+    memo = {}
+    for i, value in enumerate(values):
+        if _is_missing(value):
+            continue
+        if isinstance(value, str):
+            if value not in memo:
+                memo[value] = normalize_duration(value)
+            value = memo[value]
+        if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+            minutes[i] = value
+        else:
+            invalid[i] = True
+    return minutes, invalid
+
+
+def validate_leave_requests(start_dates, end_dates=None, durations=None, today=None):
+    """
+    Toplu izin talebi doğrulaması (göç, bordro dönemi mutabakatı gibi on binlerce satır).
+    Girdiler sütun halindedir (liste veya numpy dizisi); end_dates boş olan satırlarda
+    bitiş tarihi başlangıç tarihi kabul edilir, durations dakika ya da '2 saat' gibi metin
+    olabilir. "Bugün" batch başına bir kez alınır, her farklı tarih metni bir kez çözülür
+    ve aralık kuralları vektörel karşılaştırmalarla uygulanır.
+
+    Dönüş: satır başına hata kodu dizisi (VALID = 0); mesajlar için ERROR_MESSAGES.
+    Birden fazla kural ihlal ediliyorsa validate_leave_request'in sırasıyla ilk ihlal döner.
+    """
+    count = len(start_dates)
+    if end_dates is not None and len(end_dates) != count:
+        raise ValueError("end_dates must have the same length as start_dates")
+    if durations is not None and len(durations) != count:
+        raise ValueError("durations must have the same length as start_dates")
+
+    today = today or datetime.now().date()
+    memo = {}
+    start, start_missing, start_invalid = _parse_date_column(start_dates, today, memo)
+    if end_dates is None:
+        end, end_missing, end_invalid = start, np.ones(count, dtype=bool), np.zeros(count, dtype=bool)
+    else:
+        end, end_missing, end_invalid = _parse_date_column(end_dates, today, memo)
+    end = np.where(end_missing, start, end)
+    minutes, duration_invalid = _duration_column(durations, count)
+
+    today = np.datetime64(today, 'D')
+    latest = today + np.timedelta64(MAX_DAYS_AHEAD, 'D')
+    # NaT ve NaN içeren karşılaştırmalar False döner; eksik/geçersiz satırlar
+    # yalnızca kendi maskeleriyle işaretlenir
+    with np.errstate(invalid='ignore'):
+        rules = [
+            (start_missing, MISSING_DATE),
+            (start_invalid, INVALID_DATE),
+            (start < today, PAST_DATE),
+            (start > latest, DATE_TOO_FAR),
+            (end_invalid, INVALID_END_DATE),
+            (end < today, PAST_END_DATE),
+            (end > latest, END_DATE_TOO_FAR),
+            (end < start, END_BEFORE_START),
+            (duration_invalid, INVALID_DURATION),
+            (minutes <= 0, NON_POSITIVE_DURATION),
+            (minutes > MAX_DURATION_MINUTES, DURATION_TOO_LONG),
+            ((end - start) > np.timedelta64(MAX_RANGE_DAYS, 'D'), RANGE_TOO_LONG),
+        ]
+    conditions, codes = zip(*rules)
+    return np.select(conditions, codes, default=VALID)
+
+
+def error_messages(codes):
+    # Hata kodlarını kullanıcıya gösterilecek mesajlara çevirir (geçerli satırlar için None)
+    return [ERROR_MESSAGES.get(int(code)) for code in codes]